@@ -0,0 +1,97 @@
+"""Benchmark do parser de páginas Mercado Livre: leitura completa + 7 regex vs. streaming em passada única.
+
+Uso:
+    python -m benchmarks.bench_ml_parser [arquivo.html | pasta ...]
+
+Sem argumentos usa as páginas salvas em benchmarks/amostras_ml/*.html
+(salve pelo navegador com "Salvar como... > Somente HTML"). Se não houver
+nenhuma, gera duas páginas sintéticas: uma com o JSON do produto no meio do
+corpo e outra com ele no fim (pior caso: a página inteira é lida nos dois parsers).
+Além do tempo de relógio, o tempo de CPU é mostrado ao lado dos bytes lidos.
+"""
+import os
+import re
+import sys
+import glob
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.mercadolivre import extrair_produto_html, TAMANHO_CHUNK
+
+PASTA_AMOSTRAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "amostras_ml")
+REPETICOES = 20
+
+
+def extrair_legado(html):
+    """Reprodução do parser anterior: página inteira em memória e uma varredura por padrão"""
+    titulo_match = re.search(r'<title[^>]*>(.*?)</title>', html, re.IGNORECASE)
+    for padrao in [r'"price":\s*"(\d+\.?\d*)"', r'"price":\s*(\d+\.?\d*)', r'R\$\s*[\d\.]+,\d+']:
+        if re.search(padrao, html):
+            break
+    for padrao in [r'"picture":"([^"]+)"', r'data-src="([^"]+)"', r'src="([^"]+\.(jpg|jpeg|png|gif))"']:
+        if re.search(padrao, html):
+            break
+    return titulo_match
+
+
+def pagina_sintetica(antes=800, depois=4000):
+    bloco = '<div class="ui-pdp">' + "conteudo " * 20 + "</div>\n"
+    return (
+        "<html><head><title>Fone Bluetooth Exemplo | Mercado Livre</title></head><body>"
+        + bloco * antes
+        + '<script>{"price": 129.9, "picture":"https://http2.mlstatic.com/D_exemplo.jpg"}</script>'
+        + bloco * depois
+        + "</body></html>"
+    ).encode("utf-8")
+
+
+def carregar_amostras(argumentos):
+    caminhos = []
+    for arg in argumentos or [PASTA_AMOSTRAS]:
+        if os.path.isdir(arg):
+            caminhos.extend(sorted(glob.glob(os.path.join(arg, "*.html"))))
+        elif os.path.isfile(arg):
+            caminhos.append(arg)
+    amostras = []
+    for caminho in caminhos:
+        with open(caminho, "rb") as f:
+            amostras.append((os.path.basename(caminho), f.read()))
+    if not amostras:
+        amostras.append(("sintetica_meio.html", pagina_sintetica()))
+        amostras.append(("sintetica_fim.html", pagina_sintetica(antes=4800, depois=0)))
+    return amostras
+
+
+def _cronometrar(funcao):
+    """Tempo médio por repetição: (relógio, CPU) em segundos"""
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    for _ in range(REPETICOES):
+        resultado = funcao()
+    return (time.perf_counter() - inicio) / REPETICOES, (time.process_time() - inicio_cpu) / REPETICOES, resultado
+
+
+def _streaming(dados):
+    chunks = (dados[i:i + TAMANHO_CHUNK] for i in range(0, len(dados), TAMANHO_CHUNK))
+    return extrair_produto_html(chunks)
+
+
+def medir(nome, dados):
+    tempo_legado, cpu_legado, _ = _cronometrar(lambda: extrair_legado(dados.decode("utf-8", errors="replace")))
+    tempo_stream, cpu_stream, (produto, bytes_lidos) = _cronometrar(lambda: _streaming(dados))
+
+    print(f"{nome[:22]:22} | {len(dados):>10,} | {bytes_lidos:>10,} | "
+          f"{tempo_legado * 1000:>8.2f} | {cpu_legado * 1000:>8.2f} | "
+          f"{tempo_stream * 1000:>8.2f} | {cpu_stream * 1000:>8.2f} | {produto['preco']:>7}")
+
+
+def main():
+    print(f"{'página':22} | {'bytes antes':>10} | {'bytes dep.':>10} | {'ms antes':>8} | {'cpu ant.':>8} | "
+          f"{'ms dep.':>8} | {'cpu dep.':>8} | {'preço':>7}")
+    print("-" * 106)
+    for nome, dados in carregar_amostras(sys.argv[1:]):
+        medir(nome, dados)
+
+
+if __name__ == "__main__":
+    main()
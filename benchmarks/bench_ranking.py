@@ -0,0 +1,95 @@
+"""Benchmark do ranking de ofertas: NumPy + seleção parcial vs. pontuação em Python + sort completo.
+
+Uso:
+    python -m benchmarks.bench_ranking [k]
+
+Gera 10 mil e 100 mil ofertas sintéticas (com os campos de processar_oferta_individual
+e parte delas já enviada antes) e mede o tempo para escolher as k melhores (padrão: 10).
+"""
+import os
+import sys
+import math
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.ranking import selecionar_melhores, PESOS_PADRAO, MEIA_VIDA_RECENCIA
+
+TAMANHOS = (10_000, 100_000)
+REPETICOES = 5
+
+
+def ofertas_sinteticas(n, seed=42):
+    rnd = random.Random(seed)
+    agora = time.time()
+    ofertas = []
+    envios = {}
+    for i in range(n):
+        chave = f"shopee:{i}"
+        ofertas.append({
+            "chave": chave,
+            "titulo": f"Produto {i}",
+            "preco_valor": round(rnd.uniform(5, 500), 2),
+            "avaliacao_valor": round(rnd.uniform(3, 5), 1),
+            "desconto": float(rnd.randint(0, 80)),
+            "comissao": rnd.uniform(0, 0.15),
+            "vendas": float(int(rnd.paretovariate(1.2) * 10)),
+        })
+        if rnd.random() < 0.3:
+            envios[chave] = agora - rnd.uniform(0, 30 * 86400)
+    return ofertas, envios
+
+
+def selecionar_python(ofertas, k, envios, faixa_preco=(10, 300)):
+    """Mesma pontuação em Python puro, com sort completo no final"""
+    pesos = PESOS_PADRAO
+    agora = time.time()
+
+    def escala(campo, f=lambda v: v):
+        valores = [f(o[campo]) for o in ofertas]
+        minimo, maximo = min(valores), max(valores)
+        amplitude = maximo - minimo
+        return [(v - minimo) / amplitude if amplitude else 0.0 for v in valores]
+
+    desconto = escala("desconto")
+    comissao = escala("comissao")
+    vendas = escala("vendas", lambda v: math.log1p(max(v, 0)))
+    avaliacao = escala("avaliacao_valor")
+    preco = escala("preco_valor")
+    pontuadas = []
+    for i, o in enumerate(ofertas):
+        if not faixa_preco[0] <= o["preco_valor"] <= faixa_preco[1]:
+            continue
+        ultimo = envios.get(o["chave"])
+        recencia = 1.0 if ultimo is None else 1.0 - 2 ** (-max(agora - ultimo, 0) / 3600 / MEIA_VIDA_RECENCIA)
+        score = (pesos["desconto"] * desconto[i] + pesos["comissao"] * comissao[i] + pesos["vendas"] * vendas[i]
+                 + pesos["avaliacao"] * avaliacao[i] + pesos["preco"] * (1 - preco[i]) + pesos["recencia"] * recencia)
+        pontuadas.append((-score, i))
+    pontuadas.sort()
+    return [ofertas[i] for _, i in pontuadas[:k]]
+
+
+def medir(funcao):
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"Top {k}, melhor de {REPETICOES} repetições\n")
+    print(f"{'ofertas':>10} | {'python':>10} | {'numpy':>10} | {'ganho':>6} | mesmas k")
+    for n in TAMANHOS:
+        ofertas, envios = ofertas_sinteticas(n)
+        t_py, r_py = medir(lambda: selecionar_python(ofertas, k, envios))
+        t_np, r_np = medir(lambda: selecionar_melhores(ofertas, k, faixa_preco=(10, 300), ultimos_envios=envios))
+        iguais = [o["chave"] for o in r_py] == [o["chave"] for o in r_np]
+        print(f"{n:>10,} | {t_py * 1000:>8.1f}ms | {t_np * 1000:>8.1f}ms | {t_py / t_np:>5.1f}x | {'sim' if iguais else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
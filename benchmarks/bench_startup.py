@@ -0,0 +1,96 @@
+"""Benchmark de abertura do app: tempo de import por módulo e tempo até o primeiro frame.
+
+Uso:
+    python -m benchmarks.bench_startup [--modulo cli] [--repeticoes N] [--top N] [--exe dist/ZapFinder/ZapFinder.exe]
+
+1. Import: roda `python -X importtime -c "import ui.app"` (ou --modulo) em um processo novo e
+   mostra os módulos de topo que mais pesam (tempo acumulado, incluindo os
+   submódulos). Selenium, PIL, requests e pywin32 não devem aparecer: eles só
+   são carregados quando um envio começa.
+2. Primeiro frame: abre o main.py (ou o executável com --exe) com
+   ZAPFINDER_SAIR_APOS_INICIO=1, que encerra o app logo depois de montar a
+   tela, e mede o tempo total do processo. Precisa de ambiente gráfico.
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADOS = ("selenium", "PIL", "requests", "urllib3", "win32clipboard", "core.whatsapp", "core.utils", "core.shopee")
+
+
+def tempos_de_import(modulo="ui.app"):
+    """{módulo de topo: microssegundos acumulados} e o conjunto de todos os módulos importados"""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ, capture_output=True, text=True)
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+
+    por_topo = defaultdict(int)
+    importados = set()
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, acumulado, nome = [c.strip() for c in linha[len("import time:"):].split("|")]
+        if not acumulado.isdigit():
+            continue  # Cabeçalho
+        importados.add(nome)
+        # Só linhas sem indentação (importadas diretamente pelo processo) somam no topo
+        bruto = linha.split("|")[2]
+        if len(bruto) - len(bruto.lstrip()) <= 1:
+            por_topo[nome] += int(acumulado)
+    return por_topo, importados
+
+
+def primeiro_frame(comando, repeticoes):
+    ambiente = dict(os.environ, ZAPFINDER_SAIR_APOS_INICIO="1")
+    medidas = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        try:
+            subprocess.run(comando, cwd=RAIZ, env=ambiente, timeout=120,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except subprocess.TimeoutExpired:
+            print("   (sem resposta em 120s; há ambiente gráfico?)")
+            return None
+        medidas.append(time.perf_counter() - inicio)
+    return medidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modulo", default="ui.app", help="Módulo a importar (ex.: cli para o modo sem interface)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--exe", help="Executável gerado pelo build (em vez de python main.py)")
+    parser.add_argument("--sem-frame", action="store_true", help="Só o tempo de import (sem abrir janela)")
+    args = parser.parse_args()
+
+    print(f"Import de {args.modulo} (tempo acumulado por módulo de topo):")
+    por_topo, importados = tempos_de_import(args.modulo)
+    total = sum(por_topo.values())
+    for nome, us in sorted(por_topo.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {nome:40} {us / 1000:>8.1f} ms  {us * 100 / total:>5.1f}%")
+    print(f"   {'TOTAL':40} {total / 1000:>8.1f} ms")
+
+    carregados = [m for m in PESADOS if m in importados]
+    if carregados:
+        print(f"   ATENÇÃO: módulos pesados carregados na abertura: {', '.join(carregados)}")
+
+    if args.sem_frame:
+        return
+
+    comando = [args.exe] if args.exe else [sys.executable, "main.py"]
+    print(f"\nPrimeiro frame ({' '.join(comando)}, {args.repeticoes} repetições):")
+    medidas = primeiro_frame(comando, args.repeticoes)
+    if medidas:
+        medidas.sort()
+        print(f"   min {medidas[0]:.2f}s | mediana {medidas[len(medidas) // 2]:.2f}s | max {medidas[-1]:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark de inserção de texto no WhatsApp Web: colar (evento paste via JS) vs. digitar (send_keys).
+
+Uso:
+    python -m benchmarks.bench_texto_whatsapp "Nome do Grupo" [repetições]
+
+Abre o Chrome com o perfil normal (whatsapp_session), entra no grupo e insere
+uma legenda típica na caixa de mensagem pelos dois métodos, apagando em seguida.
+Nada é enviado ao grupo.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium.webdriver.common.by import By
+from core.whatsapp import WhatsAppService, SELETOR_CAIXA_CHAT
+
+LEGENDA = (
+    "*Fone de Ouvido Bluetooth 5.3 Sem Fio com Cancelamento de Ruído e Estojo de Carga*\n\n"
+    "🔥 Por: R$ 89.90\n\n"
+    "✅ Bateria de até 30 horas com o estojo\n"
+    "✅ Resistente a água e suor (IPX5)\n"
+    "✅ Conexão estável e pareamento automático\n\n"
+    "🛒 Compre aqui: https://s.shopee.com.br/exemplo123\n"
+) * 3
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    grupo = sys.argv[1]
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    servico = WhatsAppService()
+    bot = servico.obter_bot()
+    if not bot or not bot.buscar_grupo(grupo):
+        print("Não foi possível abrir o grupo.")
+        servico.encerrar()
+        return
+
+    try:
+        print(f"Texto com {len(LEGENDA)} caracteres, {repeticoes} repetições por método\n")
+        for metodo in ("digitar", "colar"):
+            medidas = []
+            for _ in range(repeticoes):
+                box = bot.driver.find_element(By.CSS_SELECTOR, SELETOR_CAIXA_CHAT)
+                box.click()
+                usado = bot.inserir_texto(box, LEGENDA, metodo)
+                if usado != metodo:
+                    print(f"{metodo}: falhou")
+                    break
+                medidas.append(bot.metricas_texto["caracteres_por_segundo"])
+                bot.limpar_caixa(box)
+            if medidas:
+                media = sum(medidas) / len(medidas)
+                print(f"{metodo:8} | {media:>10,.0f} caracteres/s | {len(LEGENDA) / media:>6.2f}s por legenda")
+    finally:
+        servico.encerrar()
+
+
+if __name__ == "__main__":
+    main()
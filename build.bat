@@ -36,8 +36,9 @@ echo [INFO] Compilando ZapFinder.exe...
 echo Isso pode demorar alguns minutos.
 echo.
 
+REM --onedir: abre mais rapido que --onefile, que descompacta tudo a cada execucao
 pyinstaller --noconfirm ^
-            --onefile ^
+            --onedir ^
             --windowed ^
             --name "ZapFinder" ^
             --hidden-import "flet" ^
@@ -46,11 +47,12 @@ pyinstaller --noconfirm ^
             main.py
 
 echo.
-if exist "dist\ZapFinder.exe" (
+if exist "dist\ZapFinder\ZapFinder.exe" (
     echo ======================================================
     echo            BUILD CONCLUIDO COM SUCESSO!
     echo ======================================================
-    echo O executavel esta na pasta: dist\ZapFinder.exe
+    echo O executavel esta em: dist\ZapFinder\ZapFinder.exe
+    echo Distribua a pasta dist\ZapFinder inteira, nao so o .exe.
     echo.
 ) else (
     echo [ERRO] Falha na compilacao. Verifique as mensagens acima.
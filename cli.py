@@ -0,0 +1,103 @@
+"""ZapFinder sem interface gráfica (para rodar em servidor ou como serviço).
+
+Uso:
+    python cli.py executar [--grupos "A, B"] [--limit N] [--dry-run]
+    python cli.py --gravar respostas.jsonl executar      (grava as respostas da API)
+    python cli.py --reproduzir respostas.jsonl executar  (usa só as respostas gravadas, offline)
+    python cli.py agendador [--politica uma|todas|pular]
+
+Usa o mesmo config.json e o mesmo banco (zapfinder.db) da interface: os
+agendamentos criados na aba Agendamento são os que o agendador executa.
+"""
+import sys
+import signal
+import argparse
+import threading
+
+from core.engine import Motor, CONFIG_FILE, carregar_config, migrar_horarios_antigos, separar_grupos
+from core.scheduler import POLITICAS
+from core.shopee_cache import configurar_cache_respostas, GRAVAR, REPRODUZIR
+from database.db import init_db
+
+
+def _log(msg):
+    print(msg, flush=True)
+
+
+def comando_executar(motor, args):
+    filtros = {"palavra_chave": args.palavra, "ordem": args.ordem, "lista": args.lista,
+               "categoria": args.categoria, "loja": args.loja}
+    resumo = motor.executar(separar_grupos(args.grupos) or None, args.limit, dry_run=args.dry_run, filtros=filtros)
+    if resumo is None:
+        return 1
+    _log(f"Resumo: {resumo['produtos']} produtos, {resumo['enviados']} envios, {resumo['falhas']} falhas.")
+    return 0
+
+
+def comando_agendador(motor, args):
+    if not motor.iniciar_agendador(args.politica):
+        _log("Nenhum agendamento ativo. Crie agendamentos pela interface.")
+        return 1
+
+    encerrar = threading.Event()
+
+    def ao_sinal(signum, frame):
+        _log("Encerrando agendador...")
+        encerrar.set()
+
+    signal.signal(signal.SIGINT, ao_sinal)
+    signal.signal(signal.SIGTERM, ao_sinal)
+    # wait() com timeout para o Ctrl+C ser atendido também no Windows
+    while not encerrar.wait(1):
+        pass
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="zapfinder", description="ZapFinder sem interface gráfica")
+    parser.add_argument("--config", default=None, help="Arquivo de configuração (padrão: config.json)")
+    parser.add_argument("--cache-segundos", type=float, help="Validade do cache de respostas da API Shopee (0 = desativado)")
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument("--gravar", metavar="ARQUIVO", help="Grava as respostas da API Shopee nesse arquivo")
+    modo.add_argument("--reproduzir", metavar="ARQUIVO", help="Responde só com o arquivo gravado, sem acessar a API")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_exec = sub.add_parser("executar", help="Uma execução: busca, prepara e envia")
+    p_exec.add_argument("--grupos", help="Grupos separados por vírgula (padrão: os do config.json)")
+    p_exec.add_argument("--limit", type=int, help="Quantidade de produtos (padrão: a do config.json)")
+    p_exec.add_argument("--palavra", help="Palavra-chave da busca na Shopee")
+    p_exec.add_argument("--ordem", help="relevancia, vendas, comissao, menor_preco ou maior_preco")
+    p_exec.add_argument("--lista", help="todas, maior_comissao ou mais_vendidas (listType)")
+    p_exec.add_argument("--categoria", help="ID da categoria (productCatId)")
+    p_exec.add_argument("--loja", help="ID da loja (shopId)")
+    p_exec.add_argument("--dry-run", action="store_true", help="Busca e prepara as ofertas sem enviar nem gravar histórico")
+
+    p_agenda = sub.add_parser("agendador", help="Roda os agendamentos do banco até receber Ctrl+C/SIGTERM")
+    p_agenda.add_argument("--politica", choices=POLITICAS, help="Horários perdidos (padrão: a do config.json)")
+
+    args = parser.parse_args(argv)
+
+    if args.gravar:
+        configurar_cache_respostas(modo=GRAVAR, arquivo=args.gravar)
+    elif args.reproduzir:
+        configurar_cache_respostas(modo=REPRODUZIR, arquivo=args.reproduzir)
+
+    def obter_config():
+        cfg = carregar_config(args.config) if args.config else carregar_config()
+        if args.cache_segundos is not None:
+            cfg["cache_shopee_segundos"] = args.cache_segundos
+        return cfg
+
+    motor = Motor(obter_config=obter_config, log=_log)
+    init_db()
+    migrar_horarios_antigos(args.config or CONFIG_FILE)
+    try:
+        if args.comando == "executar":
+            return comando_executar(motor, args)
+        return comando_agendador(motor, args)
+    finally:
+        motor.encerrar()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,416 @@
+import os
+import json
+import math
+import atexit
+import itertools
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Shopee/requests, Selenium, PIL e pywin32 só são importados quando uma execução
+# começa (em _executar/obter_servicos), para a tela e o CLI abrirem rápido.
+from core.scheduler import Agendador, UMA
+from database.db import (init_db, salvar_historico, flush_historico, registrar_envio, limpar_envios_antigos,
+                         definir_proxima_execucao, proximos_agendamentos, criar_agendamento, listar_agendamentos,
+                         RETENCAO_ENVIOS_DIAS)
+
+CONFIG_FILE = "config.json"
+FATOR_BUSCA = 5  # Ofertas buscadas por oferta enviada, no máximo (sobra para as repetidas)
+
+
+def carregar_config(caminho=CONFIG_FILE):
+    """Lê o config.json (o mesmo salvo pela tela de Configurações)"""
+    if os.path.exists(caminho):
+        try:
+            with open(caminho, "r") as f:
+                return json.load(f)
+        except:
+            return {}
+    return {}
+
+
+def salvar_config(cfg, caminho=CONFIG_FILE):
+    """Grava o config.json"""
+    with open(caminho, "w") as f:
+        json.dump(cfg, f)
+
+
+def migrar_horarios_antigos(caminho=CONFIG_FILE):
+    """Converte os "scheduler_times" de versões antigas do config.json em agendamentos.
+
+    Cada horário vira um agendamento com a config global (só se o banco ainda não
+    tiver nenhum) e a chave sai do arquivo. Chamado pela tela e pelo CLI depois
+    de init_db(). Retorna quantos agendamentos foram criados.
+    """
+    cfg = carregar_config(caminho)
+    if "scheduler_times" not in cfg:
+        return 0
+    horarios = cfg.pop("scheduler_times") or []
+    criados = 0
+    if not listar_agendamentos():
+        for horario in horarios:
+            if criar_agendamento(horario, {"grupo": "", "limit": None, "fonte": "shopee"}) is not None:
+                criados += 1
+    salvar_config(cfg, caminho)
+    return criados
+
+
+# Chaves de configuração (global ou de cada agendamento) que viram filtros do productOfferV2
+FILTROS_BUSCA = ("palavra_chave", "ordem", "lista", "categoria", "loja")
+
+
+def ranking_ativo(cfg):
+    return str(cfg.get("ranking", "")).lower() in ("1", "true", "sim")
+
+
+def montar_consulta(cfg):
+    """ConsultaOfertas a partir das chaves FILTROS_BUSCA; ValueError se algum valor for inválido"""
+    from core.shopee import ConsultaOfertas, ORDENS, LISTAS, CAMPOS_OFERTA, CAMPOS_RANKING
+
+    ordem = cfg.get("ordem") or None
+    if ordem is not None and ordem not in ORDENS:
+        raise ValueError(f"ordem deve ser uma de {', '.join(ORDENS)}: {ordem!r}")
+    lista = cfg.get("lista") or None
+    if lista is not None and lista not in LISTAS:
+        raise ValueError(f"lista deve ser uma de {', '.join(LISTAS)}: {lista!r}")
+    return ConsultaOfertas(
+        keyword=cfg.get("palavra_chave") or None,
+        sort_type=ORDENS.get(ordem),
+        list_type=LISTAS.get(lista),
+        product_cat_id=cfg.get("categoria") or None,
+        shop_id=cfg.get("loja") or None,
+        campos=CAMPOS_OFERTA + CAMPOS_RANKING if ranking_ativo(cfg) else CAMPOS_OFERTA,
+    )
+
+
+def _numero_ou_none(valor):
+    try:
+        numero = float(valor) if valor not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+    return numero if numero is not None and math.isfinite(numero) else None
+
+
+def _diferenca(depois, antes):
+    """Contadores acumulados do processo -> só o que mudou entre as duas leituras"""
+    return {k: v - antes.get(k, 0) if isinstance(v, (int, float)) else v for k, v in depois.items()}
+
+
+def separar_grupos(texto):
+    """"Grupo A, Grupo B" -> ["Grupo A", "Grupo B"]"""
+    return [g.strip() for g in (texto or "").split(",") if g.strip()]
+
+
+class Motor:
+    """Pipeline buscar -> preparar -> enviar, sem depender da interface.
+
+    Usado pela tela (ui/app.py) e pela linha de comando (cli.py). A configuração
+    é lida a cada execução por `obter_config` (padrão: o config.json), então
+    alterações valem na próxima execução, inclusive nas agendadas.
+
+    Callbacks opcionais:
+      log(msg)                 mensagens de progresso (padrão: print)
+      ao_status(rodando)       início/fim de uma execução
+      ao_progresso(enviados)   após cada produto
+      ao_finalizar(resumo)     fim de uma execução, já com o histórico gravado
+    """
+
+    def __init__(self, obter_config=None, log=print, ao_status=None, ao_progresso=None, ao_finalizar=None):
+        self.obter_config = obter_config or carregar_config
+        self.log = log
+        self.ao_status = ao_status
+        self.ao_progresso = ao_progresso
+        self.ao_finalizar = ao_finalizar
+        self.agendador = None
+        # Chrome/WhatsApp Web fica aberto entre execuções e só fecha no encerrar().
+        # Um serviço por navegador paralelo; cada navegador extra usa seu próprio perfil/login.
+        self._servicos = []
+        # Um envio por vez: execuções agendadas e manuais não se sobrepõem
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+
+    # --- Execução ---
+
+    def obter_servicos(self, quantidade):
+        from core.whatsapp import WhatsAppService
+
+        while len(self._servicos) < quantidade:
+            indice = len(self._servicos)
+            servico = WhatsAppService(session_dir="whatsapp_session" if indice == 0 else f"whatsapp_session_{indice}")
+            atexit.register(servico.encerrar)
+            self._servicos.append(servico)
+        return self._servicos[:quantidade]
+
+    @property
+    def em_execucao(self):
+        return self._lock.locked()
+
+    def parar(self):
+        """Interrompe a execução atual depois do produto em andamento"""
+        self._parar.set()
+
+    def executar(self, grupos=None, limit=None, dry_run=False, filtros=None):
+        """Uma execução completa; grupos/limit vazios usam os da configuração.
+
+        filtros: chaves de busca (FILTROS_BUSCA) que substituem as da configuração.
+        dry_run: busca, filtra e prepara as ofertas (mensagem e imagem) sem abrir
+        o WhatsApp nem gravar histórico. Retorna o resumo da execução ou None
+        se a configuração estiver incompleta.
+        """
+        with self._lock:
+            self._parar.clear()
+            return self._executar(grupos, limit, dry_run, filtros)
+
+    def _executar(self, grupos, limit, dry_run, filtros=None):
+        from core.shopee import iterar_ofertas_shopee, estatisticas_api
+        from core.pipeline import prefetch_imagens, preparar_produto, enviar_para_grupos, filtrar_ja_enviados
+        from core.http_client import estatisticas_conexoes
+        from core.utils import estatisticas_normalizacao
+        from core.shopee_cache import configurar_cache_respostas, obter_cache_respostas
+
+        cfg = self.obter_config()
+        appid = cfg.get("appid")
+        secret = cfg.get("secret")
+        # Vários grupos separados por vírgula recebem o mesmo lote de ofertas
+        if not grupos:
+            grupos = separar_grupos(cfg.get("grupo"))
+        try:
+            limit = int(limit or cfg.get("limit") or 5)
+        except:
+            limit = 5
+        try:
+            navegadores = max(1, min(int(cfg.get("navegadores") or 1), len(grupos)))
+        except:
+            navegadores = 1
+        try:
+            janela_horas = float(cfg.get("janela_repeticao", 24))
+        except:
+            janela_horas = 24
+        try:
+            configurar_cache_respostas(validade=float(cfg["cache_shopee_segundos"]))
+        except (KeyError, TypeError, ValueError):
+            pass  # Mantém a validade atual (padrão ou definida pelo CLI)
+
+        if not appid or not secret:
+            self.log("Erro: Credenciais Shopee não preenchidas!")
+            return None
+
+        if not grupos:
+            self.log("Erro: Nenhum grupo WhatsApp configurado!")
+            return None
+
+        try:
+            consulta = montar_consulta(dict(cfg, **{k: v for k, v in (filtros or {}).items() if v not in (None, "")}))
+        except ValueError as e:
+            self.log(f"Erro nos filtros de busca: {e}")
+            return None
+
+        resumo = {"produtos": 0, "enviados": 0, "falhas": 0, "dry_run": dry_run}
+        produtos = None
+        # Os contadores valem para o processo inteiro (o agendador roda por dias): o log mostra só esta execução
+        antes = {"http": estatisticas_conexoes(), "imagens": estatisticas_normalizacao(),
+                 "cache": obter_cache_respostas().estatisticas(), "api": estatisticas_api()}
+        if self.ao_status:
+            self.ao_status(True)
+
+        try:
+            # 1. Buscar Ofertas
+            self.log("Buscando ofertas na Shopee...")
+            # As páginas seguintes só são buscadas conforme o envio avança.
+            # Busca além do limite para repor as ofertas já enviadas, que são descartadas
+            # antes de baixar qualquer imagem.
+            if ranking_ativo(cfg):
+                ofertas = iter(self._ranquear(cfg, appid, secret, consulta, grupos, janela_horas, limit))
+            else:
+                ofertas = iterar_ofertas_shopee(appid, secret, limit=limit * FATOR_BUSCA, consulta=consulta)
+                ofertas = itertools.islice(filtrar_ja_enviados(ofertas, grupos, janela_horas), limit)
+            primeiro = next(ofertas, None)
+
+            if primeiro is None:
+                self.log("Nenhum produto novo encontrado ou erro na API.")
+                return resumo
+
+            # Imagens começam a baixar em segundo plano enquanto o Chrome abre
+            produtos = prefetch_imagens(itertools.chain([primeiro], ofertas), preparar=preparar_produto)
+
+            if dry_run:
+                for i, p in enumerate(produtos):
+                    resumo["produtos"] += 1
+                    imagem = "ok" if p.get("imagem_path") else "sem imagem"
+                    self.log(f"[dry-run] {i+1}/{limit} ({imagem}) -> {', '.join(p.get('grupos_pendentes', grupos))}: {p['titulo'][:40]}")
+                self.log("Dry-run finalizado, nada foi enviado.")
+                return resumo
+
+            self.log("Primeiras ofertas recebidas. Iniciando WhatsApp...")
+
+            # 2. Iniciar WhatsApp (reaproveita o Chrome da execução anterior se ainda estiver saudável)
+            servicos = self.obter_servicos(navegadores)
+            with ThreadPoolExecutor(max_workers=len(servicos)) as executor:
+                bots = [b for b in executor.map(lambda svc: svc.obter_bot(), servicos) if b]
+            if not bots:
+                self.log("Erro ao iniciar WhatsApp (driver ou timeout no login).")
+                return resumo
+
+            for svc in servicos:
+                partida = svc.estatisticas
+                self.log(f"WhatsApp pronto (partida {partida['ultima_partida']}, {partida['ultima_duracao']:.1f}s).")
+
+            # 3. Enviar Produtos (a imagem do próximo já está sendo baixada)
+            # Cada produto é preparado uma vez e entregue a todos os grupos
+            for i, p in enumerate(produtos):
+                if self._parar.is_set():
+                    self.log("Processo interrompido pelo usuário.")
+                    break
+
+                resumo["produtos"] += 1
+                self.log(f"Enviando {i+1}/{limit} para {len(grupos)} grupo(s): {p['titulo'][:20]}...")
+
+                try:
+                    resultados = enviar_para_grupos(bots, p, grupos)
+                except Exception as e:
+                    self.log(f"Erro envio: {e}")
+                    resultados = {grupo: False for grupo in grupos}
+
+                for grupo, sucesso in resultados.items():
+                    if sucesso:
+                        resumo["enviados"] += 1
+                        registrar_envio(p.get('chave'), grupo)
+                    else:
+                        resumo["falhas"] += 1
+                        self.log(f"   Falha no grupo '{grupo}'.")
+                    # Salvar no DB, um registro por grupo
+                    salvar_historico(p['titulo'], f"WhatsApp: {grupo}", "Sucesso" if sucesso else "Erro")
+
+                if self.ao_progresso:
+                    self.ao_progresso(resumo["enviados"])
+
+            self.log("Processo finalizado!")
+            stats = _diferenca(estatisticas_conexoes(), antes["http"])
+            self.log(f"HTTP: {stats['requisicoes']} requisições, {stats['conexoes_abertas']} conexões abertas, {stats['conexoes_reaproveitadas']} reaproveitadas.")
+            stats = _diferenca(estatisticas_normalizacao(), antes["imagens"])
+            self.log(f"Imagens: {stats['imagens']} reduzidas, {stats['dib_economizado'] // 1024} KB a menos de DIB colado, em {stats['segundos']:.1f}s.")
+            stats = _diferenca(obter_cache_respostas().estatisticas(), antes["cache"])
+            self.log(f"API Shopee: {stats['acertos']} respostas do cache, {stats['faltas']} consultas (modo {stats['modo']}).")
+            stats = _diferenca(estatisticas_api(), antes["api"])
+            self.log(f"API Shopee: {stats['requisicoes']} requisições, {stats['novas_tentativas']} novas tentativas "
+                     f"({stats['segundos_backoff']:.1f}s em backoff), {stats['segundos_limitado']:.1f}s segurado pelo limite de taxa.")
+
+            # O registro de envios só precisa cobrir a janela de repetição (e o ranking por recência)
+            limpar_envios_antigos(max(RETENCAO_ENVIOS_DIAS, janela_horas / 24))
+
+            # Espera os registros em fila chegarem ao banco
+            flush_historico()
+
+        except Exception as e:
+            self.log(f"Erro no processo: {e}")
+
+        finally:
+            # Cancela os downloads antecipados em qualquer saída (sem bots, parada ou erro)
+            if produtos is not None:
+                produtos.close()
+            if self.ao_status:
+                self.ao_status(False)
+            # Único ponto de saída: também avisa nas saídas antecipadas (sem ofertas, dry-run, sem bots)
+            if self.ao_finalizar:
+                self.ao_finalizar(resumo)
+
+        return resumo
+
+    def _ranquear(self, cfg, appid, secret, consulta, grupos, janela_horas, limit):
+        """Busca `candidatos_ranking` ofertas, tira as já enviadas e devolve as `limit` melhores"""
+        from core.shopee import iterar_ofertas_shopee
+        from core.pipeline import filtrar_ja_enviados
+        from core.ranking import selecionar_melhores, ler_pesos
+        from database.db import ultimos_envios
+
+        try:
+            total = max(limit, int(cfg.get("candidatos_ranking") or limit * FATOR_BUSCA))
+        except (TypeError, ValueError):
+            total = limit * FATOR_BUSCA
+        pesos = ler_pesos(cfg.get("pesos_ranking") if isinstance(cfg.get("pesos_ranking"), dict) else None, self.log)
+        faixa = (_numero_ou_none(cfg.get("preco_min")), _numero_ou_none(cfg.get("preco_max")))
+
+        candidatos = list(filtrar_ja_enviados(iterar_ofertas_shopee(appid, secret, limit=total, consulta=consulta),
+                                              grupos, janela_horas))
+        envios = ultimos_envios([c.get("chave") for c in candidatos], grupos)
+        melhores = selecionar_melhores(candidatos, limit, pesos, faixa if faixa != (None, None) else None, envios)
+        self.log(f"Ranking: {len(melhores)} melhores de {len(candidatos)} ofertas candidatas.")
+        return melhores
+
+    # --- Agendamento ---
+
+    def _executar_agendado(self, tarefa, horario):
+        cfg = tarefa.dados or {}
+        if cfg.get("fonte", "shopee") != "shopee":
+            self.log(f"Agendamento '{tarefa.agenda}': fonte '{cfg.get('fonte')}' não suportada.")
+            return
+        atraso = (datetime.now() - horario).total_seconds()
+        if atraso > 60:
+            self.log(f"Execução agendada ({tarefa.agenda}, {horario:%d/%m %H:%M}) com {atraso / 60:.0f} min de atraso. Executando...")
+        else:
+            self.log(f"Horário agendado ({tarefa.agenda}) atingido! Executando...")
+        self.executar(separar_grupos(cfg.get("grupo")) or None, cfg.get("limit"),
+                      filtros={chave: cfg.get(chave) for chave in FILTROS_BUSCA})
+        if tarefa.proxima:
+            self.log(f"Próxima execução de '{tarefa.agenda}': {tarefa.proxima:%d/%m %H:%M}")
+
+    def _erro_agendado(self, tarefa, erro):
+        self.log(f"Erro no agendador: {erro}")
+
+    def _reagendado(self, tarefa):
+        definir_proxima_execucao(tarefa.id, tarefa.proxima)
+
+    @property
+    def agendador_ativo(self):
+        return self.agendador is not None and self.agendador.rodando
+
+    def agendar(self, job):
+        """Coloca um agendamento (linha de agendamentos) no agendador em execução"""
+        if not self.agendador_ativo:
+            return
+        tarefa = self.agendador.adicionar(job["horario"], dados=job["config"], id=job["id"], proxima=job["proxima_execucao"])
+        if tarefa.proxima != job["proxima_execucao"]:
+            self._reagendado(tarefa)
+
+    def desagendar(self, id):
+        if self.agendador is not None:
+            self.agendador.remover(id)
+
+    def iniciar_agendador(self, politica_atraso=None):
+        """Carrega os agendamentos ativos do banco e começa a disparar; retorna quantos"""
+        if self.agendador_ativo:
+            return len(self.agendador.proximas())
+
+        init_db()
+        # Ativos em ordem de vencimento (índice em ativo, proxima_execucao)
+        jobs = proximos_agendamentos()
+        if not jobs:
+            return 0
+
+        politica = politica_atraso or self.obter_config().get("politica_atraso") or UMA
+        self.agendador = Agendador(self._executar_agendado, politica_atraso=politica,
+                                   ao_reagendar=self._reagendado, ao_erro=self._erro_agendado)
+        self.agendador.iniciar()
+        for job in jobs:
+            try:
+                self.agendar(job)
+            except ValueError as erro:
+                self.log(f"Agendamento {job['id']} ignorado: {erro}")
+
+        proximas = self.agendador.proximas()
+        self.log(f"Agendador iniciado com {len(proximas)} agendamento(s).")
+        if proximas:
+            self.log(f"Próxima execução: {proximas[0][0]:%d/%m %H:%M} ({proximas[0][1].agenda})")
+        return len(proximas)
+
+    def parar_agendador(self):
+        if self.agendador is not None:
+            self.agendador.parar()
+
+    def encerrar(self):
+        """Para o agendador, grava o que estiver pendente e fecha os navegadores"""
+        self.parar_agendador()
+        self.parar()
+        flush_historico()
+        for servico in self._servicos:
+            servico.encerrar()
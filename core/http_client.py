@@ -0,0 +1,114 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# Configuração da sessão compartilhada
+POOL_HOSTS = 10          # Quantos hosts diferentes mantêm pool aberto
+POOL_POR_HOST = 16       # Conexões keep-alive por host (downloads de imagem do mesmo CDN)
+TIMEOUT_CONEXAO = 5      # Segundos para abrir a conexão
+TIMEOUT_LEITURA = 20     # Segundos aguardando dados
+TENTATIVAS = 2           # Retentativas em falha de conexão / 502 / 503 / 504
+
+HEADERS_PADRAO = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+_lock = threading.Lock()
+_sessao = None
+_contadores = {"requisicoes": 0, "conexoes_abertas": 0}
+
+
+def _contar(chave):
+    with _lock:
+        _contadores[chave] += 1
+
+
+class _ContadorHTTPConnection(HTTPConnection):
+    def connect(self):
+        _contar("conexoes_abertas")
+        return super().connect()
+
+
+class _ContadorHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _contar("conexoes_abertas")
+        return super().connect()
+
+
+class _ContadorHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _ContadorHTTPConnection
+
+
+class _ContadorHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _ContadorHTTPSConnection
+
+
+class _AdapterPadrao(HTTPAdapter):
+    """HTTPAdapter com timeout padrão e contagem de conexões novas vs. reaproveitadas"""
+
+    def __init__(self, timeout, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _ContadorHTTPPool,
+            "https": _ContadorHTTPSPool,
+        }
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        _contar("requisicoes")
+        return super().send(request, **kwargs)
+
+
+def _criar_sessao():
+    retry = Retry(
+        total=TENTATIVAS,
+        connect=TENTATIVAS,
+        read=0,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),  # POST assinado não é repetido aqui
+        raise_on_status=False,
+    )
+    adapter = _AdapterPadrao(
+        timeout=(TIMEOUT_CONEXAO, TIMEOUT_LEITURA),
+        pool_connections=POOL_HOSTS,
+        pool_maxsize=POOL_POR_HOST,
+        max_retries=retry,
+    )
+    sessao = requests.Session()
+    sessao.headers.update(HEADERS_PADRAO)
+    sessao.mount("http://", adapter)
+    sessao.mount("https://", adapter)
+    return sessao
+
+
+def obter_sessao():
+    """Retorna a sessão HTTP compartilhada (pool keep-alive) por todo o projeto"""
+    global _sessao
+    if _sessao is None:
+        with _lock:
+            if _sessao is None:
+                _sessao = _criar_sessao()
+    return _sessao
+
+
+def estatisticas_conexoes():
+    """Retorna requisições feitas, conexões abertas e conexões reaproveitadas"""
+    with _lock:
+        requisicoes = _contadores["requisicoes"]
+        abertas = _contadores["conexoes_abertas"]
+    return {
+        "requisicoes": requisicoes,
+        "conexoes_abertas": abertas,
+        "conexoes_reaproveitadas": max(requisicoes - abertas, 0),
+    }
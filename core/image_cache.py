@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from core.http_client import obter_sessao
+
+PASTA_CACHE = "cache_imagens"
+TAMANHO_MAXIMO = 200 * 1024 * 1024   # 200 MB
+VALIDADE = 24 * 3600                 # Segundos antes de revalidar com ETag/Last-Modified
+EM_USO = 10 * 60                     # Segundos em que uma imagem entregue não é removida pela LRU
+
+
+def chave_url(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+class CacheImagens:
+    """Cache de imagens em disco endereçado pelo hash da URL, limitado por tamanho (LRU).
+
+    Cada entrada é um grupo de arquivos "<chave>.*" na pasta do cache: a imagem
+    original (.img), os metadados (.json) com content type, ETag e Last-Modified
+    e derivados gravados depois com anexar() (ex.: payload do clipboard).
+    A ordem LRU sobrevive a reinícios através do mtime dos arquivos .img.
+    Entradas entregues há menos de EM_USO segundos (o caminho pode estar na fila
+    do envio) ou sendo baixadas agora não são removidas pela LRU.
+    """
+
+    def __init__(self, pasta=PASTA_CACHE, tamanho_maximo=TAMANHO_MAXIMO, validade=VALIDADE):
+        self.pasta = os.path.abspath(pasta)
+        self.tamanho_maximo = tamanho_maximo
+        self.validade = validade
+        self._lock = threading.Lock()
+        self._locks_chave = {}
+        self._entradas = OrderedDict()  # chave -> bytes ocupados (mais antiga primeiro)
+        self._arquivos = {}             # chave -> extensões gravadas (img, json e derivados)
+        self._usos = {}                 # chave -> time.monotonic() da última entrega
+        self._total = 0
+        os.makedirs(self.pasta, exist_ok=True)
+        self._carregar()
+
+    def _carregar(self):
+        tamanhos = {}
+        acessos = {}
+        for nome in os.listdir(self.pasta):
+            chave, _, extensao = nome.partition(".")
+            caminho = os.path.join(self.pasta, nome)
+            if extensao.endswith("tmp"):
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    pass
+                continue
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                continue
+            tamanhos[chave] = tamanhos.get(chave, 0) + info.st_size
+            self._arquivos.setdefault(chave, set()).add(extensao)
+            if extensao == "img":
+                acessos[chave] = info.st_mtime
+        for chave in sorted(acessos, key=acessos.get):
+            self._entradas[chave] = tamanhos[chave]
+            self._total += tamanhos[chave]
+
+    def caminho(self, chave, extensao="img"):
+        return os.path.join(self.pasta, f"{chave}.{extensao}")
+
+    def _lock_da_chave(self, chave):
+        with self._lock:
+            if chave not in self._locks_chave:
+                self._locks_chave[chave] = threading.Lock()
+            return self._locks_chave[chave]
+
+    def _ler_meta(self, chave):
+        try:
+            with open(self.caminho(chave, "json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _gravar_atomico(self, destino, dados):
+        temporario = f"{destino}.{uuid.uuid4().hex}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(dados)
+        os.replace(temporario, destino)
+
+    def _marcar_uso(self, chave):
+        with self._lock:
+            self._usos[chave] = time.monotonic()
+
+    def _tocar(self, chave):
+        with self._lock:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+        try:
+            os.utime(self.caminho(chave))
+        except OSError:
+            pass
+
+    def _em_uso(self, chave, agora):
+        return agora - self._usos.get(chave, float("-inf")) < EM_USO
+
+    def _registrar(self, chave, tamanho, extensoes=()):
+        with self._lock:
+            self._total += tamanho - self._entradas.pop(chave, 0)
+            self._entradas[chave] = tamanho
+            self._arquivos.setdefault(chave, set()).update(extensoes)
+            # Mais antigas primeiro, pulando as que estão em uso, até cobrir o excesso
+            excesso = self._total - self.tamanho_maximo
+            agora = time.monotonic()
+            candidatas = []
+            for antiga, tamanho_antigo in self._entradas.items():
+                if excesso <= 0:
+                    break
+                if antiga != chave and not self._em_uso(antiga, agora):
+                    candidatas.append(antiga)
+                    excesso -= tamanho_antigo
+        for antiga in candidatas:
+            self._remover(antiga)
+
+    def _remover(self, chave):
+        """Tira a entrada do cache e apaga seus arquivos, segurando o lock da chave"""
+        lock = self._lock_da_chave(chave)
+        if not lock.acquire(blocking=False):
+            return  # Sendo baixada/revalidada agora; sai na próxima limpeza
+        try:
+            with self._lock:
+                # Pode ter sido entregue de novo entre a escolha e o lock
+                if chave not in self._entradas or self._em_uso(chave, time.monotonic()):
+                    return
+                self._total -= self._entradas.pop(chave)
+                self._usos.pop(chave, None)
+                extensoes = self._arquivos.pop(chave, set())
+            self._apagar(chave, extensoes)
+        finally:
+            lock.release()
+
+    def _apagar(self, chave, extensoes):
+        for extensao in extensoes:
+            try:
+                os.remove(self.caminho(chave, extensao))
+            except OSError:
+                pass  # Arquivo em uso (ex.: sendo colado agora); sai na próxima limpeza
+
+    def obter(self, url, timeout=10):
+        """Retorna o caminho local da imagem da URL, baixando ou revalidando se preciso"""
+        chave = chave_url(url)
+        caminho = self.caminho(chave)
+
+        with self._lock_da_chave(chave):
+            self._marcar_uso(chave)
+            meta = self._ler_meta(chave)
+            existe = meta is not None and os.path.exists(caminho)
+
+            if existe and time.time() - meta.get("verificado_em", 0) < self.validade:
+                self._tocar(chave)
+                return caminho
+
+            headers = {}
+            if existe and meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if existe and meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+            try:
+                with obter_sessao().get(url, headers=headers, stream=True, timeout=timeout) as response:
+                    if response.status_code == 304 and existe:
+                        meta["verificado_em"] = time.time()
+                        self._gravar_atomico(self.caminho(chave, "json"), json.dumps(meta).encode("utf-8"))
+                        self._tocar(chave)
+                        return caminho
+
+                    if response.status_code != 200:
+                        return caminho if existe else None
+
+                    dados = b"".join(response.iter_content(64 * 1024))
+                    meta = {
+                        "url": url,
+                        "content_type": response.headers.get("Content-Type", ""),
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "verificado_em": time.time(),
+                    }
+            except Exception as e:
+                print(f"Erro ao baixar imagem: {e}")
+                return caminho if existe else None
+
+            # A imagem nova vai para o disco antes de mexer na antiga: uma queda no meio
+            # deixa a versão antiga (com .json correspondente) ou a nova, nunca nenhuma
+            temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+            with open(temporario, "wb") as f:
+                f.write(dados)
+            if existe:
+                # Derivados da versão antiga deixam de valer
+                with self._lock:
+                    antigos = self._arquivos.get(chave, set()) - {"img", "json"}
+                    self._arquivos[chave] = {"img", "json"}
+                self._apagar(chave, antigos)
+            os.replace(temporario, caminho)
+            meta_json = json.dumps(meta).encode("utf-8")
+            self._gravar_atomico(self.caminho(chave, "json"), meta_json)
+            self._registrar(chave, len(dados) + len(meta_json), ("img", "json"))
+            return caminho
+
+    def _chave_do_caminho(self, caminho_imagem):
+        if os.path.dirname(os.path.abspath(caminho_imagem)) != self.pasta:
+            return None
+        return os.path.basename(caminho_imagem).partition(".")[0]
+
+    def contem(self, caminho_imagem):
+        """True se o caminho é de uma imagem guardada neste cache"""
+        return self._chave_do_caminho(caminho_imagem) is not None
+
+    def derivado(self, caminho_imagem, extensao):
+        """Caminho do derivado da imagem, se ele já existir no cache"""
+        chave = self._chave_do_caminho(caminho_imagem)
+        if chave is None:
+            return None
+        caminho = self.caminho(chave, extensao)
+        return caminho if os.path.exists(caminho) else None
+
+    def anexar(self, caminho_imagem, extensao, dados):
+        """Grava um derivado ao lado da imagem; retorna o caminho ou None se a imagem não é do cache"""
+        chave = self._chave_do_caminho(caminho_imagem)
+        if chave is None:
+            return None
+        destino = self.caminho(chave, extensao)
+        self._gravar_atomico(destino, dados)
+        with self._lock:
+            atual = self._entradas.get(chave)
+            self._arquivos.setdefault(chave, set()).add(extensao)
+        self._marcar_uso(chave)
+        if atual is not None:
+            self._registrar(chave, atual + len(dados))
+        return destino
+
+    def estatisticas(self):
+        with self._lock:
+            return {"entradas": len(self._entradas), "bytes": self._total, "limite": self.tamanho_maximo}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def obter_cache():
+    """Retorna o cache de imagens compartilhado"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CacheImagens()
+    return _cache
@@ -1,86 +1,237 @@
-import requests
 import re
+import time
+import codecs
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from core.http_client import obter_sessao
 
-def buscar_ofertas_ml(links, limit=5):
-    """Busca ofertas Mercado Livre"""
-    produtos = []
-    
+# Padrões curtos, cada um aplicado só onde sua âncora aparece. Com âncora de um caractere raro
+# ("$") a posição vem de str.find (memchr); sem ela, o re localiza o prefixo literal do padrão.
+# Cada grupo nomeado é um candidato a título, preço ou imagem. Dados estruturados (JSON-LD /
+# JSON embutido) têm prioridade 0 e encerram a leitura quando completos; os demais servem a
+# páginas sem JSON.
+_PADROES = (
+    # (padrão, âncora)
+    (re.compile(r'<(?i:title)[^>]*>(?P<titulo>.*?)</(?i:title)>'), None),
+    (re.compile(r'"(?:p(?:rice":\s*"?(?P<preco_json>\d+(?:\.\d+)?)'
+                r'|icture":\s*"(?P<imagem_json>(?:https?:)?//[^"]+)")'
+                r'|image":\s*"(?P<imagem_json_alt>(?:https?:)?//[^"]+)")'), None),
+    (re.compile(r'(?<=R)\$\s*(?P<preco_texto>[\d\.]+,\d+)'), "$"),
+    (re.compile(r'src="(?:(?<=data-src=")(?P<imagem_data>[^"]+)'
+                r'|(?P<imagem_src>[^"]+\.(?:jpg|jpeg|png|gif)))"'), None),
+)
+
+_CAMPOS = {
+    "titulo": ("titulo", 0),
+    "preco_json": ("preco", 0),
+    "preco_texto": ("preco", 1),
+    "imagem_json": ("imagem", 0),
+    "imagem_json_alt": ("imagem", 0),
+    "imagem_data": ("imagem", 1),
+    "imagem_src": ("imagem", 2),
+}
+
+TAMANHO_CHUNK = 16 * 1024
+_MARGEM = 512      # Casamentos que começam a menos disso do fim do texto esperam o próximo chunk
+
+
+def chave_produto_ml(link):
+    """Identificador estável do anúncio (MLB123...) a partir do link; o próprio link se não houver"""
+    match = re.search(r'\b(ML[A-Z])-?(\d+)', link or "")
+    return f"ml:{match.group(1)}{match.group(2)}" if match else link
+
+
+class _ExtratorPagina:
+    """Extrai título, preço e imagem de uma página recebida em pedaços, numa única passada"""
+
+    def __init__(self):
+        self.resto = ""   # Sobra do chunk anterior: no máximo _MARGEM caracteres
+        self.base = 0     # Posição absoluta de resto[0] na página
+        self.proximo = [0] * len(_PADROES)  # Onde cada padrão volta a ser buscado; None = resolvido
+        self.achados = {}  # campo -> (prioridade, posição, valor)
+
+    def completo(self):
+        return (
+            "titulo" in self.achados
+            and self.achados.get("preco", (1,))[0] == 0
+            and self.achados.get("imagem", (1,))[0] == 0
+        )
+
+    @staticmethod
+    def _buscar(texto, padrao, ancora, pos):
+        """Próximo casamento a partir de pos; com âncora, o padrão só é tentado onde ela aparece"""
+        if ancora is None:
+            return padrao.search(texto, pos)
+        pos = texto.find(ancora, pos)
+        while pos != -1:
+            match = padrao.match(texto, pos)
+            if match:
+                return match
+            pos = texto.find(ancora, pos + 1)
+        return None
+
+    def _resolvido(self, padrao):
+        """Nenhum grupo do padrão pode mais melhorar o que já foi achado"""
+        for grupo in padrao.groupindex:
+            campo, prioridade = _CAMPOS[grupo]
+            if self.achados.get(campo, (prioridade + 1,))[0] > prioridade:
+                return False
+        return True
+
+    def alimentar(self, texto, final=False):
+        """Consome mais texto; retorna True quando não é mais preciso ler o resto da página"""
+        if self.resto:
+            texto = self.resto + texto
+        fim = len(texto)
+        # Casamentos que começam a menos de _MARGEM do fim podem continuar no próximo chunk
+        limite = fim if final else fim - _MARGEM
+        corte = fim
+
+        for indice, (padrao, ancora) in enumerate(_PADROES):
+            if self.proximo[indice] is None:
+                continue
+            pos = max(self.proximo[indice] - self.base, 0)
+            while not self._resolvido(padrao):
+                match = self._buscar(texto, padrao, ancora, pos)
+                if match is None or match.start() > limite:
+                    break
+                campo, prioridade = _CAMPOS[match.lastgroup]
+                atual = self.achados.get(campo)
+                if atual is None or atual[:2] > (prioridade, self.base + match.start()):
+                    self.achados[campo] = (prioridade, self.base + match.start(), match.group(match.lastgroup))
+                pos = match.end()
+            else:
+                self.proximo[indice] = None
+                continue
+            retomar = max(pos, limite)
+            self.proximo[indice] = self.base + retomar
+            corte = min(corte, retomar)
+
+        if self.completo():
+            return True
+        self.resto = texto[corte:]
+        self.base += corte
+        return False
+
+    def produto(self, link):
+        titulo = "Produto Mercado Livre"
+        if "titulo" in self.achados:
+            titulo = self.achados["titulo"][2]
+            titulo = titulo.split('|')[0].split('-')[0].strip()
+            titulo = re.sub(r'\s+', ' ', titulo)
+            titulo = re.sub(r'[^\w\s\-\.,!?]', '', titulo)  # Não cortamos
+
+        preco = 99.99
+        if "preco" in self.achados:
+            prioridade, _, valor = self.achados["preco"]
+            try:
+                if prioridade == 0:
+                    preco = float(valor)
+                else:
+                    preco = float(valor.replace('.', '').replace(',', '.'))
+            except ValueError:
+                pass
+
+        imagem_url = ""
+        if "imagem" in self.achados:
+            imagem_url = self.achados["imagem"][2]
+            if not imagem_url.startswith('http'):
+                imagem_url = "https:" + imagem_url
+
+        return {
+            "titulo": titulo,
+            "preco": f"{preco:.2f}",
+            "avaliacao": "4.5",
+            "link": link,
+            "afiliado": link,
+            "fonte": "Mercado Livre",
+            "imagem_url": imagem_url,
+            "chave": chave_produto_ml(link)
+        }
+
+
+def extrair_produto_html(chunks, link="", encoding="utf-8"):
+    """Extrai o produto de uma sequência de chunks (bytes), parando assim que tiver tudo.
+
+    Retorna (produto, bytes_lidos).
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    extrator = _ExtratorPagina()
+    bytes_lidos = 0
+
+    for chunk in chunks:
+        bytes_lidos += len(chunk)
+        if extrator.alimentar(decoder.decode(chunk)):
+            break
+    else:
+        extrator.alimentar(decoder.decode(b"", final=True), final=True)
+
+    return extrator.produto(link), bytes_lidos
+
+
+def _processar_link(link):
+    """Baixa e interpreta uma página de produto; levanta exceção em caso de falha.
+
+    Retorna (produto, bytes_lidos). O corpo é lido em streaming e a conexão é
+    encerrada assim que título, preço e imagem estruturados forem encontrados.
+    """
+    headers = {"User-Agent": "Mozilla/5.0"}
+    with obter_sessao().get(link, headers=headers, timeout=20, stream=True) as response:
+        if response.status_code != 200:
+            raise Exception(f"HTTP {response.status_code}")
+
+        content_type = response.headers.get("Content-Type", "").lower()
+        encoding = response.encoding if "charset" in content_type and response.encoding else "utf-8"
+        return extrair_produto_html(response.iter_content(TAMANHO_CHUNK), link, encoding)
+
+def buscar_ofertas_ml(links, limit=5, workers=1, max_por_host=2, relatorio=None):
+    """Busca ofertas Mercado Livre
+
+    Com workers > 1 os links são baixados em paralelo, respeitando no máximo
+    max_por_host requisições simultâneas no mesmo host. A ordem de entrada é
+    preservada no resultado. Se uma lista for passada em relatorio, ela recebe
+    um item por link com latência, bytes lidos e erro.
+    """
     # Se links for uma string única (não lista), converte
     if isinstance(links, str):
         links = [links]
-    
-    for i, link in enumerate(links[:limit]):
-        if not link or not link.strip():
-            continue
-        
-        try:
-            print(f"📡 Processando: {link[:50]}...")
-            
-            headers = {"User-Agent": "Mozilla/5.0"}
-            response = requests.get(link, headers=headers, timeout=20)
-            
-            if response.status_code == 200:
-                html = response.text
-                
-                # Extrai título
-                titulo = "Produto Mercado Livre"
-                titulo_match = re.search(r'<title[^>]*>(.*?)</title>', html, re.IGNORECASE)
-                if titulo_match:
-                    titulo = titulo_match.group(1)
-                    titulo = titulo.split('|')[0].split('-')[0].strip()
-                    titulo = re.sub(r'\s+', ' ', titulo)
-                    titulo = re.sub(r'[^\w\s\-\.,!?]', '', titulo)  # Não cortamos
-                
-                # Extrai preço
-                preco = 99.99
-                padroes_preco = [
-                    r'"price":\s*"(\d+\.?\d*)"',
-                    r'"price":\s*(\d+\.?\d*)',
-                    r'R\$\s*[\d\.]+,\d+',
-                ]
-                
-                for padrao in padroes_preco:
-                    match = re.search(padrao, html)
-                    if match:
-                        try:
-                            preco_text = match.group(1) if match.groups() else match.group(0)
-                            preco_text = re.sub(r'[^\d,]', '', preco_text)
-                            preco = float(preco_text.replace(',', '.'))
-                            break
-                        except:
-                            continue
-                
-                # Tenta extrair imagem
-                imagem_url = ""
-                padroes_imagem = [
-                    r'"picture":"([^"]+)"',
-                    r'data-src="([^"]+)"',
-                    r'src="([^"]+\.(jpg|jpeg|png|gif))"',
-                ]
-                
-                for padrao in padroes_imagem:
-                    match = re.search(padrao, html)
-                    if match:
-                        imagem_url = match.group(1)
-                        if not imagem_url.startswith('http'):
-                            imagem_url = "https:" + imagem_url
-                        break
-                
-                produtos.append({
-                    "titulo": titulo,
-                    "preco": f"{preco:.2f}",
-                    "avaliacao": "4.5",
-                    "link": link,
-                    "afiliado": link,
-                    "fonte": "Mercado Livre",
-                    "imagem_url": imagem_url
-                })
-                
-                print(f"   ✅ {titulo[:40]}... - R$ {preco:.2f}")
-            else:
-                print(f"   ❌ HTTP {response.status_code}")
-                
-        except Exception as e:
-            print(f"   ❌ Erro: {e}")
-    
-    return produtos
+
+    links = [link for link in links[:limit] if link and link.strip()]
+
+    semaforos = {}
+    lock_semaforos = threading.Lock()
+
+    def semaforo_do_host(link):
+        host = urlparse(link).netloc.lower()
+        with lock_semaforos:
+            if host not in semaforos:
+                semaforos[host] = threading.Semaphore(max(1, max_por_host))
+            return semaforos[host]
+
+    def processar(link):
+        item = {"link": link, "ok": False, "latencia": 0.0, "bytes_lidos": 0, "erro": None}
+        with semaforo_do_host(link):
+            inicio = time.perf_counter()
+            try:
+                print(f"📡 Processando: {link[:50]}...")
+                produto, item["bytes_lidos"] = _processar_link(link)
+                item["ok"] = True
+                print(f"   ✅ {produto['titulo'][:40]}... - R$ {produto['preco']}")
+            except Exception as e:
+                produto = None
+                item["erro"] = str(e)
+                print(f"   ❌ Erro: {e}")
+            item["latencia"] = time.perf_counter() - inicio
+        return produto, item
+
+    if workers > 1 and len(links) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(links))) as executor:
+            resultados = list(executor.map(processar, links))
+    else:
+        resultados = [processar(link) for link in links]
+
+    if relatorio is not None:
+        relatorio.extend(item for _, item in resultados)
+
+    return [produto for produto, _ in resultados if produto]
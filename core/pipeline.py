@@ -0,0 +1,196 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from core.utils import obter_imagem, obter_dib, normalizar_imagem
+from database.db import chaves_ja_enviadas
+
+_FIM = object()
+
+
+def formatar_mensagem(produto):
+    """Monta a legenda enviada junto com a imagem"""
+    return f"*{produto['titulo']}*\n\n🔥 Por: R$ {produto['preco']}\n\n🛒 Compre aqui: {produto['link']}"
+
+
+def preparar_produto(produto):
+    """Deixa legenda e payload do clipboard prontos antes de o produto chegar ao envio"""
+    produto["mensagem"] = formatar_mensagem(produto)
+    produto["imagem_dib"] = None
+    if produto.get("imagem_path"):
+        try:
+            # Imagem menor = colagem e upload mais rápidos no WhatsApp Web
+            produto["imagem_path"] = normalizar_imagem(produto["imagem_path"])
+            produto["imagem_dib"] = obter_dib(produto["imagem_path"])
+        except Exception as e:
+            print(f"Erro ao converter imagem: {e}")
+
+
+def _baixar_produto(produto, preparar):
+    """Baixa a imagem do produto e aplica o pré-processamento (roda em thread de fundo)"""
+    produto["imagem_path"] = obter_imagem(produto.get("imagem_url"))
+    if preparar:
+        preparar(produto)
+    return produto
+
+
+class PrefetchImagens:
+    """Entrega os produtos na ordem original com a imagem já no cache local em "imagem_path".
+
+    Uma thread produtora consome `produtos` (pode ser o gerador paginado da Shopee)
+    e agenda os downloads assim que o objeto é criado; no máximo `antecipar`
+    produtos ficam prontos à frente do consumidor. `preparar(produto)` roda na
+    mesma thread do download. `close()` cancela os downloads pendentes; o que já
+    foi baixado fica no cache para a próxima execução.
+    """
+
+    def __init__(self, produtos, antecipar=3, workers=2, preparar=None):
+        self.produtos = produtos
+        self.preparar = preparar
+        self.fila = queue.Queue(maxsize=max(1, antecipar))
+        self.parar = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self.terminado = False
+        threading.Thread(target=self._produtor, daemon=True).start()
+
+    def _colocar(self, item):
+        while not self.parar.is_set():
+            try:
+                self.fila.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produtor(self):
+        try:
+            for produto in self.produtos:
+                if self.parar.is_set():
+                    return
+                futuro = self.executor.submit(_baixar_produto, produto, self.preparar)
+                # close() pode ter esvaziado a fila logo antes deste put: ninguém mais vai
+                # ler o item, então o próprio produtor cancela o download
+                if not self._colocar(futuro) or self.parar.is_set():
+                    futuro.cancel()
+                    return
+        except Exception as e:
+            self._colocar(e)
+        finally:
+            self._colocar(_FIM)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.terminado:
+            raise StopIteration
+        item = self.fila.get()
+        if item is _FIM:
+            self.close()
+            raise StopIteration
+        if isinstance(item, Exception):
+            self.close()
+            raise item
+        return item.result()
+
+    def close(self):
+        if self.terminado:
+            return
+        self.terminado = True
+        self.parar.set()
+        while True:
+            try:
+                item = self.fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _FIM and not isinstance(item, Exception):
+                item.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def prefetch_imagens(produtos, antecipar=3, workers=2, preparar=None):
+    """Inicia o download antecipado das imagens; veja PrefetchImagens"""
+    return PrefetchImagens(produtos, antecipar=antecipar, workers=workers, preparar=preparar)
+
+
+def filtrar_ja_enviados(produtos, grupos, janela_horas, lote=20):
+    """Remove ofertas já enviadas a todos os grupos dentro da janela, antes de baixar imagens.
+
+    Consulta o registro em lote (uma consulta por grupo a cada `lote` produtos) e
+    anota em "grupos_pendentes" os grupos que ainda não receberam cada produto.
+    Pares (chave, grupo) já liberados nesta execução também são descartados: a
+    gravação do envio é assíncrona e a API pode repetir a oferta em outra página.
+    """
+    liberados = set()
+
+    def processar(bloco):
+        ja_enviadas = {grupo: chaves_ja_enviadas([p.get("chave") for p in bloco], grupo, janela_horas) for grupo in grupos}
+        for produto in bloco:
+            chave = produto.get("chave")
+            pendentes = [g for g in grupos if chave not in ja_enviadas[g] and (chave, g) not in liberados]
+            if chave:
+                liberados.update((chave, g) for g in pendentes)
+            if pendentes:
+                produto["grupos_pendentes"] = pendentes
+                yield produto
+            else:
+                print(f"⏭️  Já enviado recentemente: {produto['titulo'][:40]}")
+
+    bloco = []
+    for produto in produtos:
+        bloco.append(produto)
+        if len(bloco) >= lote:
+            yield from processar(bloco)
+            bloco = []
+    if bloco:
+        yield from processar(bloco)
+
+
+def enviar_produto(bot, produto):
+    """Envia o produto preparado no chat aberto: imagem com legenda ou, sem imagem, só o texto"""
+    img_path = produto.get("imagem_path")
+    if img_path and os.path.exists(img_path):
+        return bot.enviar_imagem(img_path, produto["mensagem"], dib=produto.get("imagem_dib"))
+    return bot.enviar_mensagem_texto(produto["mensagem"])
+
+
+def _enviar_lote(bot, produto, grupos):
+    resultados = {}
+    for grupo in grupos:
+        try:
+            if not bot.buscar_grupo(grupo):
+                print(f"Grupo '{grupo}' não encontrado.")
+                resultados[grupo] = False
+                continue
+            resultados[grupo] = enviar_produto(bot, produto)
+        except Exception as e:
+            print(f"Erro ao enviar para '{grupo}': {e}")
+            resultados[grupo] = False
+        if not resultados[grupo]:
+            bot.esquecer_grupo(grupo)
+    return resultados
+
+
+def enviar_para_grupos(bots, produto, grupos):
+    """Entrega um produto já preparado a vários grupos, reaproveitando imagem e legenda.
+
+    Os grupos são divididos entre os bots sempre da mesma forma (grupo i vai para
+    o bot i % len(bots)); com mais de um bot cada um trabalha em sua própria thread.
+    Se o produto tiver "grupos_pendentes" (ver filtrar_ja_enviados), só esses recebem.
+    Retorna {grupo: sucesso} na ordem dos grupos enviados.
+    """
+    pendentes = produto.get("grupos_pendentes", grupos)
+    # A divisão usa a lista completa para cada grupo ficar sempre no mesmo navegador
+    lotes = [[g for g in grupos[i::len(bots)] if g in pendentes] for i in range(len(bots))]
+    enviar = [g for g in grupos if g in pendentes]
+    if not enviar:
+        return {}
+
+    if len(bots) == 1:
+        return _enviar_lote(bots[0], produto, lotes[0])
+
+    resultados = {}
+    with ThreadPoolExecutor(max_workers=len(bots)) as executor:
+        for parcial in executor.map(lambda par: _enviar_lote(par[0], produto, par[1]), zip(bots, lotes)):
+            resultados.update(parcial)
+    return {grupo: resultados.get(grupo, False) for grupo in enviar}
@@ -0,0 +1,128 @@
+import math
+import time
+from itertools import chain
+import numpy as np
+
+# Peso de cada critério na pontuação (os valores são normalizados para 0..1 antes)
+PESOS_PADRAO = {
+    "desconto": 1.0,    # % de desconto
+    "avaliacao": 0.5,   # Estrelas
+    "comissao": 1.0,    # Taxa de comissão
+    "vendas": 1.0,      # Volume de vendas (em escala log)
+    "preco": 0.0,       # Positivo favorece mais baratos
+    "recencia": 1.0,    # Favorece o que não foi enviado há mais tempo
+}
+MEIA_VIDA_RECENCIA = 24.0   # Horas: enviado há 24h conta metade do bônus de "nunca enviado"
+
+
+def ler_pesos(pesos, log=print):
+    """PESOS_PADRAO com os pesos de `pesos` (ex.: pesos_ranking do config.json) que forem válidos.
+
+    Cada peso passa por float(); critérios desconhecidos e valores que não são
+    números finitos são ignorados com um aviso em `log`.
+    """
+    validos = dict(PESOS_PADRAO)
+    for criterio, valor in (pesos or {}).items():
+        if criterio not in PESOS_PADRAO:
+            log(f"Peso de ranking ignorado: critério desconhecido '{criterio}'")
+            continue
+        try:
+            valor = float(valor)
+        except (TypeError, ValueError):
+            valor = math.nan
+        if not math.isfinite(valor):
+            log(f"Peso de ranking ignorado: '{criterio}' = {pesos[criterio]!r} não é um número")
+            continue
+        validos[criterio] = valor
+    return validos
+
+
+def _normalizar(valores):
+    """Escala para 0..1 (coluna constante vira 0)"""
+    minimo = valores.min()
+    amplitude = valores.max() - minimo
+    if amplitude <= 0:
+        return np.zeros_like(valores)
+    return (valores - minimo) / amplitude
+
+
+def pontuar(ofertas, pesos=None, faixa_preco=None, ultimos_envios=None, agora=None):
+    """Pontuação de cada oferta (array float64, na ordem de `ofertas`).
+
+    Usa os campos numéricos de processar_oferta_individual (desconto, comissao,
+    vendas, avaliacao_valor, preco_valor). faixa_preco=(min, max) deixa as
+    ofertas fora da faixa com -inf; ultimos_envios={chave: timestamp} vem do
+    registro de envios (database.db.ultimos_envios).
+    """
+    pesos = ler_pesos(pesos)
+    n = len(ofertas)
+    if n == 0:
+        return np.empty(0)
+
+    # Uma passada só pelas ofertas: fromiter direto para float64 evita a lista de tuplas
+    envios = ultimos_envios or {}
+    tabela = np.fromiter(
+        chain.from_iterable(
+            (o.get("desconto", 0.0), o.get("comissao", 0.0), o.get("vendas", 0.0),
+             o.get("avaliacao_valor", 0.0), o.get("preco_valor", 0.0), envios.get(o.get("chave"), np.nan))
+            for o in ofertas),
+        dtype=np.float64, count=6 * n).reshape(n, 6)
+    # Um nan/inf numa coluna estragaria a normalização da coluna inteira
+    tabela[:, :5] = np.nan_to_num(tabela[:, :5], nan=0.0, posinf=0.0, neginf=0.0)
+    desconto, comissao, vendas, avaliacao, preco, ultimo = tabela.T
+
+    score = (pesos["desconto"] * _normalizar(desconto)
+             + pesos["comissao"] * _normalizar(comissao)
+             + pesos["vendas"] * _normalizar(np.log1p(np.maximum(vendas, 0)))
+             + pesos["avaliacao"] * _normalizar(avaliacao)
+             + pesos["preco"] * (1.0 - _normalizar(preco)))
+
+    if pesos["recencia"] and ultimos_envios:
+        agora = agora or time.time()
+        horas = (agora - ultimo) / 3600.0
+        # Nunca enviado (nan) = 1; enviado agora = 0
+        score += pesos["recencia"] * np.where(np.isnan(horas), 1.0, 1.0 - np.exp2(-np.maximum(horas, 0) / MEIA_VIDA_RECENCIA))
+    elif pesos["recencia"]:
+        score += pesos["recencia"]
+
+    if faixa_preco:
+        minimo, maximo = faixa_preco
+        fora = np.zeros(n, dtype=bool)
+        if minimo is not None:
+            fora |= preco < minimo
+        if maximo is not None:
+            fora |= preco > maximo
+        score[fora] = -np.inf
+    return score
+
+
+def indices_top(score, k):
+    """Índices das k maiores pontuações, em ordem decrescente (seleção parcial, O(n + k log k))"""
+    validos = np.flatnonzero(np.isfinite(score))
+    k = min(k, len(validos))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    candidatos = score[validos]
+    if k < len(validos):
+        # argpartition não garante quais empatados no corte entram; pelo limiar, entram os primeiros da API
+        limiar = np.partition(candidatos, len(candidatos) - k)[len(candidatos) - k]
+        acima = np.flatnonzero(candidatos > limiar)
+        empatados = np.flatnonzero(candidatos == limiar)[:k - len(acima)]
+        parte = np.concatenate((acima, empatados))
+    else:
+        parte = np.arange(len(validos))
+    # Ordena só os k escolhidos; empate mantém a ordem original da API
+    ordem = np.lexsort((validos[parte], -candidatos[parte]))
+    return validos[parte][ordem]
+
+
+def selecionar_melhores(ofertas, k, pesos=None, faixa_preco=None, ultimos_envios=None):
+    """As k melhores ofertas pela pontuação, da melhor para a pior (cada uma recebe "pontuacao")"""
+    ofertas = list(ofertas)
+    score = pontuar(ofertas, pesos, faixa_preco, ultimos_envios)
+    melhores = []
+    for i in indices_top(score, k):
+        oferta = ofertas[i]
+        oferta["pontuacao"] = float(score[i])
+        melhores.append(oferta)
+    return melhores
@@ -0,0 +1,50 @@
+import time
+import random
+import threading
+from database.db import init_db, consumir_token
+
+ESPERA_MAXIMA = 60.0    # Segundos máximos de uma espera de backoff
+
+
+def backoff(tentativa, base=1.0, maximo=ESPERA_MAXIMA):
+    """Espera exponencial com jitter completo: aleatória entre 0 e base * 2^tentativa"""
+    return random.uniform(0, min(maximo, base * (2 ** tentativa)))
+
+
+class LimitadorTaxa:
+    """Token bucket compartilhado entre threads e processos (estado no banco).
+
+    `aguardar()` bloqueia até haver um token no balde `nome`, que enche
+    `por_segundo` tokens por segundo até `capacidade` (rajada máxima).
+    Guarda quanto tempo as chamadas ficaram esperando.
+    """
+
+    def __init__(self, nome, por_segundo, capacidade):
+        self.nome = nome
+        self.por_segundo = por_segundo
+        self.capacidade = capacidade
+        self._lock = threading.Lock()
+        self._pronto = False
+        self._stats = {"chamadas": 0, "limitadas": 0, "segundos_limitado": 0.0}
+
+    def aguardar(self):
+        if not self._pronto:
+            init_db()  # O CLI/a tela podem chamar antes de o banco ser criado
+            self._pronto = True
+        inicio = time.monotonic()
+        limitada = False
+        while True:
+            espera = consumir_token(self.nome, self.capacidade, self.por_segundo)
+            if espera <= 0:
+                break
+            limitada = True
+            time.sleep(espera)
+        with self._lock:
+            self._stats["chamadas"] += 1
+            if limitada:
+                self._stats["limitadas"] += 1
+                self._stats["segundos_limitado"] += time.monotonic() - inicio
+
+    def estatisticas(self):
+        with self._lock:
+            return dict(self._stats)
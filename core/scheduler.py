@@ -0,0 +1,301 @@
+import heapq
+import queue
+import threading
+import itertools
+from collections import deque
+from datetime import datetime, timedelta
+
+# O que fazer com execuções perdidas (app suspenso, computador dormindo, relógio ajustado)
+PULAR = "pular"     # Descarta as perdidas e segue para a próxima no futuro
+UMA = "uma"         # Executa uma vez para compensar todas as perdidas
+TODAS = "todas"     # Executa uma vez para cada horário perdido (até MAX_PERDIDAS, os mais recentes)
+POLITICAS = (PULAR, UMA, TODAS)
+
+TOLERANCIA_ATRASO = 60      # Segundos de atraso ainda considerados "no horário"
+ESPERA_MAXIMA = 60          # Acorda ao menos a cada minuto para perceber saltos no relógio
+LIMITE_BUSCA_DIAS = 366 * 5
+MAX_PERDIDAS = 24           # Em TODAS, quantos horários perdidos de uma tarefa são repostos no máximo
+
+DIAS_SEMANA = {"dom": 0, "seg": 1, "ter": 2, "qua": 3, "qui": 4, "sex": 5, "sab": 6, "sáb": 6}
+
+
+def _campo_cron(texto, minimo, maximo, nomes=None, ciclo=None):
+    """Converte um campo cron ("*", "*/15", "1-5", "1,3,5", "seg-sex") em um conjunto de valores
+
+    ciclo: com ele, faixas com início maior que o fim dão a volta módulo `ciclo`
+    (dia da semana: "sab-dom", "5-1"); sem ele são recusadas.
+    """
+    valores = set()
+    for parte in texto.lower().split(","):
+        passo = 1
+        if "/" in parte:
+            parte, passo_txt = parte.split("/", 1)
+            passo = int(passo_txt)
+            if passo <= 0:
+                raise ValueError(f"Passo inválido: {texto}")
+        if parte == "*":
+            inicio, fim = minimo, maximo
+        else:
+            limites = [nomes[p] if nomes and p in nomes else int(p) for p in parte.split("-", 1)]
+            inicio = limites[0]
+            fim = limites[-1] if len(limites) > 1 else (maximo if passo > 1 else inicio)
+        if not (minimo <= inicio <= maximo and minimo <= fim <= maximo):
+            raise ValueError(f"Valor fora do intervalo {minimo}-{maximo}: {texto}")
+        if inicio <= fim:
+            valores.update(range(inicio, fim + 1, passo))
+        elif ciclo:
+            valores.update([(inicio + i) % ciclo for i in range((fim - inicio) % ciclo + 1)][::passo])
+        else:
+            raise ValueError(f"Faixa invertida: {texto}")
+    return valores
+
+
+class Agenda:
+    """Regra de repetição de uma tarefa.
+
+    Aceita:
+      "09:30"                  todo dia às 09:30
+      "09:30 seg,qua,sex"      só nesses dias da semana (também "seg-sex")
+      "*/30 8-18 * * 1-5"      expressão cron de 5 campos (min hora dia mês dia-da-semana,
+                               com 0 = domingo; aceita nomes dom..sab)
+    """
+
+    def __init__(self, expressao):
+        self.expressao = expressao.strip()
+        partes = self.expressao.split()
+        if len(partes) == 5:
+            minutos, horas, dias, meses, semana = partes
+        elif len(partes) in (1, 2) and ":" in partes[0]:
+            hora, minuto = partes[0].split(":", 1)
+            minutos, horas, dias, meses = str(int(minuto)), str(int(hora)), "*", "*"
+            semana = partes[1] if len(partes) == 2 else "*"
+        else:
+            raise ValueError(f"Expressão de agendamento inválida: {expressao}")
+
+        self.minutos = sorted(_campo_cron(minutos, 0, 59))
+        self.horas = sorted(_campo_cron(horas, 0, 23))
+        self.dias = _campo_cron(dias, 1, 31)
+        self.meses = _campo_cron(meses, 1, 12)
+        self.semana = {d % 7 for d in _campo_cron(semana, 0, 7, DIAS_SEMANA, ciclo=7)}  # 0 e 7 = domingo
+        # Como no cron: com dia do mês e dia da semana restritos, vale qualquer um dos dois
+        self._dia_restrito = dias != "*"
+        self._semana_restrita = semana != "*"
+        # Ex.: "0 0 31 2 *" (31 de fevereiro) seria salvo e nunca executaria
+        if self.proxima(datetime.now()) is None:
+            raise ValueError(f"Expressão nunca dispara: {expressao}")
+
+    def _dia_valido(self, data):
+        if data.month not in self.meses:
+            return False
+        no_mes = data.day in self.dias
+        na_semana = (data.weekday() + 1) % 7 in self.semana
+        if self._dia_restrito and self._semana_restrita:
+            return no_mes or na_semana
+        return no_mes and na_semana
+
+    def proxima(self, depois):
+        """Primeiro horário estritamente depois de `depois` (datetime local)"""
+        inicio = depois.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        dia = inicio.date()
+        for _ in range(LIMITE_BUSCA_DIAS):
+            if self._dia_valido(dia):
+                mesmo_dia = dia == inicio.date()
+                for hora in self.horas:
+                    if mesmo_dia and hora < inicio.hour:
+                        continue
+                    for minuto in self.minutos:
+                        if mesmo_dia and hora == inicio.hour and minuto < inicio.minute:
+                            continue
+                        return datetime(dia.year, dia.month, dia.day, hora, minuto)
+            dia += timedelta(days=1)
+        return None
+
+    def __str__(self):
+        return self.expressao
+
+
+def validar_expressao(expressao):
+    """Retorna None se a expressão é válida, ou a mensagem de erro"""
+    try:
+        Agenda(expressao)
+        return None
+    except (ValueError, KeyError) as e:
+        return str(e) or "Expressão inválida"
+
+
+class Tarefa:
+    def __init__(self, id, agenda, dados=None, proxima=None):
+        self.id = id
+        self.agenda = agenda
+        self.dados = dados
+        self.proxima = proxima
+
+
+class Agendador:
+    """Agendador por prazo: dorme até o próximo horário em vez de checar o relógio em loop.
+
+    As próximas execuções ficam num heap; a thread do agendador espera numa
+    Condition até o primeiro prazo (parar() ou uma tarefa nova a acordam na hora).
+    Execuções vencidas vão para uma fila atendida por uma única thread de
+    trabalho, então uma execução longa não engole o horário seguinte: ele roda
+    logo depois. `executar(tarefa, horario)` é chamado na thread de trabalho.
+    """
+
+    def __init__(self, executar, politica_atraso=UMA, ao_reagendar=None, ao_erro=None):
+        if politica_atraso not in POLITICAS:
+            raise ValueError(f"Política de atraso inválida: {politica_atraso}")
+        self.executar = executar
+        self.politica_atraso = politica_atraso
+        self.ao_reagendar = ao_reagendar    # (tarefa) -> None, chamado quando tarefa.proxima muda
+        self.ao_erro = ao_erro              # (tarefa, exceção) -> None
+        self._heap = []
+        self._tarefas = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._fila = queue.Queue()
+        self._rodando = False
+        self._threads = []
+
+    # --- Tarefas ---
+
+    def _agendar(self, tarefa):
+        if tarefa.proxima is not None:
+            heapq.heappush(self._heap, (tarefa.proxima, next(self._seq), tarefa.id))
+
+    def adicionar(self, expressao, dados=None, id=None, proxima=None):
+        """Registra uma tarefa; `proxima` permite retomar um horário salvo (inclusive já vencido)"""
+        agenda = expressao if isinstance(expressao, Agenda) else Agenda(expressao)
+        with self._cond:
+            if id is None:
+                id = next(self._ids)
+            tarefa = Tarefa(id, agenda, dados, proxima or agenda.proxima(datetime.now()))
+            self._tarefas[id] = tarefa
+            self._agendar(tarefa)
+            self._cond.notify()
+        return tarefa
+
+    def remover(self, id):
+        with self._cond:
+            # A entrada no heap vira órfã e é descartada quando chegar ao topo
+            self._tarefas.pop(id, None)
+            self._cond.notify()
+
+    def proximas(self):
+        """Lista (horário, tarefa) ordenada pelo próximo disparo"""
+        with self._cond:
+            tarefas = [t for t in self._tarefas.values() if t.proxima is not None]
+        return sorted(((t.proxima, t) for t in tarefas), key=lambda par: par[0])
+
+    @property
+    def pendentes(self):
+        """Execuções vencidas aguardando a thread de trabalho"""
+        return self._fila.qsize()
+
+    # --- Ciclo de vida ---
+
+    def iniciar(self):
+        with self._cond:
+            if self._rodando:
+                return
+            self._rodando = True
+            self._fila = queue.Queue()  # Fila nova: a execução de uma partida anterior pode ainda estar terminando
+        self._threads = [
+            threading.Thread(target=self._loop, daemon=True, name="agendador"),
+            threading.Thread(target=self._trabalhador, args=(self._fila,), daemon=True, name="agendador-execucao"),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def parar(self, aguardar=False, timeout=None):
+        """Para de disparar; execuções na fila são descartadas, a atual termina normalmente"""
+        with self._cond:
+            if not self._rodando:
+                return
+            self._rodando = False
+            self._cond.notify_all()
+            fila = self._fila
+        while True:
+            try:
+                fila.get_nowait()
+            except queue.Empty:
+                break
+        fila.put(None)
+        if aguardar:
+            for t in self._threads:
+                t.join(timeout)
+
+    @property
+    def rodando(self):
+        return self._rodando
+
+    # --- Threads ---
+
+    def _vencidas(self, agora):
+        """Remove do heap as tarefas vencidas; retorna [(tarefa, horário)] a executar"""
+        disparos = []
+        limite_atraso = agora - timedelta(seconds=TOLERANCIA_ATRASO)
+        while self._heap and self._heap[0][0] <= agora:
+            horario, _, id = heapq.heappop(self._heap)
+            tarefa = self._tarefas.get(id)
+            if tarefa is None or tarefa.proxima != horario:
+                continue  # Removida ou reagendada
+
+            # Só os mais recentes ficam guardados: "*/5" após uma semana parado seriam 2000 horários
+            perdidos = deque([horario], maxlen=MAX_PERDIDAS + 1)
+            total = 1
+            proxima = tarefa.agenda.proxima(horario)
+            while proxima is not None and proxima <= agora:
+                perdidos.append(proxima)
+                total += 1
+                proxima = tarefa.agenda.proxima(proxima)
+            perdidos = list(perdidos)
+
+            if perdidos[-1] >= limite_atraso:
+                # O último horário é o atual; os anteriores a ele foram perdidos
+                no_horario, perdidos = [perdidos[-1]], perdidos[:-1]
+            else:
+                no_horario = []
+
+            if self.politica_atraso == TODAS:
+                perdidos = perdidos[-MAX_PERDIDAS:]
+                descartados = total - len(perdidos) - len(no_horario)
+                if descartados:
+                    print(f"Tarefa agendada {tarefa.id}: {descartados} execuções perdidas descartadas "
+                          f"(repondo só as {len(perdidos)} mais recentes).")
+                disparos.extend((tarefa, h) for h in perdidos)
+            elif self.politica_atraso == UMA and perdidos and not no_horario:
+                disparos.append((tarefa, perdidos[-1]))
+            disparos.extend((tarefa, h) for h in no_horario)
+
+            tarefa.proxima = proxima
+            self._agendar(tarefa)
+            if self.ao_reagendar:
+                self.ao_reagendar(tarefa)
+        return disparos
+
+    def _loop(self):
+        with self._cond:
+            while self._rodando:
+                for disparo in self._vencidas(datetime.now()):
+                    self._fila.put(disparo)
+                if self._heap:
+                    espera = (self._heap[0][0] - datetime.now()).total_seconds()
+                    espera = min(max(espera, 0), ESPERA_MAXIMA)
+                else:
+                    espera = None
+                self._cond.wait(espera)
+
+    def _trabalhador(self, fila):
+        while True:
+            disparo = fila.get()
+            if disparo is None:
+                return
+            tarefa, horario = disparo
+            try:
+                self.executar(tarefa, horario)
+            except Exception as e:
+                if self.ao_erro:
+                    self.ao_erro(tarefa, e)
+                else:
+                    print(f"Erro na tarefa agendada {tarefa.id}: {e}")
@@ -1,11 +1,31 @@
 import time
+import math
 import json
 import hashlib
-import requests
 import re
+import threading
+import requests
+from core.http_client import obter_sessao
+from core.shopee_cache import obter_cache_respostas, chave_requisicao, REPRODUZIR
+from core.rate_limit import LimitadorTaxa, backoff, ESPERA_MAXIMA
 
 API_URL = "https://open-api.affiliate.shopee.com.br/graphql"
 
+# Limite de chamadas à API (compartilhado por todas as threads e processos via banco)
+REQUISICOES_POR_SEGUNDO = 1.0
+RAJADA = 5
+# Novas tentativas em 429/5xx e falhas de rede, com espera exponencial + jitter
+TENTATIVAS_API = 4
+BACKOFF_BASE = 1.0
+STATUS_TEMPORARIOS = {429, 500, 502, 503, 504}
+# A API GraphQL responde HTTP 200 com errors[].extensions.code para erro de sistema e limite de taxa
+CODIGOS_TEMPORARIOS = {10000, 10030}
+
+limitador = LimitadorTaxa("shopee_api", REQUISICOES_POR_SEGUNDO, RAJADA)
+
+_stats_lock = threading.Lock()
+_stats_api = {"requisicoes": 0, "novas_tentativas": 0, "segundos_backoff": 0.0, "falhas": 0}
+
 def gerar_assinatura(appid, secret, payload_json):
     """Gera assinatura SHA256 conforme documentação"""
     timestamp = str(int(time.time()))
@@ -13,6 +33,14 @@ def gerar_assinatura(appid, secret, payload_json):
     signature = hashlib.sha256(fator.encode('utf-8')).hexdigest()
     return timestamp, signature
 
+def _numero(valor, padrao=0.0):
+    """float(valor), ou `padrao` se não for um número finito ("nan"/"inf" também caem no padrão)"""
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        return padrao
+    return numero if math.isfinite(numero) else padrao
+
 def processar_oferta_individual(oferta, indice):
     """Processa uma oferta individual com tratamento robusto de erros"""
     try:
@@ -22,18 +50,16 @@ def processar_oferta_individual(oferta, indice):
         rating_str = oferta.get("ratingStar", "4.5")
         link = oferta.get("offerLink", "")
         imagem_url = oferta.get("imageUrl", "")
+        item_id = oferta.get("itemId")
         
-        # Converte preço
-        try:
-            preco = float(preco_str)
-        except:
-            preco = 99.99
+        # Converte preço e rating
+        preco = _numero(preco_str, 99.99)
+        rating = _numero(rating_str, 4.5)
         
-        # Converte rating
-        try:
-            rating = float(rating_str)
-        except:
-            rating = 4.5
+        # Campos numéricos usados pelo ranking (core/ranking.py); só vêm na query com CAMPOS_RANKING
+        desconto = _numero(oferta.get("priceDiscountRate"))
+        comissao = _numero(oferta.get("commissionRate"))
+        vendas = _numero(oferta.get("sales"))
         
         # Limpa nome (SEM CORTAR)
         nome_limpo = re.sub(r'[^\w\s\-\.,!?]', '', str(nome))
@@ -45,39 +71,131 @@ def processar_oferta_individual(oferta, indice):
             "link": link if link else "https://shopee.com.br",
             "afiliado": link if link else "https://shopee.com.br",
             "fonte": "Shopee",
-            "imagem_url": imagem_url
+            "imagem_url": imagem_url,
+            # Identificador estável usado para não repetir a oferta no mesmo grupo
+            "chave": f"shopee:{item_id}" if item_id else link,
+            "preco_valor": preco,
+            "avaliacao_valor": rating,
+            "desconto": desconto,
+            "comissao": comissao,
+            "vendas": vendas,
         }
         
     except Exception as e:
         print(f"   ⚠️ Erro no produto {indice}: {str(e)[:80]}")
         return None
 
-def buscar_ofertas_shopee_reais(appid, secret, limit=5):
-    """Busca ofertas reais da API Shopee"""
-    produtos = []
-    
-    if not appid or not secret or len(secret) != 32:
-        print("⚠️ Credenciais inválidas")
-        return produtos
-    
-    try:
-        print(f"\n🛍️  Buscando ofertas na API Shopee (Limit: {limit})...")
-        
-        query = """{
-  productOfferV2(limit: 10) {
-    nodes {
-      productName
-      price
-      ratingStar
-      offerLink
-      imageUrl
-    }
-  }
-}"""
-        
-        payload_dict = {"query": query}
-        payload_json = json.dumps(payload_dict, separators=(',', ':'))
-        
+# sortType do productOfferV2
+ORDEM_RELEVANCIA = 1
+ORDEM_MAIS_VENDIDOS = 2
+ORDEM_MAIOR_PRECO = 3
+ORDEM_MENOR_PRECO = 4
+ORDEM_MAIOR_COMISSAO = 5
+ORDENS = {
+    "relevancia": ORDEM_RELEVANCIA,
+    "vendas": ORDEM_MAIS_VENDIDOS,
+    "maior_preco": ORDEM_MAIOR_PRECO,
+    "menor_preco": ORDEM_MENOR_PRECO,
+    "comissao": ORDEM_MAIOR_COMISSAO,
+}
+
+# listType do productOfferV2
+LISTA_TODAS = 0
+LISTA_MAIOR_COMISSAO = 1
+LISTA_MAIS_VENDIDAS = 2
+LISTAS = {
+    "todas": LISTA_TODAS,
+    "maior_comissao": LISTA_MAIOR_COMISSAO,
+    "mais_vendidas": LISTA_MAIS_VENDIDAS,
+}
+
+# Só o que processar_oferta_individual usa
+CAMPOS_OFERTA = ("itemId", "productName", "price", "ratingStar", "offerLink", "imageUrl")
+# Extras pedidos só quando as ofertas passam pelo ranking
+CAMPOS_RANKING = ("priceDiscountRate", "commissionRate", "sales")
+
+class ConsultaOfertas:
+    """Monta a query productOfferV2 com filtros aplicados pela própria API.
+
+    keyword: busca por texto; sort_type: ORDEM_*; shop_id / product_cat_id:
+    restringe a uma loja / categoria; list_type: LISTA_*; campos: campos de
+    cada oferta (padrão: só os usados por processar_oferta_individual).
+    Valores inválidos geram ValueError na criação, não na chamada à API.
+    """
+
+    def __init__(self, keyword=None, sort_type=None, shop_id=None, product_cat_id=None, list_type=None,
+                 campos=CAMPOS_OFERTA):
+        self.keyword = (str(keyword).strip() or None) if keyword is not None else None
+        self.sort_type = self._inteiro("sortType", sort_type, validos=set(ORDENS.values()))
+        self.shop_id = self._inteiro("shopId", shop_id)
+        self.product_cat_id = self._inteiro("productCatId", product_cat_id)
+        self.list_type = self._inteiro("listType", list_type, validos=set(LISTAS.values()))
+        if not campos or not all(re.fullmatch(r"[A-Za-z_]\w*", c) for c in campos):
+            raise ValueError(f"Campos inválidos: {campos}")
+        self.campos = tuple(campos)
+
+    @staticmethod
+    def _inteiro(nome, valor, validos=None):
+        if valor is None or valor == "":
+            return None
+        try:
+            valor = int(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"{nome} deve ser um número inteiro: {valor!r}")
+        if valor < 0 or (validos and valor not in validos):
+            raise ValueError(f"{nome} inválido: {valor}")
+        return valor
+
+    def argumentos(self, page, limit):
+        args = [("keyword", json.dumps(self.keyword, ensure_ascii=False) if self.keyword else None),
+                ("sortType", self.sort_type),
+                ("shopId", self.shop_id),
+                ("productCatId", self.product_cat_id),
+                ("listType", self.list_type),
+                ("page", int(page)),
+                ("limit", int(limit))]
+        return ", ".join(f"{nome}: {valor}" for nome, valor in args if valor is not None)
+
+    def query(self, page, limit):
+        """Texto GraphQL da página `page` com `limit` ofertas"""
+        return ("{ productOfferV2(%s) { nodes { %s } pageInfo { hasNextPage } } }"
+                % (self.argumentos(page, limit), " ".join(self.campos)))
+
+    def __repr__(self):
+        return f"ConsultaOfertas({self.argumentos(1, 0)})"
+
+def executar_query(appid, secret, query, variables=None):
+    """Assina e envia uma query GraphQL, retornando o JSON da resposta ou None.
+
+    Respostas recentes da mesma query/variáveis vêm do cache em disco
+    (core/shopee_cache.py), que também faz a gravação/reprodução offline.
+    """
+    cache = obter_cache_respostas()
+    chave = chave_requisicao(appid, query, variables)
+    resposta = cache.obter(chave)
+    if resposta is not None:
+        return resposta
+    if cache.modo == REPRODUZIR:
+        print("⚠️ Query não encontrada na gravação (modo reprodução, sem acesso à API)")
+        return None
+
+    payload_dict = {"query": query}
+    if variables:
+        payload_dict["variables"] = variables
+    payload_json = json.dumps(payload_dict, separators=(',', ':'))
+
+    espera_servidor = 0.0  # Retry-After da última resposta
+    for tentativa in range(TENTATIVAS_API):
+        if tentativa:
+            espera = max(backoff(tentativa - 1, BACKOFF_BASE), espera_servidor)
+            print(f"Nova tentativa {tentativa}/{TENTATIVAS_API - 1} em {espera:.1f}s...")
+            time.sleep(espera)
+            _contar(novas_tentativas=1, segundos_backoff=espera)
+
+        limitador.aguardar()
+        espera_servidor = 0.0
+
+        # Assinatura nova a cada tentativa: o timestamp faz parte dela
         timestamp, signature = gerar_assinatura(appid, secret, payload_json)
         
         auth_header = f"SHA256 Credential={appid}, Timestamp={timestamp}, Signature={signature}"
@@ -89,39 +207,127 @@ def buscar_ofertas_shopee_reais(appid, secret, limit=5):
         }
         
         print(f"Requesting {API_URL}...")
-        response = requests.post(API_URL, headers=headers, data=payload_json, timeout=25)
+        _contar(requisicoes=1)
+        try:
+            response = obter_sessao().post(API_URL, headers=headers, data=payload_json, timeout=25)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            print(f"⚠️ Falha de rede na API: {str(e)[:80]}")
+            continue
         
+        if response.status_code in STATUS_TEMPORARIOS:
+            print(f"⚠️ HTTP {response.status_code} da API")
+            try:
+                espera_servidor = min(float(response.headers.get("Retry-After", 0)), ESPERA_MAXIMA)
+            except ValueError:
+                pass
+            continue
+
         if response.status_code != 200:
             print(f"⚠️ HTTP {response.status_code} da API")
-            return produtos
+            _contar(falhas=1)
+            return None
         
         resposta = response.json()
-        
-        # Verificação passo a passo da estrutura
-        if "data" not in resposta:
-            print("❌ Resposta não contém 'data'")
-            return produtos
+        codigo = _codigo_temporario(resposta)
+        if codigo is not None:
+            print(f"⚠️ Erro temporário da API (código {codigo})")
+            continue
+
+        cache.guardar(chave, resposta)
+        return resposta
+
+    _contar(falhas=1)
+    return None
+
+def _codigo_temporario(resposta):
+    """Código de errors[].extensions.code que vale nova tentativa (limite de taxa, erro de sistema), ou None"""
+    erros = resposta.get("errors") if isinstance(resposta, dict) else None
+    for erro in erros or []:
+        try:
+            codigo = int((erro.get("extensions") or {}).get("code"))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if codigo in CODIGOS_TEMPORARIOS:
+            return codigo
+    return None
+
+def _contar(**valores):
+    with _stats_lock:
+        for campo, valor in valores.items():
+            _stats_api[campo] += valor
+
+def estatisticas_api():
+    """Requisições, novas tentativas, tempo em backoff e tempo segurado pelo limite de taxa"""
+    with _stats_lock:
+        stats = dict(_stats_api)
+    limite = limitador.estatisticas()
+    stats["limitadas"] = limite["limitadas"]
+    stats["segundos_limitado"] = limite["segundos_limitado"]
+    return stats
+
+def iterar_ofertas_shopee(appid, secret, limit=5, por_pagina=20, consulta=None):
+    """Percorre as páginas de productOfferV2 entregando cada oferta processada assim que a página chega.
+    
+    Só uma página fica em memória por vez; a próxima só é buscada quando o consumidor
+    termina de usar as ofertas da página atual. `consulta` (ConsultaOfertas) define
+    filtros, ordenação e campos; o padrão é sem filtros.
+    """
+    consulta = consulta or ConsultaOfertas()
+    if not appid or not secret or len(secret) != 32:
+        print("⚠️ Credenciais inválidas")
+        return
+    
+    print(f"\n🛍️  Buscando ofertas na API Shopee (Limit: {limit})...")
+    
+    entregues = 0
+    indice = 0
+    pagina = 1
+    # O tamanho da página não pode mudar entre chamadas, senão o deslocamento (page * limit) se perde
+    tamanho = min(por_pagina, limit)
+    
+    while entregues < limit:
+        try:
+            resposta = executar_query(appid, secret, consulta.query(pagina, tamanho))
+            if resposta is None:
+                return
             
-        if "productOfferV2" not in resposta["data"]:
-            print("❌ Resposta não contém 'productOfferV2'")
-            return produtos
+            # Verificação passo a passo da estrutura
+            if "data" not in resposta:
+                print("❌ Resposta não contém 'data'")
+                return
+                
+            if not resposta["data"].get("productOfferV2"):
+                print("❌ Resposta não contém 'productOfferV2'")
+                return
+                
+            if "nodes" not in resposta["data"]["productOfferV2"]:
+                print("❌ Resposta não contém 'nodes'")
+                return
             
-        if "nodes" not in resposta["data"]["productOfferV2"]:
-            print("❌ Resposta não contém 'nodes'")
-            return produtos
-        
-        ofertas = resposta["data"]["productOfferV2"]["nodes"]
+            ofertas = resposta["data"]["productOfferV2"]["nodes"] or []
+            page_info = resposta["data"]["productOfferV2"].get("pageInfo") or {}
+            
+            print(f"✅ API retornou {len(ofertas)} ofertas (página {pagina})!")
         
-        print(f"✅ API retornou {len(ofertas)} ofertas!")
+        except Exception as e:
+            print(f"❌ Erro geral na API: {str(e)[:100]}")
+            return
         
-        for i, oferta in enumerate(ofertas[:limit]):
-            produto_processado = processar_oferta_individual(oferta, i+1)
+        for oferta in ofertas:
+            if entregues >= limit:
+                break
+            indice += 1
+            produto_processado = processar_oferta_individual(oferta, indice)
             if produto_processado:
-                produtos.append(produto_processado)
+                entregues += 1
+                yield produto_processado
         
-        print(f"✅ {len(produtos)} produtos processados com sucesso")
-        
-    except Exception as e:
-        print(f"❌ Erro geral na API: {str(e)[:100]}")
-    
+        if not ofertas or not page_info.get("hasNextPage"):
+            break
+        pagina += 1
+
+def buscar_ofertas_shopee_reais(appid, secret, limit=5, consulta=None):
+    """Busca ofertas reais da API Shopee"""
+    produtos = list(iterar_ofertas_shopee(appid, secret, limit=limit, consulta=consulta))
+    print(f"✅ {len(produtos)} produtos processados com sucesso")
     return produtos
@@ -0,0 +1,203 @@
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import threading
+
+PASTA_CACHE = "cache_shopee"
+VALIDADE = 10 * 60      # Segundos que uma resposta vale antes de consultar a API de novo (0 = sem cache)
+VARREDURA_A_CADA = 100  # Gravações entre duas limpezas dos arquivos vencidos (a primeira gravação também limpa)
+
+# Modos
+NORMAL = "normal"           # Cache com validade; na falta, consulta a API
+GRAVAR = "gravar"           # Sempre consulta a API e grava cada resposta no arquivo de gravação
+REPRODUZIR = "reproduzir"   # Só responde com o arquivo de gravação; nunca acessa a rede
+MODOS = (NORMAL, GRAVAR, REPRODUZIR)
+
+
+# Literais de string GraphQL ("..." com escapes): o conteúdo faz parte da busca e não é normalizado
+_STRING_GRAPHQL = re.compile(r'("(?:[^"\\]|\\.)*")')
+
+
+def _normalizar_trecho(trecho):
+    trecho = re.sub(r"\s+", " ", trecho)
+    return re.sub(r"\s*([{}():,])\s*", r"\1", trecho)
+
+
+def normalizar_query(query):
+    """Remove diferenças de espaçamento/quebra de linha que não mudam a query.
+
+    Só mexe fora das strings: keyword: "a (b)" e keyword: "a(b)" continuam diferentes.
+    """
+    partes = _STRING_GRAPHQL.split(query.strip())
+    # split com grupo: índices ímpares são as strings, mantidas como vieram
+    return "".join(parte if i % 2 else _normalizar_trecho(parte) for i, parte in enumerate(partes))
+
+
+def chave_requisicao(appid, query, variables=None):
+    """Identificador da requisição: conta + query normalizada + variáveis (em ordem canônica)"""
+    texto = json.dumps({"appid": appid, "query": normalizar_query(query), "variables": variables or {}},
+                       sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class CacheRespostas:
+    """Cache em disco das respostas GraphQL da Shopee, com gravação/reprodução.
+
+    No modo normal cada resposta fica em "<chave>.json" na pasta do cache e é
+    reaproveitada enquanto tiver menos de `validade` segundos; arquivos vencidos
+    que ninguém voltou a pedir são apagados na primeira gravação e a cada
+    VARREDURA_A_CADA gravações. No modo gravar,
+    toda resposta real é acrescentada (uma por linha) ao arquivo de gravação.
+    No modo reproduzir as respostas vêm só desse arquivo, o que permite rodar o
+    pipeline inteiro offline e sempre com os mesmos dados.
+    """
+
+    def __init__(self, pasta=PASTA_CACHE, validade=VALIDADE, modo=NORMAL, arquivo=None):
+        self.pasta = os.path.abspath(pasta)
+        self.validade = validade
+        self._lock = threading.Lock()
+        self._gravadas = {}
+        self._stats = {"acertos": 0, "faltas": 0, "gravadas": 0}
+        self._gravacoes = 0
+        self.modo = NORMAL
+        self.arquivo = None
+        self.configurar(modo=modo, arquivo=arquivo)
+
+    def configurar(self, validade=None, modo=None, arquivo=None):
+        if validade is not None:
+            self.validade = validade
+        if arquivo is not None:
+            self.arquivo = arquivo
+        if modo is not None:
+            if modo not in MODOS:
+                raise ValueError(f"Modo de cache inválido: {modo}")
+            if modo != NORMAL and not self.arquivo:
+                raise ValueError(f"O modo '{modo}' precisa de um arquivo de gravação")
+            self.modo = modo
+        if self.modo == REPRODUZIR:
+            self._carregar_gravacao()
+
+    def _carregar_gravacao(self):
+        gravadas = {}
+        try:
+            with open(self.arquivo, "r", encoding="utf-8") as f:
+                for linha in f:
+                    if linha.strip():
+                        registro = json.loads(linha)
+                        gravadas[registro["chave"]] = registro["resposta"]  # A última gravação vence
+        except OSError as e:
+            print(f"Erro ao ler gravação da Shopee: {e}")
+        with self._lock:
+            self._gravadas = gravadas
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, f"{chave}.json")
+
+    def _contar(self, campo):
+        with self._lock:
+            self._stats[campo] += 1
+
+    def obter(self, chave):
+        """Resposta guardada para a chave, ou None se for preciso consultar a API"""
+        if self.modo == REPRODUZIR:
+            with self._lock:
+                resposta = self._gravadas.get(chave)
+            self._contar("acertos" if resposta is not None else "faltas")
+            return resposta
+
+        if self.modo == GRAVAR or self.validade <= 0:
+            return None
+
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                registro = json.load(f)
+        except (OSError, ValueError):
+            self._contar("faltas")
+            return None
+
+        if time.time() - registro.get("salvo_em", 0) >= self.validade:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+            self._contar("faltas")
+            return None
+
+        self._contar("acertos")
+        return registro["resposta"]
+
+    def guardar(self, chave, resposta):
+        """Guarda uma resposta real da API (só respostas com dados e sem erros)"""
+        if not isinstance(resposta, dict) or "data" not in resposta or resposta.get("errors"):
+            return
+
+        if self.modo == GRAVAR:
+            linha = json.dumps({"chave": chave, "resposta": resposta}, ensure_ascii=False)
+            with self._lock:
+                with open(self.arquivo, "a", encoding="utf-8") as f:
+                    f.write(linha + "\n")
+                self._stats["gravadas"] += 1
+            return
+
+        if self.modo == NORMAL and self.validade > 0:
+            os.makedirs(self.pasta, exist_ok=True)
+            destino = self._caminho(chave)
+            temporario = f"{destino}.{uuid.uuid4().hex}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump({"salvo_em": time.time(), "resposta": resposta}, f, ensure_ascii=False)
+            os.replace(temporario, destino)
+
+            with self._lock:
+                self._gravacoes += 1
+                varrer = self._gravacoes % VARREDURA_A_CADA == 1
+            if varrer:
+                self.limpar_vencidos()
+
+    def limpar_vencidos(self):
+        """Apaga respostas (e temporários esquecidos) com mais de `validade` segundos; retorna quantos saíram"""
+        limite = time.time() - self.validade
+        removidos = 0
+        try:
+            entradas = list(os.scandir(self.pasta))
+        except OSError:
+            return 0
+        for entrada in entradas:
+            if not entrada.name.endswith((".json", ".tmp")):
+                continue
+            try:
+                # A data do arquivo basta: evita abrir e decodificar cada JSON
+                if entrada.stat().st_mtime < limite:
+                    os.remove(entrada.path)
+                    removidos += 1
+            except OSError:
+                pass
+        return removidos
+
+    def estatisticas(self):
+        with self._lock:
+            return dict(self._stats, modo=self.modo)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def obter_cache_respostas():
+    """Retorna o cache de respostas compartilhado"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CacheRespostas()
+    return _cache
+
+
+def configurar_cache_respostas(validade=None, modo=None, arquivo=None):
+    """Ajusta validade, modo (normal/gravar/reproduzir) e arquivo de gravação; só muda o que for informado"""
+    cache = obter_cache_respostas()
+    cache.configurar(validade=validade, modo=modo, arquivo=arquivo)
+    return cache
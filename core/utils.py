@@ -1,34 +1,130 @@
-import requests
 import os
-import win32clipboard
+import time
+import shutil
+import threading
 from io import BytesIO
-from PIL import Image
+from core.image_cache import obter_cache
+
+# PIL e pywin32 são importados dentro das funções que os usam: este módulo é
+# carregado só quando um envio começa e não deve pesar na abertura do app.
+
+# Normalização antes do envio
+MAX_DIMENSAO = 1280     # Maior lado em pixels
+QUALIDADE_JPEG = 85
+
+# O clipboard do Windows é um só: com vários navegadores enviando em paralelo,
+# copiar e colar precisa acontecer sem outra thread no meio
+CLIPBOARD_LOCK = threading.RLock()
+
+_stats_lock = threading.Lock()
+_stats_normalizacao = {"imagens": 0, "dib_original": 0, "dib_final": 0, "segundos": 0.0}
+
+def obter_imagem(url):
+    """Retorna o caminho da imagem no cache local, baixando-a se necessário (ou None)"""
+    if not url:
+        return None
+    return obter_cache().obter(url)
 
 def baixar_imagem(url, caminho_arquivo):
-    """Baixa imagem de uma URL para um arquivo local"""
+    """Baixa imagem de uma URL para um arquivo local (passando pelo cache de imagens)"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, stream=True, timeout=10)
-        if response.status_code == 200:
-            with open(caminho_arquivo, 'wb') as f:
-                for chunk in response.iter_content(1024):
-                    f.write(chunk)
-            return True
-        return False
+        caminho_cache = obter_imagem(url)
+        if not caminho_cache:
+            return False
+        shutil.copyfile(caminho_cache, caminho_arquivo)
+        return True
     except Exception as e:
         print(f"Erro ao baixar imagem: {e}")
         return False
 
-def copy_image_to_clipboard(image_path):
-    """Copia uma imagem para o clipboard do Windows"""
+def normalizar_imagem(image_path, max_dimensao=MAX_DIMENSAO, qualidade=QUALIDADE_JPEG):
+    """Reduz a imagem ao tamanho máximo, remove metadados e recomprime em JPEG.
+
+    Só imagens maiores que max_dimensao são recodificadas; as demais seguem
+    como estão. Retorna o caminho da versão reduzida (guardada no cache ao
+    lado da original) ou o próprio image_path. Imagens fora do cache são
+    devolvidas sem alteração.
+    """
+    cache = obter_cache()
+    if not cache.contem(image_path):
+        return image_path
+    extensao = f"n{max_dimensao}q{qualidade}.jpg"
+    # Marca (vazia) de que a imagem já cabe no limite: evita abri-la de novo a cada envio
+    marca_original = f"n{max_dimensao}q{qualidade}.original"
+    pronto = cache.derivado(image_path, extensao)
+    if pronto:
+        return pronto
+    if cache.derivado(image_path, marca_original):
+        return image_path
+
+    from PIL import Image, ImageOps
+
+    inicio = time.perf_counter()
+    image = Image.open(image_path)  # Só lê o cabeçalho; os pixels vêm depois, se preciso
+    largura, altura = image.size
+    if max(largura, altura) <= max_dimensao:
+        image.close()
+        cache.anexar(image_path, marca_original, b"")
+        return image_path
+
+    image.draft("RGB", (max_dimensao, max_dimensao))  # Decodifica JPEG grande já reduzido
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    image.thumbnail((max_dimensao, max_dimensao), Image.LANCZOS)
+
+    output = BytesIO()
+    image.save(output, "JPEG", quality=qualidade, optimize=True)  # Sem exif/icc: metadados ficam para trás
+    caminho = cache.anexar(image_path, extensao, output.getvalue())
+    output.close()
+
+    # O que pesa na colagem é o DIB (3 bytes por pixel), não o tamanho do arquivo
+    with _stats_lock:
+        _stats_normalizacao["imagens"] += 1
+        _stats_normalizacao["dib_original"] += largura * altura * 3
+        _stats_normalizacao["dib_final"] += image.width * image.height * 3
+        _stats_normalizacao["segundos"] += time.perf_counter() - inicio
+    return caminho
+
+def estatisticas_normalizacao():
+    """Imagens reduzidas, bytes de DIB antes/depois, bytes economizados e tempo gasto"""
+    with _stats_lock:
+        stats = dict(_stats_normalizacao)
+    stats["dib_economizado"] = stats["dib_original"] - stats["dib_final"]
+    return stats
+
+def gerar_dib(image_path):
+    """Converte a imagem para o formato CF_DIB (BMP sem o cabeçalho de arquivo)"""
+    from PIL import Image
+
+    image = Image.open(image_path)
+    output = BytesIO()
+    image.convert("RGB").save(output, "BMP")
+    data = output.getvalue()[14:]
+    output.close()
+    return data
+
+def obter_dib(image_path):
+    """Retorna o payload CF_DIB da imagem, reaproveitando o que já estiver no cache"""
+    cache = obter_cache()
+    # <chave>.img -> <chave>.dib ; <chave>.n1280q85.jpg -> <chave>.n1280q85.dib
+    sufixo = os.path.basename(image_path).partition(".")[2]
+    extensao = "dib" if sufixo == "img" else sufixo.rsplit(".", 1)[0] + ".dib"
+    caminho_dib = cache.derivado(image_path, extensao)
+    if caminho_dib:
+        with open(caminho_dib, "rb") as f:
+            return f.read()
+    data = gerar_dib(image_path)
+    cache.anexar(image_path, extensao, data)
+    return data
+
+def copy_image_to_clipboard(image_path, dib=None):
+    """Copia uma imagem para o clipboard do Windows
+
+    Se `dib` vier pronto (gerado em segundo plano por obter_dib) não há conversão aqui.
+    """
     try:
-        image = Image.open(image_path)
-        output = BytesIO()
-        image.convert("RGB").save(output, "BMP")
-        data = output.getvalue()[14:]
-        output.close()
+        import win32clipboard
+
+        data = dib if dib is not None else obter_dib(image_path)
         
         win32clipboard.OpenClipboard()
         win32clipboard.EmptyClipboard()
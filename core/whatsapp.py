@@ -1,5 +1,6 @@
 import os
 import time
+import threading
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
@@ -9,11 +10,91 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 
+WHATSAPP_URL = "https://web.whatsapp.com"
+
+# Elementos que só existem com a sessão logada
+INDICADORES_LOGIN = [
+    "//div[@data-testid='chat-list']",
+    "//div[@role='textbox']", 
+    "//div[@contenteditable='true']"
+]
+
+# Esperas por condição: intervalo de checagem curto em vez de sleeps fixos
+POLL = 0.05
+TIMEOUT_PREVIEW = 10
+TIMEOUT_CONFIRMACAO = 30
+TIMEOUT_COLAR_TEXTO = 2   # O editor pode aplicar o "paste" sintético de forma assíncrona
+
+SELETOR_CAIXA_CHAT = "div[contenteditable='true'][data-tab='10']"
+
+JS_CAIXA_FOCADA = """
+const el = document.activeElement;
+return !!el && el.matches("div[contenteditable='true'][data-tab='10']");
+"""
+
+# Preview aberto: botão de envio do modal presente e foco no campo de legenda (não na caixa do chat)
+JS_PREVIEW_ABERTO = """
+const el = document.activeElement;
+return !!document.querySelector("span[data-icon='send']")
+    && !!el && el.isContentEditable && el.getAttribute('data-tab') !== '10';
+"""
+
+JS_LEGENDA_PREENCHIDA = """
+const el = document.activeElement;
+return !!el && el.isContentEditable && el.innerText.trim().length > 0;
+"""
+
+# Nome do chat aberto no cabeçalho da conversa
+JS_CHAT_ABERTO = """
+const header = document.querySelector('#main header');
+if (!header) return false;
+for (const span of header.querySelectorAll('span[title], span[dir="auto"]')) {
+    if (span.getAttribute('title') === arguments[0] || span.textContent === arguments[0]) return true;
+}
+return false;
+"""
+
+# Cola o texto inteiro de uma vez disparando um evento "paste" no campo editável
+JS_COLAR_TEXTO = """
+const el = arguments[0];
+el.focus();
+const dados = new DataTransfer();
+dados.setData('text/plain', arguments[1]);
+el.dispatchEvent(new ClipboardEvent('paste', {clipboardData: dados, bubbles: true, cancelable: true}));
+"""
+
+JS_TEXTO_CAIXA = "return arguments[0].innerText;"
+
+# A lista de mensagens é virtualizada (a quantidade de div.message-out pode não mudar
+# depois de um envio), então a nova mensagem é reconhecida pelo data-id da última enviada
+JS_ULTIMA_ENVIADA = """
+const msgs = document.querySelectorAll('div.message-out');
+if (!msgs.length) return '';
+const ultima = msgs[msgs.length - 1];
+const el = ultima.closest('[data-id]') || ultima.querySelector('[data-id]');
+return el ? el.getAttribute('data-id') : '';
+"""
+
+# Estado da última mensagem enviada se ela não for a de data-id arguments[0]:
+# 'enviada' (check), 'pendente' (relógio) ou null (nenhuma mensagem nova)
+JS_ESTADO_ULTIMA = """
+const msgs = document.querySelectorAll('div.message-out');
+if (!msgs.length) return null;
+const ultima = msgs[msgs.length - 1];
+const el = ultima.closest('[data-id]') || ultima.querySelector('[data-id]');
+if (!el || el.getAttribute('data-id') === arguments[0]) return null;
+if (ultima.querySelector("[data-icon^='msg-check'], [data-icon^='msg-dblcheck']")) return 'enviada';
+return 'pendente';
+"""
+
 class WhatsAppBot:
     def __init__(self, driver_path=None, session_dir="whatsapp_session"):
         self.driver_path = driver_path
         self.session_dir = os.path.abspath(session_dir)
         self.driver = None
+        self.latencias = {}  # Etapa -> segundos, do último envio
+        self._chats = {}     # Nome do grupo -> elemento da lista de conversas já resolvido
+        self.metricas_texto = {}  # Último envio de texto: método, caracteres, segundos, caracteres/s
 
     def log(self, msg):
         print(f"[WhatsApp] {msg}")
@@ -39,7 +120,7 @@ class WhatsAppBot:
             else:
                 self.driver = webdriver.Chrome(options=chrome_options)
                 
-            self.driver.get("https://web.whatsapp.com")
+            self.driver.get(WHATSAPP_URL)
             return True
         except Exception as e:
             self.log(f"Erro ao iniciar driver: {e}")
@@ -49,14 +130,8 @@ class WhatsAppBot:
         """Aguardar login no WhatsApp Web"""
         try:
             self.log("Aguardando login...")
-            elementos_indicadores = [
-                "//div[@data-testid='chat-list']",
-                "//div[@role='textbox']", 
-                "//div[@contenteditable='true']"
-            ]
-            
             WebDriverWait(self.driver, timeout).until(
-                lambda d: any(d.find_elements(By.XPATH, xp) for xp in elementos_indicadores)
+                lambda d: any(d.find_elements(By.XPATH, xp) for xp in INDICADORES_LOGIN)
             )
             self.log("Login detectado!")
             return True
@@ -64,101 +139,208 @@ class WhatsAppBot:
             self.log("Timeout aguardando login")
             return False
 
+    def esta_vivo(self):
+        """Verifica se a janela do Chrome ainda responde e está no WhatsApp Web"""
+        if not self.driver:
+            return False
+        try:
+            return bool(self.driver.window_handles) and self.driver.current_url.startswith(WHATSAPP_URL)
+        except Exception:
+            return False
+
+    def esta_logado(self):
+        """Verifica, sem esperar, se a sessão do WhatsApp Web está logada"""
+        try:
+            return any(self.driver.find_elements(By.XPATH, xp) for xp in INDICADORES_LOGIN)
+        except Exception:
+            return False
+
+    def _xpath_titulo(self, nome):
+        """XPath do span com o título exato, aceitando aspas simples no nome"""
+        if "'" not in nome:
+            literal = f"'{nome}'"
+        else:
+            partes = nome.split("'")
+            literal = "concat(" + ", \"'\", ".join(f"'{p}'" for p in partes) + ")"
+        return f"//span[@title={literal}]"
+
+    def _chat_aberto(self, nome):
+        try:
+            return bool(self.driver.execute_script(JS_CHAT_ABERTO, nome))
+        except Exception:
+            return False
+
+    def _abrir_e_confirmar(self, elemento, nome, timeout=3):
+        elemento.click()
+        self._esperar(lambda d: self._chat_aberto(nome), timeout)
+
     def buscar_grupo(self, nome_grupo):
-        """Busca e entra em um grupo"""
+        """Busca e entra em um grupo
+
+        Grupos já resolvidos ficam em cache: se o chat já está aberto nada é feito,
+        e se o elemento guardado ainda estiver na página ele é clicado direto, sem
+        passar pela busca. Se o alvo guardado falhar, o cache do grupo é descartado.
+        """
         try:
+            # 0. Já é o chat aberto (comum ao enviar vários produtos ao mesmo grupo)
+            if self._chat_aberto(nome_grupo):
+                return True
+
+            # 1. Elemento já resolvido antes
+            cacheado = self._chats.get(nome_grupo)
+            if cacheado is not None:
+                try:
+                    self._abrir_e_confirmar(cacheado, nome_grupo)
+                    return True
+                except Exception:
+                    self.log(f"Cache do grupo {nome_grupo} inválido, buscando de novo.")
+                    self._chats.pop(nome_grupo, None)
+
             self.log(f"Buscando grupo: {nome_grupo}")
+            xpath = self._xpath_titulo(nome_grupo)
             
-            # 1. Tenta clicar direto se visivel
-            try:
-                chat = self.driver.find_element(By.XPATH, f"//span[@title='{nome_grupo}']")
-                chat.click()
+            # 2. Tenta clicar direto se visivel
+            encontrados = self.driver.find_elements(By.XPATH, xpath)
+            if encontrados:
+                chat = encontrados[0]
                 self.log(f"Grupo {nome_grupo} encontrado na lista.")
-                time.sleep(1)
-                return True
-            except:
-                pass
-            
-            # 2. Usa a busca
-            search_box = self.driver.find_element(By.XPATH, "//div[@contenteditable='true'][@data-tab='3']")
-            search_box.click()
-            search_box.clear()
-            search_box.send_keys(nome_grupo)
-            time.sleep(2)
-            
-            chat = self.driver.find_element(By.XPATH, f"//span[@title='{nome_grupo}']")
+            else:
+                # 3. Usa a busca e espera o resultado aparecer
+                search_box = self.driver.find_element(By.XPATH, "//div[@contenteditable='true'][@data-tab='3']")
+                search_box.click()
+                search_box.clear()
+                search_box.send_keys(nome_grupo)
+                chat = self._esperar(EC.element_to_be_clickable((By.XPATH, xpath)), 5)
+                self.log(f"Grupo {nome_grupo} encontrado via busca.")
+
             chat.click()
-            self.log(f"Grupo {nome_grupo} encontrado via busca.")
+            try:
+                self._esperar(lambda d: self._chat_aberto(nome_grupo), 5)
+                self._chats[nome_grupo] = chat
+            except Exception:
+                # Clique feito mas o cabeçalho não confirmou: segue sem guardar no cache
+                self.log(f"Aviso: não confirmei a abertura de {nome_grupo}.")
             return True
             
         except Exception as e:
             self.log(f"Erro ao buscar grupo: {e}")
             return False
 
-    def enviar_imagem(self, image_path, legenda=""):
-        """Envia imagem usando input injection e menu"""
+    def esquecer_grupo(self, nome_grupo):
+        """Descarta o chat guardado em cache (ex.: depois de uma falha de envio nele)"""
+        self._chats.pop(nome_grupo, None)
+
+    def _esperar(self, condicao, timeout):
+        return WebDriverWait(self.driver, timeout, poll_frequency=POLL).until(condicao)
+
+    def _etapa(self, nome, inicio):
+        agora = time.perf_counter()
+        self.latencias[nome] = agora - inicio
+        return agora
+
+    def _colar(self):
+        actions = ActionChains(self.driver)
+        actions.key_down(Keys.CONTROL)
+        actions.send_keys('v')
+        actions.key_up(Keys.CONTROL)
+        actions.perform()
+
+    def _ultima_enviada(self):
+        """data-id da última mensagem enviada no chat ('' se não houver; None se não deu para ler)"""
         try:
-            self.log(f"Enviando imagem: {image_path}")
-            
-            # Nova Abordagem: Copiar Imagem para Clipboard e Colar
-            from core.utils import copy_image_to_clipboard
-            import win32clipboard
+            return self.driver.execute_script(JS_ULTIMA_ENVIADA)
+        except Exception:
+            return None
 
-            # 1. Copia imagem para memória
-            if not copy_image_to_clipboard(image_path):
-                raise Exception("Falha ao copiar imagem para clipboard")
+    def _aguardar_confirmacao(self, id_antes, timeout=TIMEOUT_CONFIRMACAO):
+        """Espera uma mensagem enviada diferente de `id_antes` aparecer no chat com o check de enviada"""
+        if id_antes is None:
+            return True
+        try:
+            self._esperar(lambda d: d.execute_script(JS_ESTADO_ULTIMA, id_antes) == 'enviada', timeout)
+            return True
+        except Exception:
+            estado = self.driver.execute_script(JS_ESTADO_ULTIMA, id_antes)
+            if estado == 'pendente':
+                self.log("Aviso: mensagem ainda sem confirmação de envio (relógio).")
+                return True
+            self.log("Mensagem não apareceu no chat.")
+            return False
 
-            # 2. Foca no campo de texto principal
-            try:
-                # Tenta clicar no campo de mensagem para garantir foco
-                box = self.driver.find_element(By.CSS_SELECTOR, "div[contenteditable='true'][data-tab='10']")
-                box.click()
-                time.sleep(0.5)
-            except:
-                self.log("Aviso: Não consegui focar no chat, tentando colar mesmo assim.")
-
-            # 3. Cola a imagem (Ctrl+V)
-            actions = ActionChains(self.driver)
-            actions.key_down(Keys.CONTROL)
-            actions.send_keys('v')
-            actions.key_up(Keys.CONTROL)
-            actions.perform()
-            
-            self.log("Comando colar (Ctrl+V) enviado.")
-            
-            # 4. Aguarda preview da imagem (campo de legenda aparecer)
-            # Substituindo WebDriverWait por sleep fixo curto para agilidade máxima
-            # O usuário relatou lentidão, indicando que o Wait estava demorando para achar o elemento.
-            time.sleep(0.8) 
-            
-            # 5. Colar a legenda
-            if legenda:
-               try:
-                   # Copia legenda para clipboard
-                   win32clipboard.OpenClipboard()
-                   win32clipboard.EmptyClipboard()
-                   win32clipboard.SetClipboardText(legenda, win32clipboard.CF_UNICODETEXT)
-                   win32clipboard.CloseClipboard()
-                   
-                   # Cola Legenda (Ctrl+V) assumindo que o foco já está correto (comportamento padrão do WhatsApp)
-                   actions = ActionChains(self.driver)
-                   actions.key_down(Keys.CONTROL)
-                   actions.send_keys('v')
-                   actions.key_up(Keys.CONTROL)
-                   actions.perform()
-                   time.sleep(0.2)
-               except Exception as e:
-                   self.log(f"Erro ao colar legenda: {e}")
-                   # Tenta digitar como último recurso
-                   try: 
-                        if caption_box:
-                            caption_box.send_keys(legenda) 
-                   except: pass
+    def _colar_imagem_com_legenda(self, image_path, legenda, dib, t):
+        """Etapas que usam o clipboard: copiar/colar imagem e legenda. Retorna (id_antes, t)"""
+        from core.utils import copy_image_to_clipboard
+        import win32clipboard
+
+        # 1. Copia imagem para memória
+        if not copy_image_to_clipboard(image_path, dib=dib):
+            raise Exception("Falha ao copiar imagem para clipboard")
+        t = self._etapa("clipboard", t)
+
+        # 2. Foca no campo de texto principal
+        try:
+            box = self.driver.find_element(By.CSS_SELECTOR, SELETOR_CAIXA_CHAT)
+            box.click()
+            self._esperar(lambda d: d.execute_script(JS_CAIXA_FOCADA), 2)
+        except:
+            self.log("Aviso: Não consegui focar no chat, tentando colar mesmo assim.")
+        t = self._etapa("foco", t)
+
+        id_antes = self._ultima_enviada()
+
+        # 3. Cola a imagem (Ctrl+V)
+        self._colar()
+        self.log("Comando colar (Ctrl+V) enviado.")
+        
+        # 4. Aguarda o preview da imagem abrir com o foco no campo de legenda
+        try:
+            self._esperar(lambda d: d.execute_script(JS_PREVIEW_ABERTO), TIMEOUT_PREVIEW)
+        except Exception:
+            self.log("Aviso: preview não detectado, seguindo mesmo assim.")
+        t = self._etapa("preview", t)
+        
+        # 5. Colar a legenda
+        if legenda:
+           try:
+               # Copia legenda para clipboard
+               win32clipboard.OpenClipboard()
+               win32clipboard.EmptyClipboard()
+               win32clipboard.SetClipboardText(legenda, win32clipboard.CF_UNICODETEXT)
+               win32clipboard.CloseClipboard()
+               
+               # Cola Legenda (Ctrl+V) no campo focado pelo preview
+               self._colar()
+               self._esperar(lambda d: d.execute_script(JS_LEGENDA_PREENCHIDA), 3)
+           except Exception as e:
+               self.log(f"Erro ao colar legenda: {e}")
+               # Tenta digitar como último recurso
+               try: 
+                    self.driver.switch_to.active_element.send_keys(legenda)
+               except: pass
+           t = self._etapa("legenda", t)
+
+        return id_antes, t
+
+    def enviar_imagem(self, image_path, legenda="", dib=None):
+        """Envia imagem colando do clipboard no chat, esperando cada etapa pela condição real da página
+
+        `dib` é o payload do clipboard já convertido (ver core.utils.obter_dib).
+        As latências medidas de cada etapa ficam em self.latencias.
+        """
+        try:
+            self.log(f"Enviando imagem: {image_path}")
+            self.latencias = {}
+            inicio = time.perf_counter()
+
+            # Clipboard reservado do copiar imagem até colar a legenda (outros navegadores esperam)
+            from core.utils import CLIPBOARD_LOCK
+            with CLIPBOARD_LOCK:
+                id_antes, t = self._colar_imagem_com_legenda(image_path, legenda, dib, inicio)
 
             try:
                 # Botão de enviar no modal de preview
-                send_btn = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, "//span[@data-icon='send']"))
+                send_btn = self._esperar(
+                    EC.element_to_be_clickable((By.XPATH, "//span[@data-icon='send']")), 5
                 )
                 send_btn.click()
                 self.log("Botão enviar clicado.")
@@ -167,35 +349,199 @@ class WhatsAppBot:
                 # Fallback Enter
                 actions = ActionChains(self.driver)
                 actions.send_keys(Keys.ENTER).perform()
+            t = self._etapa("envio", t)
             
-            self.log("Imagem enviada.")
-            time.sleep(2)
-            return True
+            # 6. Aguarda a mensagem aparecer no chat com o check de enviada
+            sucesso = self._aguardar_confirmacao(id_antes)
+            self._etapa("confirmacao", t)
+            self.latencias["total"] = time.perf_counter() - inicio
+
+            etapas = ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in self.latencias.items())
+            self.log(f"Imagem enviada. Latências: {etapas}" if sucesso else f"Falha no envio. Latências: {etapas}")
+            return sucesso
             
         except Exception as e:
             self.log(f"Erro ao enviar imagem: {e}")
             return False
 
-    def enviar_mensagem_texto(self, texto):
-        """Envia mensagem de texto"""
+    @staticmethod
+    def _sem_espacos(texto):
+        # O editor troca quebras de linha por parágrafos: compara só o conteúdo visível
+        return "".join((texto or "").split())
+
+    def _texto_caixa(self, box):
+        try:
+            return self.driver.execute_script(JS_TEXTO_CAIXA, box) or ""
+        except Exception:
+            return None
+
+    def limpar_caixa(self, box):
+        """Apaga o que houver no campo (rascunho ou sobra de uma tentativa anterior)"""
+        if not self._sem_espacos(self._texto_caixa(box)):
+            return
+        box.send_keys(Keys.CONTROL, "a")
+        box.send_keys(Keys.DELETE)
         try:
+            self._esperar(lambda d: not self._sem_espacos(self._texto_caixa(box)), 2)
+        except Exception:
+            self.log("Aviso: o campo de mensagem não ficou vazio.")
+
+    def _colar_texto(self, box, texto):
+        """Insere o texto inteiro em uma única chamada ao navegador.
+
+        Só conta como sucesso quando o conteúdo do campo passa a ser exatamente o
+        texto (o campo é limpo antes), esperando o editor aplicar a colagem.
+        """
+        esperado = self._sem_espacos(texto)
+        try:
+            self.driver.execute_script(JS_COLAR_TEXTO, box, texto)
+            self._esperar(lambda d: self._sem_espacos(self._texto_caixa(box)) == esperado, TIMEOUT_COLAR_TEXTO)
+            return True
+        except Exception as e:
+            self.log(f"Colagem do texto não confirmada no campo ({type(e).__name__}).")
+            return False
+
+    def _digitar_texto(self, box, texto):
+        """Digita linha a linha (um evento por caractere); usado quando colar não funciona"""
+        linhas = texto.split('\n')
+        for i, linha in enumerate(linhas):
+            box.send_keys(linha)
+            if i < len(linhas) - 1:
+                box.send_keys(Keys.SHIFT + Keys.ENTER)
+
+    def inserir_texto(self, box, texto, metodo="auto"):
+        """Coloca o texto no campo sem enviar. metodo: "auto" (colar, digitar se falhar), "colar" ou "digitar"
+
+        Retorna o método efetivamente usado e registra caracteres/s em self.metricas_texto.
+        """
+        inicio = time.perf_counter()
+        usado = None
+        self.limpar_caixa(box)
+        if metodo in ("auto", "colar") and self._colar_texto(box, texto):
+            usado = "colar"
+        elif metodo in ("auto", "digitar"):
+            # A colagem pode ter entrado pela metade: digitar por cima duplicaria o texto
+            self.limpar_caixa(box)
+            self._digitar_texto(box, texto)
+            usado = "digitar"
+        segundos = time.perf_counter() - inicio
+        self.metricas_texto = {
+            "metodo": usado,
+            "caracteres": len(texto),
+            "segundos": segundos,
+            "caracteres_por_segundo": len(texto) / segundos if segundos > 0 else 0.0,
+        }
+        return usado
+
+    def enviar_mensagem_texto(self, texto, metodo="auto"):
+        """Envia mensagem de texto (colando tudo de uma vez; digita apenas se colar falhar)"""
+        try:
+            # Latências deste envio (sem sobras das etapas de imagem do envio anterior)
+            self.latencias = {}
+            inicio = time.perf_counter()
             # Encontra campo de texto
             # data-tab=10 é o campo principal de chat
-            box = self.driver.find_element(By.CSS_SELECTOR, "div[contenteditable='true'][data-tab='10']")
+            box = self.driver.find_element(By.CSS_SELECTOR, SELETOR_CAIXA_CHAT)
             box.click()
+            id_antes = self._ultima_enviada()
+            t = self._etapa("foco", inicio)
             
-            # Envia texto com suporte a quebras de linha (Shift+Enter)
-            # Se o texto já vier com \n, podemos tentar enviar direto ou processar
-            for linha in texto.split('\n'):
-                box.send_keys(linha)
-                box.send_keys(Keys.SHIFT + Keys.ENTER)
+            if not self.inserir_texto(box, texto, metodo):
+                raise Exception(f"Não foi possível inserir o texto (método {metodo})")
+            m = self.metricas_texto
+            self.log(f"Texto inserido via {m['metodo']}: {m['caracteres']} caracteres em {m['segundos']:.2f}s")
+            t = self._etapa("texto", t)
             
             box.send_keys(Keys.ENTER)
-            return True
+            sucesso = self._aguardar_confirmacao(id_antes)
+            self._etapa("confirmacao", t)
+            self.latencias["total"] = time.perf_counter() - inicio
+
+            etapas = ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in self.latencias.items())
+            self.log(f"Texto enviado. Latências: {etapas}" if sucesso else f"Falha no envio. Latências: {etapas}")
+            return sucesso
         except Exception as e:
             self.log(f"Erro ao enviar texto: {e}")
             return False
             
     def fechar(self):
         if self.driver:
-            self.driver.quit()
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+
+class WhatsAppService:
+    """Mantém um WhatsAppBot aberto entre execuções (partida quente).
+
+    Antes de cada uso verifica se a janela ainda existe e se a sessão continua
+    logada; se não, reinicia o Chrome (partida fria) de forma transparente.
+    """
+
+    def __init__(self, driver_path=None, session_dir="whatsapp_session", timeout_login=60):
+        self.driver_path = driver_path
+        self.session_dir = session_dir
+        self.timeout_login = timeout_login
+        self._bot = None
+        self._lock = threading.Lock()
+        self.estatisticas = {
+            "partidas_frias": 0,
+            "partidas_quentes": 0,
+            "ultima_partida": None,   # "fria" ou "quente"
+            "ultima_duracao": 0.0,    # segundos até o bot estar pronto
+        }
+
+    def log(self, msg):
+        print(f"[WhatsAppService] {msg}")
+
+    def _registrar(self, tipo, inicio):
+        duracao = time.perf_counter() - inicio
+        self.estatisticas["partidas_frias" if tipo == "fria" else "partidas_quentes"] += 1
+        self.estatisticas["ultima_partida"] = tipo
+        self.estatisticas["ultima_duracao"] = duracao
+        self.log(f"Partida {tipo} em {duracao:.1f}s")
+
+    def obter_bot(self):
+        """Retorna um bot pronto para uso (logado) ou None se não foi possível iniciar"""
+        with self._lock:
+            inicio = time.perf_counter()
+            bot = self._bot
+
+            if bot and bot.esta_vivo():
+                if bot.esta_logado():
+                    self._registrar("quente", inicio)
+                    return bot
+                # Janela viva mas sem sessão visível: recarrega a página antes de desistir do Chrome
+                self.log("Sessão não visível, recarregando WhatsApp Web...")
+                try:
+                    bot.driver.get(WHATSAPP_URL)
+                    if bot.aguardar_login(timeout=self.timeout_login):
+                        self._registrar("quente", inicio)
+                        return bot
+                except Exception as e:
+                    self.log(f"Falha ao recarregar: {e}")
+
+            if bot:
+                self.log("Bot indisponível, reiniciando Chrome...")
+                bot.fechar()
+                self._bot = None
+
+            bot = WhatsAppBot(driver_path=self.driver_path, session_dir=self.session_dir)
+            if not bot.iniciar_driver():
+                return None
+            if not bot.aguardar_login(timeout=self.timeout_login):
+                bot.fechar()
+                return None
+
+            self._bot = bot
+            self._registrar("fria", inicio)
+            return bot
+
+    def encerrar(self):
+        """Fecha o Chrome mantido pelo serviço"""
+        with self._lock:
+            if self._bot:
+                self._bot.fechar()
+                self._bot = None
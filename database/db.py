@@ -1,15 +1,149 @@
 import sqlite3
 import os
 import json
+import time
+import queue
+import atexit
+import threading
 from datetime import datetime
 
 DB_FILE = "zapfinder.db"
 
-def init_db():
-    """Inicializa o banco de dados"""
-    conn = sqlite3.connect(DB_FILE)
+# Escritas em segundo plano: agrupadas em uma transação por lote
+LOTE_MAXIMO = 500
+ESPERA_LOTE = 0.2   # Segundos aguardando mais itens antes de gravar o lote
+
+_local = threading.local()
+
+
+def _configurar(conn):
+    conn.execute("PRAGMA journal_mode=WAL")     # Leitores não bloqueiam o escritor (e vice-versa)
+    conn.execute("PRAGMA synchronous=NORMAL")   # Em WAL, fsync só no checkpoint
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def conectar():
+    """Conexão persistente da thread atual (uma por thread, reaproveitada entre chamadas)"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _configurar(sqlite3.connect(DB_FILE, timeout=30))
+        _local.conn = conn
+    return conn
+
+
+class _EscritorBackground(threading.Thread):
+    """Thread única dona da conexão de escrita; grava a fila em lotes, um commit por lote"""
+
+    def __init__(self):
+        super().__init__(daemon=True, name="db-writer")
+        self.fila = queue.Queue()
+        self._pendentes = 0
+        self._cond = threading.Condition()
+
+    def enfileirar(self, sql, params):
+        with self._cond:
+            self._pendentes += 1
+        self.fila.put((sql, params))
+
+    def aguardar(self, timeout=None):
+        """Espera até que tudo o que foi enfileirado esteja gravado"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pendentes == 0, timeout)
+
+    def _coletar_lote(self):
+        lote = [self.fila.get()]
+        limite = time.monotonic() + ESPERA_LOTE
+        while len(lote) < LOTE_MAXIMO:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(self.fila.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _gravar_um_a_um(self, conn, lote):
+        for sql, params in lote:
+            try:
+                with conn:
+                    conn.execute(sql, params)
+            except Exception as e:
+                print(f"Erro ao gravar no banco: {e} ({' '.join(sql.split()[:3])}... {params})")
+
+    def run(self):
+        conn = _configurar(sqlite3.connect(DB_FILE, timeout=30))
+        _criar_tabelas(conn)  # A primeira escrita pode chegar antes do init_db da UI
+        while True:
+            lote = self._coletar_lote()
+            try:
+                with conn:
+                    # Itens consecutivos com o mesmo SQL viram um único executemany
+                    inicio = 0
+                    while inicio < len(lote):
+                        sql = lote[inicio][0]
+                        fim = inicio
+                        while fim < len(lote) and lote[fim][0] == sql:
+                            fim += 1
+                        conn.executemany(sql, [params for _, params in lote[inicio:fim]])
+                        inicio = fim
+            except Exception as e:
+                # Um item com erro desfaz o lote inteiro: grava item a item e perde só os que falham
+                print(f"Erro ao gravar lote no banco ({len(lote)} itens): {e}. Gravando um a um...")
+                self._gravar_um_a_um(conn, lote)
+            with self._cond:
+                self._pendentes -= len(lote)
+                self._cond.notify_all()
+
+
+_escritor = None
+_escritor_lock = threading.Lock()
+
+
+def _obter_escritor():
+    global _escritor
+    if _escritor is None:
+        with _escritor_lock:
+            if _escritor is None:
+                _escritor = _EscritorBackground()
+                _escritor.start()
+    return _escritor
+
+
+def gravar_em_segundo_plano(sql, params):
+    """Enfileira uma escrita; retorna na hora, a gravação acontece no próximo lote"""
+    _obter_escritor().enfileirar(sql, params)
+
+
+def flush_historico(timeout=5):
+    """Aguarda as escritas pendentes chegarem ao banco"""
+    if _escritor is None:
+        return True
+    return _escritor.aguardar(timeout)
+
+
+atexit.register(flush_historico)
+
+
+def _adicionar_coluna(cursor, tabela, coluna, tipo):
+    """ALTER TABLE ADD COLUMN se a coluna ainda não existir.
+
+    A UI, o CLI e a thread de escrita podem migrar o mesmo banco ao mesmo tempo:
+    quem perde a corrida recebe "duplicate column name", que não é erro.
+    """
+    colunas = {linha[1] for linha in cursor.execute(f"PRAGMA table_info({tabela})")}
+    if coluna in colunas:
+        return
+    try:
+        cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+    except sqlite3.OperationalError as e:
+        if "duplicate column" not in str(e).lower():
+            raise
+
+def _criar_tabelas(conn):
     cursor = conn.cursor()
-    
+
     # Tabela de Histórico de Envios
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS envio_historico (
@@ -20,7 +154,7 @@ def init_db():
         status TEXT
     )
     """)
-    
+
     # Tabela de Agendamentos
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS agendamentos (
@@ -30,33 +164,299 @@ def init_db():
         config TEXT
     )
     """)
-    
+
+    # Colunas adicionadas depois da criação original da tabela
+    _adicionar_coluna(cursor, "agendamentos", "proxima_execucao", "TEXT")
+    # Consulta "próximos a vencer" dos agendamentos ativos
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_agendamentos_proxima ON agendamentos (ativo, proxima_execucao)")
+
+    # Índices da consulta paginada do histórico (filtros + ordem por id)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_historico_status ON envio_historico (status, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_historico_canal ON envio_historico (canal_envio, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_historico_data ON envio_historico (data_envio)")
+
+    # Registro de quais produtos já foram enviados para qual grupo (deduplicação).
+    # A chave primária (chave, grupo) é o índice usado na checagem em lote.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS produtos_enviados (
+        chave TEXT NOT NULL,
+        grupo TEXT NOT NULL,
+        enviado_em REAL NOT NULL,
+        PRIMARY KEY (chave, grupo)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_produtos_enviados_data ON produtos_enviados (enviado_em)")
+
+    # Baldes de tokens dos limitadores de taxa, compartilhados entre processos
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS limites_taxa (
+        nome TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        atualizado_em REAL NOT NULL
+    ) WITHOUT ROWID
+    """)
+
     conn.commit()
-    conn.close()
+
+def init_db():
+    """Inicializa o banco de dados"""
+    _criar_tabelas(conectar())
 
 def salvar_historico(produto, canal, status):
+    """Registra um envio; não bloqueia (gravado em lote pela thread de escrita)"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO envio_historico (data_envio, produto_titulo, canal_envio, status) VALUES (?, ?, ?, ?)",
-                       (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), produto, canal, status))
-        conn.commit()
-        conn.close()
+        gravar_em_segundo_plano(
+            "INSERT INTO envio_historico (data_envio, produto_titulo, canal_envio, status) VALUES (?, ?, ?, ?)",
+            (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), produto, canal, status))
     except Exception as e:
         print(f"Erro ao salvar historico: {e}")
 
-def ler_historico(limit=50):
+def ler_historico_pagina(antes_de_id=None, depois_de_id=None, limite=50, status=None, canal=None,
+                        data_inicio=None, data_fim=None):
+    """Página do histórico por keyset (id), do mais novo para o mais antigo.
+
+    antes_de_id: próxima página (linhas com id menor que o último exibido).
+    depois_de_id: só as linhas novas desde o maior id exibido.
+    data_inicio/data_fim: "AAAA-MM-DD" (inclusivos).
+    Retorna tuplas (id, data_envio, produto_titulo, status, canal_envio).
+    """
+    condicoes = []
+    params = []
+    if antes_de_id is not None:
+        condicoes.append("id < ?")
+        params.append(antes_de_id)
+    if depois_de_id is not None:
+        condicoes.append("id > ?")
+        params.append(depois_de_id)
+    if status:
+        condicoes.append("status = ?")
+        params.append(status)
+    if canal:
+        condicoes.append("canal_envio = ?")
+        params.append(canal)
+    if data_inicio:
+        condicoes.append("data_envio >= ?")
+        params.append(data_inicio)
+    if data_fim:
+        condicoes.append("data_envio < ?")
+        params.append(data_fim + "~")  # Depois de qualquer horário do dia (o texto é ordenável)
+
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    params.append(limite)
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, data_envio, produto_titulo, status FROM envio_historico ORDER BY id DESC LIMIT ?", (limit,))
-        dados = cursor.fetchall()
-        conn.close()
-        return dados
+        cursor = conectar().execute(
+            f"SELECT id, data_envio, produto_titulo, status, canal_envio FROM envio_historico {where} ORDER BY id DESC LIMIT ?",
+            params)
+        return cursor.fetchall()
     except Exception as e:
         print(f"Erro ao ler historico: {e}")
         return []
 
+def listar_canais():
+    """Canais distintos presentes no histórico (para o filtro da tela)"""
+    try:
+        return [linha[0] for linha in conectar().execute(
+            "SELECT DISTINCT canal_envio FROM envio_historico WHERE canal_envio IS NOT NULL ORDER BY canal_envio")]
+    except Exception as e:
+        print(f"Erro ao listar canais: {e}")
+        return []
+
+# --- Agendamentos ---
+# Cada agendamento é uma linha: expressão de horário (horario), ativo (0/1), config
+# própria em JSON (ex.: {"grupo": "...", "limit": 5, "fonte": "shopee"}) e o
+# próximo disparo previsto (proxima_execucao, "AAAA-MM-DD HH:MM:SS").
+
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
+
+def _linha_agendamento(linha):
+    id, horario, ativo, config, proxima = linha
+    try:
+        config = json.loads(config) if config else {}
+    except ValueError:
+        config = {}
+    return {
+        "id": id,
+        "horario": horario,
+        "ativo": bool(ativo),
+        "config": config,
+        "proxima_execucao": datetime.strptime(proxima, FORMATO_DATA) if proxima else None,
+    }
+
+def criar_agendamento(horario, config=None, ativo=True, proxima_execucao=None):
+    """Cria um agendamento e retorna o id"""
+    try:
+        conn = conectar()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO agendamentos (horario, ativo, config, proxima_execucao) VALUES (?, ?, ?, ?)",
+                (horario, int(ativo), json.dumps(config or {}),
+                 proxima_execucao.strftime(FORMATO_DATA) if proxima_execucao else None))
+        return cursor.lastrowid
+    except Exception as e:
+        print(f"Erro ao criar agendamento: {e}")
+        return None
+
+def atualizar_agendamento(id, horario=None, config=None, ativo=None):
+    """Altera os campos informados de um agendamento"""
+    campos = []
+    params = []
+    if horario is not None:
+        campos.append("horario = ?")
+        params.append(horario)
+    if config is not None:
+        campos.append("config = ?")
+        params.append(json.dumps(config))
+    if ativo is not None:
+        campos.append("ativo = ?")
+        params.append(int(ativo))
+    if not campos:
+        return
+    try:
+        conn = conectar()
+        with conn:
+            conn.execute(f"UPDATE agendamentos SET {', '.join(campos)} WHERE id = ?", (*params, id))
+    except Exception as e:
+        print(f"Erro ao atualizar agendamento: {e}")
+
+def remover_agendamento(id):
+    try:
+        conn = conectar()
+        with conn:
+            conn.execute("DELETE FROM agendamentos WHERE id = ?", (id,))
+    except Exception as e:
+        print(f"Erro ao remover agendamento: {e}")
+
+def definir_proxima_execucao(id, proxima):
+    """Grava o próximo disparo (em segundo plano; chamado a cada execução)"""
+    gravar_em_segundo_plano(
+        "UPDATE agendamentos SET proxima_execucao = ? WHERE id = ?",
+        (proxima.strftime(FORMATO_DATA) if proxima else None, id))
+
+def listar_agendamentos():
+    """Todos os agendamentos (para a tela), em ordem de criação"""
+    try:
+        cursor = conectar().execute(
+            "SELECT id, horario, ativo, config, proxima_execucao FROM agendamentos ORDER BY id")
+        return [_linha_agendamento(linha) for linha in cursor]
+    except Exception as e:
+        print(f"Erro ao listar agendamentos: {e}")
+        return []
+
+def proximos_agendamentos(ate=None, limite=None):
+    """Agendamentos ativos pelo próximo disparo (usa idx_agendamentos_proxima).
+
+    ate: só os que vencem até esse datetime. Os que ainda não têm próximo
+    disparo calculado (NULL) vêm primeiro.
+    """
+    sql = "SELECT id, horario, ativo, config, proxima_execucao FROM agendamentos WHERE ativo = 1"
+    params = []
+    if ate is not None:
+        sql += " AND (proxima_execucao IS NULL OR proxima_execucao <= ?)"
+        params.append(ate.strftime(FORMATO_DATA))
+    sql += " ORDER BY proxima_execucao"
+    if limite is not None:
+        sql += " LIMIT ?"
+        params.append(limite)
+    try:
+        return [_linha_agendamento(linha) for linha in conectar().execute(sql, params)]
+    except Exception as e:
+        print(f"Erro ao ler agendamentos: {e}")
+        return []
+
+# --- Limite de taxa ---
+
+def consumir_token(nome, capacidade, por_segundo):
+    """Tenta tirar um token do balde `nome` (token bucket guardado no banco).
+
+    O balde enche `por_segundo` tokens por segundo até `capacidade`. Retorna 0
+    se o token foi consumido, ou quantos segundos esperar antes de tentar de
+    novo. BEGIN IMMEDIATE reserva a escrita já na leitura, então threads e
+    processos diferentes não gastam o mesmo token.
+    """
+    conn = conectar()
+    agora = time.time()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        linha = conn.execute("SELECT tokens, atualizado_em FROM limites_taxa WHERE nome = ?", (nome,)).fetchone()
+        if linha is None:
+            tokens = float(capacidade)
+        else:
+            tokens = min(float(capacidade), linha[0] + max(0.0, agora - linha[1]) * por_segundo)
+        if tokens >= 1:
+            tokens -= 1
+            espera = 0.0
+        else:
+            espera = (1 - tokens) / por_segundo
+        conn.execute(
+            "INSERT INTO limites_taxa (nome, tokens, atualizado_em) VALUES (?, ?, ?) "
+            "ON CONFLICT(nome) DO UPDATE SET tokens = excluded.tokens, atualizado_em = excluded.atualizado_em",
+            (nome, tokens, agora))
+        conn.commit()
+        return espera
+    except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
+        print(f"Erro no limite de taxa ({nome}): {e}")
+        return 0.0  # Sem banco, não trava as chamadas
+
+# Limite de parâmetros por consulta IN (...) (SQLite antigo aceita no máximo 999)
+_LOTE_CONSULTA = 500
+# Dias que um envio fica no registro de deduplicação (o motor usa o maior entre isso e a janela)
+RETENCAO_ENVIOS_DIAS = 90
+
+def registrar_envio(chave, grupo):
+    """Marca o produto como enviado ao grupo agora (gravação em segundo plano)"""
+    if not chave:
+        return
+    gravar_em_segundo_plano(
+        "INSERT INTO produtos_enviados (chave, grupo, enviado_em) VALUES (?, ?, ?) "
+        "ON CONFLICT(chave, grupo) DO UPDATE SET enviado_em = excluded.enviado_em",
+        (chave, grupo, time.time()))
+
+def chaves_ja_enviadas(chaves, grupo, janela_horas):
+    """Retorna o subconjunto de `chaves` enviado ao grupo nas últimas `janela_horas`"""
+    chaves = [c for c in set(chaves) if c]
+    if not chaves or janela_horas <= 0:
+        return set()
+    desde = time.time() - janela_horas * 3600
+    encontradas = set()
+    try:
+        conn = conectar()
+        for i in range(0, len(chaves), _LOTE_CONSULTA):
+            parte = chaves[i:i + _LOTE_CONSULTA]
+            marcadores = ",".join("?" * len(parte))
+            cursor = conn.execute(
+                f"SELECT chave FROM produtos_enviados WHERE grupo = ? AND chave IN ({marcadores}) AND enviado_em >= ?",
+                (grupo, *parte, desde))
+            encontradas.update(linha[0] for linha in cursor)
+    except Exception as e:
+        print(f"Erro ao consultar produtos enviados: {e}")
+    return encontradas
+
+def ultimos_envios(chaves, grupos=None):
+    """{chave: timestamp do envio mais recente} entre os grupos informados (ou todos)"""
+    chaves = [c for c in set(chaves) if c]
+    ultimos = {}
+    if not chaves:
+        return ultimos
+    try:
+        conn = conectar()
+        for i in range(0, len(chaves), _LOTE_CONSULTA):
+            parte = chaves[i:i + _LOTE_CONSULTA]
+            sql = f"SELECT chave, MAX(enviado_em) FROM produtos_enviados WHERE chave IN ({','.join('?' * len(parte))})"
+            params = list(parte)
+            if grupos:
+                sql += f" AND grupo IN ({','.join('?' * len(grupos))})"
+                params.extend(grupos)
+            ultimos.update(conn.execute(sql + " GROUP BY chave", params))
+    except Exception as e:
+        print(f"Erro ao consultar últimos envios: {e}")
+    return ultimos
+
+def limpar_envios_antigos(dias=RETENCAO_ENVIOS_DIAS):
+    """Remove do registro de deduplicação os envios mais antigos que `dias` (em segundo plano)"""
+    gravar_em_segundo_plano("DELETE FROM produtos_enviados WHERE enviado_em < ?", (time.time() - dias * 86400,))
+
 if __name__ == "__main__":
     init_db()
     print("Database initialized.")
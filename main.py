@@ -1,5 +1,16 @@
+import os
 import flet as ft
 from ui.app import main_app
 
+# Usado por benchmarks/bench_startup.py: fecha o app assim que o primeiro frame é montado
+SAIR_APOS_INICIO = os.environ.get("ZAPFINDER_SAIR_APOS_INICIO") == "1"
+
+
+def iniciar(page: ft.Page):
+    main_app(page)
+    if SAIR_APOS_INICIO:
+        os._exit(0)
+
+
 if __name__ == "__main__":
-    ft.app(target=main_app)
+    ft.app(target=iniciar)
@@ -0,0 +1,21 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# Permite rodar "pytest" de qualquer pasta com os imports do projeto (core, database...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """Banco SQLite novo em tmp_path, com conexões e thread de escrita próprias"""
+    from database import db
+
+    monkeypatch.setattr(db, "DB_FILE", str(tmp_path / "zapfinder.db"))
+    monkeypatch.setattr(db, "_local", threading.local())
+    monkeypatch.setattr(db, "_escritor", None)
+    db.init_db()
+    yield db
+    db.flush_historico()
@@ -0,0 +1,103 @@
+import time
+import sqlite3
+import threading
+
+
+def test_lote_com_item_invalido_grava_os_demais(banco):
+    banco.salvar_historico("Produto 1", "WhatsApp: A", "Sucesso")
+    # grupo NULL viola NOT NULL e desfaz a transação do lote inteiro
+    banco.gravar_em_segundo_plano(
+        "INSERT INTO produtos_enviados (chave, grupo, enviado_em) VALUES (?, ?, ?)", ("x", None, 0.0))
+    banco.salvar_historico("Produto 2", "WhatsApp: A", "Sucesso")
+    banco.registrar_envio("shopee:1", "A")
+    assert banco.flush_historico()
+
+    titulos = [linha[2] for linha in banco.ler_historico_pagina()]
+    assert titulos == ["Produto 2", "Produto 1"]
+    assert banco.chaves_ja_enviadas(["shopee:1", "x"], "A", 1) == {"shopee:1"}
+
+
+def test_limpar_envios_antigos(banco):
+    agora = time.time()
+    sql = "INSERT INTO produtos_enviados (chave, grupo, enviado_em) VALUES (?, ?, ?)"
+    banco.gravar_em_segundo_plano(sql, ("antiga", "A", agora - 100 * 86400))
+    banco.gravar_em_segundo_plano(sql, ("recente", "A", agora - 10 * 86400))
+    banco.limpar_envios_antigos(30)
+    banco.flush_historico()
+
+    assert set(banco.ultimos_envios(["antiga", "recente"])) == {"recente"}
+
+
+def _historico(banco, linhas):
+    sql = "INSERT INTO envio_historico (data_envio, produto_titulo, canal_envio, status) VALUES (?, ?, ?, ?)"
+    for linha in linhas:
+        banco.gravar_em_segundo_plano(sql, linha)
+    banco.flush_historico()
+
+
+def test_paginas_por_keyset_sem_repetir_nem_pular(banco):
+    _historico(banco, [(f"2026-01-{1 + i // 10:02d} 10:00:00", f"P{i}", "WhatsApp: A", "Sucesso") for i in range(25)])
+
+    vistos = []
+    pagina = banco.ler_historico_pagina(limite=10)
+    while pagina:
+        vistos.extend(linha[2] for linha in pagina)
+        pagina = banco.ler_historico_pagina(antes_de_id=pagina[-1][0], limite=10)
+    assert vistos == [f"P{i}" for i in reversed(range(25))]
+
+
+def test_pagina_so_com_linhas_novas(banco):
+    _historico(banco, [("2026-01-01 10:00:00", "antigo", "WhatsApp: A", "Sucesso")])
+    maior_id = banco.ler_historico_pagina()[0][0]
+    _historico(banco, [("2026-01-02 10:00:00", "novo", "WhatsApp: A", "Sucesso")])
+
+    assert [linha[2] for linha in banco.ler_historico_pagina(depois_de_id=maior_id)] == ["novo"]
+    assert banco.ler_historico_pagina(depois_de_id=maior_id + 1) == []
+
+
+def test_filtros_de_status_canal_e_datas(banco):
+    _historico(banco, [
+        ("2026-01-01 08:00:00", "a", "WhatsApp: A", "Sucesso"),
+        ("2026-01-02 23:59:59", "b", "WhatsApp: B", "Erro"),
+        ("2026-01-03 00:00:00", "c", "WhatsApp: A", "Erro"),
+    ])
+
+    def titulos(**filtros):
+        return [linha[2] for linha in banco.ler_historico_pagina(**filtros)]
+
+    assert titulos(status="Erro") == ["c", "b"]
+    assert titulos(canal="WhatsApp: A") == ["c", "a"]
+    # data_fim inclui o dia inteiro
+    assert titulos(data_inicio="2026-01-02", data_fim="2026-01-02") == ["b"]
+    assert titulos(status="Erro", canal="WhatsApp: A", data_inicio="2026-01-01") == ["c"]
+    assert banco.listar_canais() == ["WhatsApp: A", "WhatsApp: B"]
+
+
+def test_migracao_concorrente_de_banco_antigo(tmp_path, monkeypatch):
+    from database import db
+
+    caminho = str(tmp_path / "antigo.db")
+    conn = sqlite3.connect(caminho)
+    conn.execute("CREATE TABLE agendamentos (id INTEGER PRIMARY KEY AUTOINCREMENT, horario TEXT, ativo INTEGER, config TEXT)")
+    conn.execute("INSERT INTO agendamentos (horario, ativo, config) VALUES ('09:00', 1, '{}')")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(db, "DB_FILE", caminho)
+    monkeypatch.setattr(db, "_local", threading.local())
+    erros = []
+
+    def migrar():
+        try:
+            db.init_db()
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=migrar) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert erros == []
+    assert [job["horario"] for job in db.listar_agendamentos()] == ["09:00"]
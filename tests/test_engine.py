@@ -0,0 +1,84 @@
+import os
+import json
+import sys
+import subprocess
+
+import core.shopee as shopee
+from core.engine import Motor, migrar_horarios_antigos
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_cli_nao_carrega_selenium_nem_pywin32():
+    codigo = ("import sys, cli; "
+              "print(','.join(m for m in ('selenium', 'win32clipboard', 'PIL', 'core.whatsapp', 'core.utils') "
+              "if m in sys.modules))")
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    assert saida.stdout.strip() == ""
+
+
+def _motor(ofertas, monkeypatch):
+    def iterar(appid, secret, limit=5, por_pagina=20, consulta=None):
+        yield from ofertas[:limit]
+
+    monkeypatch.setattr(shopee, "iterar_ofertas_shopee", iterar)
+    finalizados = []
+    status = []
+    config = {"appid": "1", "secret": "x" * 32, "grupo": "A, B", "limit": 3}
+    motor = Motor(obter_config=lambda: config, log=lambda msg: None,
+                  ao_status=status.append, ao_finalizar=finalizados.append)
+    return motor, finalizados, status
+
+
+def _oferta(i):
+    return {"titulo": f"Produto {i}", "preco": "10.00", "link": f"https://s/{i}", "imagem_url": "",
+            "chave": f"shopee:{i}"}
+
+
+def test_dry_run_sem_whatsapp_avisa_o_fim(banco, monkeypatch):
+    motor, finalizados, status = _motor([_oferta(i) for i in range(10)], monkeypatch)
+
+    resumo = motor.executar(dry_run=True)
+
+    assert resumo == {"produtos": 3, "enviados": 0, "falhas": 0, "dry_run": True}
+    assert finalizados == [resumo]
+    assert status == [True, False]
+    assert "core.whatsapp" not in sys.modules
+
+
+def test_sem_ofertas_tambem_avisa_o_fim(banco, monkeypatch):
+    motor, finalizados, status = _motor([], monkeypatch)
+
+    resumo = motor.executar()
+
+    assert resumo["produtos"] == 0
+    assert finalizados == [resumo]
+    assert status == [True, False]
+
+
+def test_configuracao_incompleta_nao_inicia(banco, monkeypatch):
+    motor, finalizados, status = _motor([], monkeypatch)
+    motor.obter_config = lambda: {}
+
+    assert motor.executar() is None
+    assert finalizados == [] and status == []
+
+
+def test_migracao_de_horarios_antigos_roda_uma_vez(banco, tmp_path):
+    caminho = tmp_path / "config.json"
+    caminho.write_text(json.dumps({"appid": "1", "scheduler_times": ["09:00", "18:30"]}))
+
+    assert migrar_horarios_antigos(str(caminho)) == 2
+    assert [job["horario"] for job in banco.listar_agendamentos()] == ["09:00", "18:30"]
+    assert json.loads(caminho.read_text()) == {"appid": "1"}
+    assert migrar_horarios_antigos(str(caminho)) == 0
+
+
+def test_migracao_nao_duplica_agendamentos_existentes(banco, tmp_path):
+    caminho = tmp_path / "config.json"
+    caminho.write_text(json.dumps({"scheduler_times": ["09:00"]}))
+    banco.criar_agendamento("12:00")
+
+    assert migrar_horarios_antigos(str(caminho)) == 0
+    assert [job["horario"] for job in banco.listar_agendamentos()] == ["12:00"]
+    assert json.loads(caminho.read_text()) == {}
@@ -0,0 +1,89 @@
+import os
+
+import core.image_cache as image_cache
+from core.image_cache import CacheImagens, chave_url
+
+
+class _Resposta:
+    def __init__(self, dados, status=200):
+        self.dados = dados
+        self.status_code = status
+        self.headers = {"Content-Type": "image/jpeg", "ETag": '"v1"'}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, tamanho):
+        yield self.dados
+
+
+class _Sessao:
+    def __init__(self, tamanho=1000):
+        self.tamanho = tamanho
+        self.chamadas = 0
+
+    def get(self, url, **kwargs):
+        self.chamadas += 1
+        return _Resposta(url.encode() * (self.tamanho // len(url)))
+
+
+def _cache(tmp_path, monkeypatch, tamanho_maximo, em_uso=0):
+    sessao = _Sessao()
+    monkeypatch.setattr(image_cache, "obter_sessao", lambda: sessao)
+    monkeypatch.setattr(image_cache, "EM_USO", em_uso)
+    return CacheImagens(pasta=str(tmp_path), tamanho_maximo=tamanho_maximo), sessao
+
+
+def test_reaproveita_dentro_da_validade(tmp_path, monkeypatch):
+    cache, sessao = _cache(tmp_path, monkeypatch, 10 ** 6)
+    primeiro = cache.obter("https://img/a.jpg")
+    assert cache.obter("https://img/a.jpg") == primeiro
+    assert sessao.chamadas == 1
+
+
+def test_lru_remove_a_mais_antiga_com_derivados(tmp_path, monkeypatch):
+    cache, _ = _cache(tmp_path, monkeypatch, 2500)
+    a = cache.obter("https://img/a.jpg")
+    cache.anexar(a, "dib", b"x" * 100)
+    cache.obter("https://img/b.jpg")
+    cache.obter("https://img/c.jpg")
+
+    chave_a = chave_url("https://img/a.jpg")
+    assert not any(nome.startswith(chave_a) for nome in os.listdir(tmp_path))
+    assert cache.estatisticas()["bytes"] <= 2500
+
+
+def test_lru_nao_remove_imagem_em_uso(tmp_path, monkeypatch):
+    cache, _ = _cache(tmp_path, monkeypatch, 2500, em_uso=60)
+    a = cache.obter("https://img/a.jpg")
+    cache.obter("https://img/b.jpg")
+    cache.obter("https://img/c.jpg")
+    # Tudo foi entregue agora: fica acima do limite em vez de apagar o que está na fila de envio
+    assert os.path.exists(a)
+    assert cache.estatisticas()["entradas"] == 3
+
+
+def test_atualizacao_troca_imagem_e_apaga_derivados(tmp_path, monkeypatch):
+    cache, sessao = _cache(tmp_path, monkeypatch, 10 ** 6)
+    cache.validade = 0
+    a = cache.obter("https://img/a.jpg")
+    derivado = cache.anexar(a, "dib", b"antigo")
+
+    assert cache.obter("https://img/a.jpg") == a
+    assert sessao.chamadas == 2
+    assert os.path.exists(a)
+    assert not os.path.exists(derivado)
+    assert not [nome for nome in os.listdir(tmp_path) if nome.endswith(".tmp")]
+
+
+def test_recarrega_entradas_da_pasta(tmp_path, monkeypatch):
+    cache, _ = _cache(tmp_path, monkeypatch, 10 ** 6)
+    a = cache.obter("https://img/a.jpg")
+    cache.anexar(a, "dib", b"x" * 10)
+
+    outro = CacheImagens(pasta=str(tmp_path))
+    assert outro.estatisticas() == cache.estatisticas() | {"limite": outro.tamanho_maximo}
+    assert outro.derivado(a, "dib")
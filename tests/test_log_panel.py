@@ -0,0 +1,53 @@
+import time
+
+from ui.log_panel import LogPanel
+
+
+class _ColunaFalsa:
+    """Faz o papel do ft.Column: lista de controles e contador de update()"""
+
+    def __init__(self):
+        self.controls = []
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+
+def _painel(tmp_path, **kwargs):
+    coluna = _ColunaFalsa()
+    painel = LogPanel(coluna, arquivo=str(tmp_path / "zapfinder.log"), criar_controle=str, **kwargs)
+    return painel, coluna
+
+
+def _esperar(condicao, limite=2.0):
+    fim = time.monotonic() + limite
+    while not condicao() and time.monotonic() < fim:
+        time.sleep(0.01)
+    return condicao()
+
+
+def test_rajada_e_agrupada_em_poucas_atualizacoes(tmp_path):
+    painel, coluna = _painel(tmp_path, intervalo=0.2)
+    for i in range(50):
+        painel.adicionar(f"linha {i}")
+
+    assert _esperar(lambda: len(coluna.controls) == 50)
+    time.sleep(0.3)
+    # A primeira linha aparece na hora; o resto da rajada vai junto, uma vez só
+    assert coluna.updates <= 2
+    assert coluna.controls == [f"linha {i}" for i in range(50)]
+
+
+def test_tela_guarda_so_as_ultimas_linhas(tmp_path):
+    painel, coluna = _painel(tmp_path, linhas_maximas=10, intervalo=0)
+    for i in range(25):
+        painel.adicionar(f"linha {i}")
+        painel._descarregar()  # Sem esperar o timer: várias atualizações seguidas
+
+    assert coluna.controls == [f"linha {i}" for i in range(15, 25)]
+    # Numa rajada maior que o painel, só as últimas chegam a ser criadas
+    for i in range(100):
+        painel.adicionar(f"rajada {i}")
+    painel._descarregar()
+    assert coluna.controls == [f"rajada {i}" for i in range(90, 100)]
@@ -0,0 +1,146 @@
+import time
+import threading
+from urllib.parse import urlparse
+
+import core.mercadolivre as mercadolivre
+from core.mercadolivre import extrair_produto_html, chave_produto_ml
+
+
+def _chunks(html, tamanho):
+    dados = html.encode("utf-8")
+    return [dados[i:i + tamanho] for i in range(0, len(dados), tamanho)]
+
+
+def _pagina(meio, antes=200, depois=2000):
+    bloco = "<div>conteudo qualquer</div>\n"
+    return ("<html><head><title>Fone Bluetooth | Mercado Livre</title></head><body>"
+            + bloco * antes + meio + bloco * depois + "</body></html>")
+
+
+def test_dados_estruturados_encerram_a_leitura_cedo():
+    html = _pagina('<script>{"price": 129.9, "picture":"https://img.exemplo/a.jpg"}</script>')
+    produto, lidos = extrair_produto_html(_chunks(html, 1024), "https://produto.mercadolivre.com.br/MLB-123")
+
+    assert produto["titulo"] == "Fone Bluetooth"
+    assert produto["preco"] == "129.90"
+    assert produto["imagem_url"] == "https://img.exemplo/a.jpg"
+    assert produto["chave"] == "ml:MLB123"
+    assert lidos < len(html.encode("utf-8"))
+
+
+def test_casamento_dividido_entre_chunks():
+    html = _pagina('<script>{"price": 59.5, "image": "//img.exemplo/b.png"}</script>', antes=3)
+    # Chunks pequenos cortam o JSON e o <title> no meio
+    for tamanho in (7, 64, 513):
+        produto, _ = extrair_produto_html(_chunks(html, tamanho))
+        assert produto["preco"] == "59.50"
+        assert produto["imagem_url"] == "https://img.exemplo/b.png"
+        assert produto["titulo"] == "Fone Bluetooth"
+
+
+def test_estruturado_tem_prioridade_sobre_texto():
+    html = _pagina('<span>R$ 1.234,56</span><img data-src="https://img.exemplo/lazy.jpg">'
+                   '<script>{"price": "99.9", "picture": "https://img.exemplo/json.jpg"}</script>')
+    produto, _ = extrair_produto_html(_chunks(html, 256))
+    assert produto["preco"] == "99.90"
+    assert produto["imagem_url"] == "https://img.exemplo/json.jpg"
+
+
+def test_sem_dados_estruturados_usa_texto_e_le_tudo():
+    html = _pagina('<span>R$ 1.234,56</span><img src="https://img.exemplo/c.jpg">')
+    produto, lidos = extrair_produto_html(_chunks(html, 300))
+    assert produto["preco"] == "1234.56"
+    assert produto["imagem_url"] == "https://img.exemplo/c.jpg"
+    assert lidos == len(html.encode("utf-8"))
+
+
+def test_alternativas_sem_json_respeitam_prioridade():
+    html = _pagina('<img src="https://img.exemplo/src.jpg"><img data-src="https://img.exemplo/lazy.webp">'
+                   '<span>R$ 10,00</span><span>R$ 20,00</span>')
+    produto, _ = extrair_produto_html(_chunks(html, 100))
+    assert produto["imagem_url"] == "https://img.exemplo/lazy.webp"
+    assert produto["preco"] == "10.00"
+
+
+def test_sobra_entre_chunks_fica_limitada():
+    extrator = mercadolivre._ExtratorPagina()
+    for chunk in _chunks(_pagina("", depois=5000), 4096):
+        extrator.alimentar(chunk.decode("utf-8"))
+        assert len(extrator.resto) <= mercadolivre._MARGEM
+
+
+def test_pagina_vazia_usa_valores_padrao():
+    produto, lidos = extrair_produto_html([], "https://exemplo/x")
+    assert lidos == 0
+    assert produto["titulo"] == "Produto Mercado Livre"
+    assert produto["preco"] == "99.99"
+    assert produto["chave"] == "https://exemplo/x"
+
+
+def test_utf8_dividido_entre_chunks():
+    html = "<title>Café Ação</title>" + '{"price": 10, "picture":"https://i/x.jpg"}'
+    produto, _ = extrair_produto_html(_chunks(html, 3))
+    assert produto["titulo"] == "Café Ação"
+
+
+def test_chave_produto_ml():
+    assert chave_produto_ml("https://www.mercadolivre.com.br/p/MLB12345?x=1") == "ml:MLB12345"
+    assert chave_produto_ml("https://produto.mercadolivre.com.br/MLA-987-fone") == "ml:MLA987"
+    assert chave_produto_ml("https://outro.site/item") == "https://outro.site/item"
+
+
+def _busca_falsa(monkeypatch, demora=0.05, falhar=()):
+    """Troca o download por uma espera; mede o pico de chamadas simultâneas por host"""
+    lock = threading.Lock()
+    ativas = {}
+    picos = {}
+
+    def processar_link(link):
+        host = urlparse(link).netloc
+        with lock:
+            ativas[host] = ativas.get(host, 0) + 1
+            picos[host] = max(picos.get(host, 0), ativas[host])
+        try:
+            # Links do fim da lista terminam primeiro: a ordem não pode vir da conclusão
+            time.sleep(demora / (1 + int(link.rsplit("/", 1)[1])))
+            if link in falhar:
+                raise Exception("HTTP 404")
+            return {"titulo": link, "preco": "1.00"}, 100
+        finally:
+            with lock:
+                ativas[host] -= 1
+
+    monkeypatch.setattr(mercadolivre, "_processar_link", processar_link)
+    return picos
+
+
+def test_resultado_na_ordem_dos_links(monkeypatch):
+    _busca_falsa(monkeypatch)
+    links = [f"https://host{i % 3}.exemplo/{i}" for i in range(9)]
+    produtos = mercadolivre.buscar_ofertas_ml(links, limit=9, workers=6, max_por_host=3)
+    assert [p["titulo"] for p in produtos] == links
+
+
+def test_limite_de_conexoes_por_host(monkeypatch):
+    picos = _busca_falsa(monkeypatch)
+    links = [f"https://a.exemplo/{i}" for i in range(8)] + [f"https://b.exemplo/{i}" for i in range(8)]
+    mercadolivre.buscar_ofertas_ml(links, limit=16, workers=8, max_por_host=2)
+    assert picos == {"a.exemplo": 2, "b.exemplo": 2}
+
+
+def test_falha_sai_do_resultado_e_entra_no_relatorio(monkeypatch):
+    _busca_falsa(monkeypatch, falhar={"https://a.exemplo/1"})
+    relatorio = []
+    links = [f"https://a.exemplo/{i}" for i in range(3)] + ["", "  "]
+    produtos = mercadolivre.buscar_ofertas_ml(links, limit=5, workers=3, relatorio=relatorio)
+
+    assert [p["titulo"] for p in produtos] == ["https://a.exemplo/0", "https://a.exemplo/2"]
+    assert [(item["link"], item["ok"], item["erro"]) for item in relatorio] == [
+        ("https://a.exemplo/0", True, None), ("https://a.exemplo/1", False, "HTTP 404"), ("https://a.exemplo/2", True, None)]
+    assert all(item["bytes_lidos"] == 100 for item in relatorio if item["ok"])
+
+
+def test_limit_corta_a_lista_e_aceita_link_unico(monkeypatch):
+    _busca_falsa(monkeypatch, demora=0)
+    assert len(mercadolivre.buscar_ofertas_ml([f"https://a.exemplo/{i}" for i in range(10)], limit=4)) == 4
+    assert [p["titulo"] for p in mercadolivre.buscar_ofertas_ml("https://a.exemplo/0")] == ["https://a.exemplo/0"]
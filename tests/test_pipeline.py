@@ -0,0 +1,124 @@
+import time
+import threading
+
+from core.pipeline import PrefetchImagens, enviar_para_grupos, filtrar_ja_enviados, _FIM
+
+
+def _produtos(n, consumidos=None):
+    for i in range(n):
+        if consumidos is not None:
+            consumidos.append(i)
+        yield {"titulo": f"Produto {i}", "imagem_url": ""}
+
+
+def test_entrega_na_ordem_com_preparo():
+    def preparar(produto):
+        produto["mensagem"] = produto["titulo"].upper()
+
+    entregues = list(PrefetchImagens(_produtos(10), antecipar=2, workers=3, preparar=preparar))
+    assert [p["titulo"] for p in entregues] == [f"Produto {i}" for i in range(10)]
+    assert entregues[0]["mensagem"] == "PRODUTO 0"
+    assert all(p["imagem_path"] is None for p in entregues)
+
+
+def test_close_para_o_produtor_e_cancela_pendentes():
+    liberar = threading.Event()
+    consumidos = []
+
+    def preparar(produto):
+        liberar.wait(2)
+
+    prefetch = PrefetchImagens(_produtos(100, consumidos), antecipar=2, workers=1, preparar=preparar)
+    time.sleep(0.3)
+    prefetch.close()
+    liberar.set()
+    time.sleep(0.5)
+    # O produtor parou perto do limite de antecipação em vez de consumir tudo
+    assert len(consumidos) <= 5
+    # Nada que o produtor colocou depois do close() fica pendente na fila
+    assert all(item is _FIM or item.cancelled() or item.done() for item in list(prefetch.fila.queue))
+    assert list(prefetch) == []
+
+
+def test_erro_no_gerador_chega_ao_consumidor():
+    def quebra():
+        yield {"titulo": "ok", "imagem_url": ""}
+        raise RuntimeError("API caiu")
+
+    prefetch = PrefetchImagens(quebra())
+    assert next(prefetch)["titulo"] == "ok"
+    try:
+        next(prefetch)
+    except RuntimeError as e:
+        assert "API caiu" in str(e)
+    else:
+        raise AssertionError("esperava RuntimeError")
+
+
+class _BotFalso:
+    """Registra para quais grupos cada mensagem foi enviada"""
+
+    def __init__(self, inexistentes=(), falhas=()):
+        self.inexistentes = set(inexistentes)
+        self.falhas = set(falhas)
+        self.aberto = None
+        self.enviados = []
+        self.esquecidos = []
+
+    def buscar_grupo(self, grupo):
+        self.aberto = grupo
+        return grupo not in self.inexistentes
+
+    def enviar_mensagem_texto(self, mensagem):
+        if self.aberto in self.falhas:
+            raise RuntimeError("janela fechada")
+        self.enviados.append((self.aberto, mensagem))
+        return True
+
+    def esquecer_grupo(self, grupo):
+        self.esquecidos.append(grupo)
+
+
+def test_grupos_divididos_entre_bots_sempre_do_mesmo_jeito():
+    bots = [_BotFalso(), _BotFalso()]
+    grupos = ["g0", "g1", "g2", "g3", "g4"]
+
+    resultados = enviar_para_grupos(bots, {"mensagem": "oferta"}, grupos)
+    assert resultados == {g: True for g in grupos}
+    assert list(resultados) == grupos
+    assert bots[0].enviados == [("g0", "oferta"), ("g2", "oferta"), ("g4", "oferta")]
+    assert bots[1].enviados == [("g1", "oferta"), ("g3", "oferta")]
+
+
+def test_so_grupos_pendentes_recebem_e_no_mesmo_bot():
+    bots = [_BotFalso(), _BotFalso()]
+    grupos = ["g0", "g1", "g2", "g3"]
+    produto = {"mensagem": "oferta", "grupos_pendentes": ["g3", "g2"]}
+
+    resultados = enviar_para_grupos(bots, produto, grupos)
+    assert list(resultados) == ["g2", "g3"]
+    # g2 continua no bot 0 e g3 no bot 1, como se a lista estivesse completa
+    assert bots[0].enviados == [("g2", "oferta")]
+    assert bots[1].enviados == [("g3", "oferta")]
+    assert enviar_para_grupos(bots, {"mensagem": "x", "grupos_pendentes": []}, grupos) == {}
+
+
+def test_falhas_sao_isoladas_por_grupo():
+    bot = _BotFalso(inexistentes={"sumiu"}, falhas={"quebra"})
+
+    resultados = enviar_para_grupos([bot], {"mensagem": "oferta"}, ["sumiu", "quebra", "ok"])
+    assert resultados == {"sumiu": False, "quebra": False, "ok": True}
+    assert bot.enviados == [("ok", "oferta")]
+    # Só o grupo que chegou a ser aberto sai do cache do bot
+    assert bot.esquecidos == ["quebra"]
+
+
+def test_oferta_repetida_na_execucao_nao_volta_ao_mesmo_grupo(banco):
+    banco.registrar_envio("a", "g1")
+    banco.flush_historico()
+    ofertas = [{"titulo": t, "chave": c} for t, c in
+               [("A", "a"), ("B", "b"), ("A de novo", "a"), ("C", "c"), ("B de novo", "b")]]
+
+    # lote=2: as repetições caem em blocos diferentes, antes de o envio ser gravado
+    saida = [(p["titulo"], p["grupos_pendentes"]) for p in filtrar_ja_enviados(ofertas, ["g1", "g2"], 24, lote=2)]
+    assert saida == [("A", ["g2"]), ("B", ["g1", "g2"]), ("C", ["g1", "g2"])]
@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pytest
+
+from core.ranking import pontuar, indices_top, selecionar_melhores, ler_pesos, PESOS_PADRAO
+from core.shopee import processar_oferta_individual
+
+
+def _oferta(chave, desconto=0.0, comissao=0.0, vendas=0.0, avaliacao=4.5, preco=10.0):
+    return {"chave": chave, "desconto": desconto, "comissao": comissao, "vendas": vendas,
+            "avaliacao_valor": avaliacao, "preco_valor": preco}
+
+
+SO_DESCONTO = {"desconto": 1, "avaliacao": 0, "comissao": 0, "vendas": 0, "preco": 0, "recencia": 0}
+
+
+def test_entrada_vazia():
+    assert pontuar([]).shape == (0,)
+    assert selecionar_melhores([], 5) == []
+    assert indices_top(np.empty(0), 3).shape == (0,)
+
+
+def test_ordem_decrescente_e_k_maior_que_n():
+    ofertas = [_oferta(f"k{i}", desconto=d) for i, d in enumerate([0.1, 0.5, 0.3])]
+    melhores = selecionar_melhores(ofertas, 10, pesos=SO_DESCONTO)
+    assert [o["chave"] for o in melhores] == ["k1", "k2", "k0"]
+    assert melhores[0]["pontuacao"] == pytest.approx(1.0)
+
+
+def test_empate_mantem_a_ordem_da_api():
+    score = np.array([1.0, 2.0, 1.0, 2.0, 2.0, 0.5])
+    assert list(indices_top(score, 4)) == [1, 3, 4, 0]
+    ofertas = [_oferta(f"k{i}", desconto=0.2) for i in range(6)]
+    assert [o["chave"] for o in selecionar_melhores(ofertas, 3, pesos=SO_DESCONTO)] == ["k0", "k1", "k2"]
+
+
+def test_empate_no_corte_entra_pela_ordem_da_api():
+    # Mais de 16 empatados atravessando o corte: argpartition escolheria qualquer um
+    score = np.array([1.0] * 50 + [2.0] * 3)
+    assert list(indices_top(score, 5)) == [50, 51, 52, 0, 1]
+    score = np.array([3.0, np.nan] + [1.0] * 40 + [2.0] + [1.0] * 40)
+    assert list(indices_top(score, 22)) == [0, 42] + list(range(2, 22))
+
+
+def test_faixa_de_preco_exclui_com_menos_infinito():
+    ofertas = [_oferta("barata", desconto=0.9, preco=5), _oferta("ok", desconto=0.1, preco=50),
+               _oferta("cara", desconto=0.8, preco=500)]
+    score = pontuar(ofertas, SO_DESCONTO, faixa_preco=(10, 100))
+    assert score[0] == -math.inf and score[2] == -math.inf
+    assert [o["chave"] for o in selecionar_melhores(ofertas, 3, SO_DESCONTO, faixa_preco=(10, None))] == ["cara", "ok"]
+    assert [o["chave"] for o in selecionar_melhores(ofertas, 3, SO_DESCONTO, faixa_preco=(None, 100))] == ["barata", "ok"]
+
+
+def test_recencia_decai_com_meia_vida():
+    agora = 1_000_000.0
+    ofertas = [_oferta("nunca"), _oferta("agora"), _oferta("24h"), _oferta("48h")]
+    envios = {"agora": agora, "24h": agora - 24 * 3600, "48h": agora - 48 * 3600}
+    pesos = dict(SO_DESCONTO, desconto=0, recencia=1)
+    assert pontuar(ofertas, pesos, ultimos_envios=envios, agora=agora) == pytest.approx([1.0, 0.0, 0.5, 0.75])
+    # Sem registro de envios, todas ganham o bônus inteiro
+    assert pontuar(ofertas, pesos) == pytest.approx([1.0] * 4)
+
+
+def test_valor_nao_finito_nao_estraga_a_coluna():
+    ofertas = [_oferta("a", desconto=0.5), _oferta("b", desconto=math.nan), _oferta("c", desconto=0.2, vendas=math.inf)]
+    score = pontuar(ofertas)
+    assert np.isfinite(score).all()
+    assert [o["chave"] for o in selecionar_melhores(ofertas, 2)] == ["a", "c"]
+
+
+def test_oferta_da_api_com_nan_vira_padrao():
+    oferta = processar_oferta_individual({"itemId": 1, "price": "NaN", "ratingStar": "inf",
+                                          "priceDiscountRate": "nan", "sales": "12"}, 1)
+    assert (oferta["preco_valor"], oferta["avaliacao_valor"], oferta["desconto"], oferta["vendas"]) == (99.99, 4.5, 0.0, 12.0)
+
+
+def test_pesos_do_config_sao_convertidos_ou_ignorados():
+    avisos = []
+    pesos = ler_pesos({"desconto": "2", "comissao": "muito", "vendas": None, "preco": "nan", "cor": 1}, avisos.append)
+    assert pesos["desconto"] == 2.0
+    assert pesos["comissao"] == PESOS_PADRAO["comissao"]
+    assert pesos["vendas"] == PESOS_PADRAO["vendas"]
+    assert pesos["preco"] == PESOS_PADRAO["preco"]
+    assert "cor" not in pesos
+    assert len(avisos) == 4
+
+    # Peso em texto não derruba a execução
+    ofertas = [_oferta("a", desconto=0.1), _oferta("b", desconto=0.9)]
+    assert [o["chave"] for o in selecionar_melhores(ofertas, 1, pesos={"desconto": "3"})] == ["b"]
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.scheduler import Agenda, Agendador, validar_expressao, PULAR, UMA, TODAS, MAX_PERDIDAS
+
+
+def test_horario_simples_e_dias_da_semana():
+    agenda = Agenda("09:30")
+    assert agenda.proxima(datetime(2026, 3, 2, 9, 29)) == datetime(2026, 3, 2, 9, 30)
+    # Estritamente depois: no próprio horário já vai para o dia seguinte
+    assert agenda.proxima(datetime(2026, 3, 2, 9, 30)) == datetime(2026, 3, 3, 9, 30)
+
+    # 2026-03-06 é sexta
+    assert Agenda("08:00 seg,qua").proxima(datetime(2026, 3, 6, 12, 0)) == datetime(2026, 3, 9, 8, 0)
+
+
+def test_cron_com_passo_e_faixas():
+    agenda = Agenda("*/20 8-9 * * seg-sex")
+    depois = datetime(2026, 3, 6, 9, 45)  # sexta
+    assert agenda.proxima(depois) == datetime(2026, 3, 9, 8, 0)
+    assert agenda.proxima(datetime(2026, 3, 9, 8, 0)) == datetime(2026, 3, 9, 8, 20)
+    assert agenda.proxima(datetime(2026, 3, 9, 8, 40)) == datetime(2026, 3, 9, 9, 0)
+
+
+def test_dia_do_mes_ou_dia_da_semana():
+    # Como no cron: dia 15 OU domingo
+    agenda = Agenda("0 12 15 * 0")
+    assert agenda.proxima(datetime(2026, 3, 9, 0, 0)) == datetime(2026, 3, 15, 12, 0)   # dia 15 (e domingo)
+    assert agenda.proxima(datetime(2026, 3, 15, 12, 0)) == datetime(2026, 3, 22, 12, 0)  # domingo seguinte
+
+
+@pytest.mark.parametrize("faixa, esperado", [
+    ("sab-dom", {6, 0}),
+    ("5-1", {5, 6, 0, 1}),
+    ("sex-seg/2", {5, 0}),
+    ("7-2", {0, 1, 2}),
+    ("1-7", {0, 1, 2, 3, 4, 5, 6}),
+])
+def test_faixa_de_dias_da_semana_da_volta(faixa, esperado):
+    assert Agenda(f"0 9 * * {faixa}").semana == esperado
+
+
+def test_fim_de_semana_com_volta():
+    agenda = Agenda("10:00 sab-dom")
+    assert agenda.proxima(datetime(2026, 3, 6, 11, 0)) == datetime(2026, 3, 7, 10, 0)
+    assert agenda.proxima(datetime(2026, 3, 7, 10, 0)) == datetime(2026, 3, 8, 10, 0)
+    assert agenda.proxima(datetime(2026, 3, 8, 10, 0)) == datetime(2026, 3, 14, 10, 0)
+
+
+@pytest.mark.parametrize("expressao", [
+    "25:00", "9:61", "abc", "* * * *", "0 0 32 * *", "0 0 * 13 *", "*/0 * * * *",
+    "30-10 * * * *",          # faixa invertida fora do dia da semana
+    "0 0 31 2 *",             # 31 de fevereiro: nunca dispara
+    "0 0 30 2 *",
+    "09:00 xyz",
+])
+def test_expressoes_invalidas(expressao):
+    assert validar_expressao(expressao)
+    with pytest.raises((ValueError, KeyError)):
+        Agenda(expressao)
+
+
+def test_expressoes_validas():
+    for expressao in ("09:30", "9:05 seg-sex", "0 0 29 2 *", "*/5 * * * *", "0 8,12,18 * * 1-5"):
+        assert validar_expressao(expressao) is None
+
+
+def _vencidas(politica, horario_salvo, agora):
+    agendador = Agendador(lambda tarefa, horario: None, politica_atraso=politica)
+    agendador.adicionar("0 * * * *", proxima=horario_salvo)
+    return [horario for _, horario in agendador._vencidas(agora)], agendador.proximas()[0][0]
+
+
+def test_politicas_de_atraso():
+    salvo = datetime(2026, 3, 2, 8, 0)
+    agora = datetime(2026, 3, 2, 11, 30)  # 8h, 9h, 10h e 11h perdidos
+
+    assert _vencidas(PULAR, salvo, agora) == ([], datetime(2026, 3, 2, 12, 0))
+    assert _vencidas(UMA, salvo, agora) == ([datetime(2026, 3, 2, 11, 0)], datetime(2026, 3, 2, 12, 0))
+    assert _vencidas(TODAS, salvo, agora)[0] == [datetime(2026, 3, 2, h, 0) for h in (8, 9, 10, 11)]
+
+
+def test_todas_repoe_no_maximo_as_mais_recentes(capsys):
+    agendador = Agendador(lambda tarefa, horario: None, politica_atraso=TODAS)
+    agendador.adicionar("*/5 * * * *", proxima=datetime(2026, 3, 1, 0, 0))
+    agora = datetime(2026, 3, 8, 0, 2)  # Uma semana parado: 2017 horários perdidos
+
+    horarios = [horario for _, horario in agendador._vencidas(agora)]
+    assert len(horarios) == MAX_PERDIDAS
+    assert horarios[-1] == datetime(2026, 3, 8, 0, 0)
+    assert horarios[0] == datetime(2026, 3, 8, 0, 0) - timedelta(minutes=5 * (MAX_PERDIDAS - 1))
+    assert f"{2017 - MAX_PERDIDAS} execuções perdidas descartadas" in capsys.readouterr().out
+
+
+def test_no_horario_executa_em_qualquer_politica():
+    agora = datetime(2026, 3, 2, 9, 0, 30)
+    for politica in (PULAR, UMA, TODAS):
+        assert _vencidas(politica, datetime(2026, 3, 2, 9, 0), agora)[0] == [datetime(2026, 3, 2, 9, 0)]
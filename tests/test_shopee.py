@@ -0,0 +1,175 @@
+import pytest
+import requests
+
+import core.shopee as shopee
+import core.shopee_cache as shopee_cache
+from core.shopee_cache import CacheRespostas
+
+OK = {"data": {"productOfferV2": {"nodes": [], "pageInfo": {"hasNextPage": False}}}}
+LIMITE = {"errors": [{"message": "rate limit", "extensions": {"code": 10030}}], "data": None}
+SEM_PERMISSAO = {"errors": [{"message": "access deny", "extensions": {"code": "10031"}}], "data": None}
+
+
+class _Resposta:
+    def __init__(self, status, corpo=None, headers=None):
+        self.status_code = status
+        self.corpo = corpo
+        self.headers = headers or {}
+
+    def json(self):
+        return self.corpo
+
+
+class _Sessao:
+    def __init__(self, respostas):
+        self.respostas = list(respostas)
+        self.chamadas = 0
+
+    def post(self, url, **kwargs):
+        self.chamadas += 1
+        resposta = self.respostas.pop(0)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+
+def _api(tmp_path, monkeypatch, respostas):
+    sessao = _Sessao(respostas)
+    esperas = []
+    monkeypatch.setattr(shopee, "obter_sessao", lambda: sessao)
+    monkeypatch.setattr(shopee.limitador, "aguardar", lambda: None)
+    monkeypatch.setattr(shopee.time, "sleep", esperas.append)
+    monkeypatch.setattr(shopee_cache, "_cache", CacheRespostas(pasta=str(tmp_path), validade=60))
+    return sessao, esperas
+
+
+def test_repete_em_429_respeitando_retry_after(tmp_path, monkeypatch):
+    sessao, esperas = _api(tmp_path, monkeypatch, [
+        _Resposta(429, headers={"Retry-After": "7"}),
+        requests.ConnectionError("caiu"),
+        _Resposta(200, OK),
+    ])
+    assert shopee.executar_query("1", "s", "{ q }") == OK
+    assert sessao.chamadas == 3
+    assert esperas[0] >= 7 and len(esperas) == 2
+
+
+def test_repete_em_erro_de_limite_com_http_200(tmp_path, monkeypatch):
+    sessao, esperas = _api(tmp_path, monkeypatch, [_Resposta(200, LIMITE), _Resposta(200, OK)])
+    antes = shopee.estatisticas_api()
+
+    assert shopee.executar_query("1", "s", "{ q }") == OK
+    assert sessao.chamadas == 2
+    assert shopee.estatisticas_api()["novas_tentativas"] == antes["novas_tentativas"] + 1
+
+
+def test_erro_definitivo_nao_repete(tmp_path, monkeypatch):
+    sessao, _ = _api(tmp_path, monkeypatch, [_Resposta(200, SEM_PERMISSAO)])
+    assert shopee.executar_query("1", "s", "{ q }") == SEM_PERMISSAO
+    assert sessao.chamadas == 1
+
+
+def test_desiste_depois_das_tentativas(tmp_path, monkeypatch):
+    sessao, esperas = _api(tmp_path, monkeypatch, [_Resposta(200, LIMITE)] * shopee.TENTATIVAS_API)
+    assert shopee.executar_query("1", "s", "{ q }") is None
+    assert sessao.chamadas == shopee.TENTATIVAS_API
+    assert all(espera <= shopee.ESPERA_MAXIMA for espera in esperas)
+
+
+def test_resposta_valida_vem_do_cache_depois(tmp_path, monkeypatch):
+    sessao, _ = _api(tmp_path, monkeypatch, [_Resposta(200, OK)])
+    assert shopee.executar_query("1", "s", "{ q }") == OK
+    assert shopee.executar_query("1", "s", "{  q  }") == OK
+    assert sessao.chamadas == 1
+
+
+def test_consulta_monta_so_os_filtros_informados():
+    consulta = shopee.ConsultaOfertas(keyword=' fone "bt" ', sort_type=shopee.ORDEM_MAIS_VENDIDOS,
+                                      list_type=shopee.LISTA_MAIOR_COMISSAO, shop_id="42")
+    assert consulta.argumentos(2, 20) == 'keyword: "fone \\"bt\\"", sortType: 2, shopId: 42, listType: 1, page: 2, limit: 20'
+    assert shopee.ConsultaOfertas().query(1, 5) == (
+        "{ productOfferV2(page: 1, limit: 5) { nodes { itemId productName price ratingStar offerLink imageUrl } "
+        "pageInfo { hasNextPage } } }")
+
+
+@pytest.mark.parametrize("argumentos", [
+    {"sort_type": 9}, {"list_type": 7}, {"list_type": -1}, {"shop_id": "abc"}, {"campos": ("itemId", "x y")},
+])
+def test_consulta_recusa_valores_invalidos(argumentos):
+    with pytest.raises(ValueError):
+        shopee.ConsultaOfertas(**argumentos)
+
+
+def test_montar_consulta_por_nome():
+    from core.engine import montar_consulta
+
+    consulta = montar_consulta({"ordem": "comissao", "lista": "mais_vendidas", "categoria": "100", "ranking": True})
+    assert (consulta.sort_type, consulta.list_type, consulta.product_cat_id) == (5, 2, 100)
+    assert "sales" in consulta.campos
+    with pytest.raises(ValueError):
+        montar_consulta({"lista": "outra"})
+    with pytest.raises(ValueError):
+        montar_consulta({"ordem": "preco"})
+
+
+def _paginas(total, por_pagina, ultima_tem_proxima=False):
+    """executar_query falso: `total` ofertas em páginas de `por_pagina`; registra cada chamada"""
+    chamadas = []
+
+    def executar_query(appid, secret, query, variables=None):
+        pagina = len(chamadas) + 1
+        chamadas.append(query)
+        inicio = (pagina - 1) * por_pagina
+        nodes = [{"itemId": i + 1, "productName": f"P{i}", "price": "10"} for i in range(inicio, min(inicio + por_pagina, total))]
+        proxima = inicio + por_pagina < total or ultima_tem_proxima
+        return {"data": {"productOfferV2": {"nodes": nodes, "pageInfo": {"hasNextPage": proxima}}}}
+
+    return executar_query, chamadas
+
+
+SECRET = "s" * 32
+
+
+def test_paginacao_busca_sob_demanda(monkeypatch):
+    falso, chamadas = _paginas(100, 20)
+    monkeypatch.setattr(shopee, "executar_query", falso)
+
+    ofertas = shopee.iterar_ofertas_shopee("1", SECRET, limit=50, por_pagina=20)
+    assert chamadas == []  # Gerador: nada é buscado antes do primeiro next()
+    assert next(ofertas)["chave"] == "shopee:1"
+    assert len(chamadas) == 1
+    assert "page: 1, limit: 20" in chamadas[0]
+
+
+def test_paginacao_para_no_limite_pedido(monkeypatch):
+    falso, chamadas = _paginas(100, 20)
+    monkeypatch.setattr(shopee, "executar_query", falso)
+
+    ofertas = list(shopee.iterar_ofertas_shopee("1", SECRET, limit=45, por_pagina=20))
+    assert [o["chave"] for o in ofertas] == [f"shopee:{i}" for i in range(1, 46)]
+    assert len(chamadas) == 3
+    assert "page: 3, limit: 20" in chamadas[2]
+
+
+def test_paginacao_para_sem_proxima_pagina(monkeypatch):
+    falso, chamadas = _paginas(30, 20)
+    monkeypatch.setattr(shopee, "executar_query", falso)
+
+    assert len(list(shopee.iterar_ofertas_shopee("1", SECRET, limit=100, por_pagina=20))) == 30
+    assert len(chamadas) == 2
+
+
+def test_paginacao_para_em_pagina_vazia(monkeypatch):
+    falso, chamadas = _paginas(20, 20, ultima_tem_proxima=True)
+    monkeypatch.setattr(shopee, "executar_query", falso)
+
+    assert len(list(shopee.iterar_ofertas_shopee("1", SECRET, limit=100, por_pagina=20))) == 20
+    assert len(chamadas) == 2
+
+
+def test_paginacao_sem_credenciais_nao_chama_a_api(monkeypatch):
+    falso, chamadas = _paginas(20, 20)
+    monkeypatch.setattr(shopee, "executar_query", falso)
+
+    assert list(shopee.iterar_ofertas_shopee("1", "curto", limit=5)) == []
+    assert chamadas == []
@@ -0,0 +1,102 @@
+import os
+import json
+import time
+
+import pytest
+
+import core.shopee_cache as shopee_cache
+from core.shopee_cache import CacheRespostas, chave_requisicao, normalizar_query, NORMAL, GRAVAR, REPRODUZIR
+
+RESPOSTA = {"data": {"productOfferV2": {"nodes": [{"itemId": 1}], "pageInfo": {"hasNextPage": False}}}}
+
+
+def test_normalizacao_ignora_espacos_fora_das_strings():
+    assert (normalizar_query("{ productOfferV2(page: 1,  limit: 20) {\n  nodes { itemId }\n} }")
+            == normalizar_query("{productOfferV2(page:1,limit:20){nodes{itemId}}}"))
+
+
+def test_normalizacao_preserva_o_conteudo_das_strings():
+    assert chave_requisicao("1", 'query { p(keyword: "a (b)") }') != chave_requisicao("1", 'query { p(keyword: "a(b)") }')
+    assert chave_requisicao("1", '{ p(keyword: "fone  bt") }') != chave_requisicao("1", '{ p(keyword: "fone bt") }')
+    assert normalizar_query('{ p(keyword: "diz \\"oi\\" , ok" ,page: 1) }') == '{p(keyword:"diz \\"oi\\" , ok",page:1)}'
+
+
+def test_chave_depende_de_conta_e_variaveis():
+    query = "{ p { x } }"
+    assert chave_requisicao("1", query) != chave_requisicao("2", query)
+    assert chave_requisicao("1", query, {"a": 1, "b": 2}) == chave_requisicao("1", query, {"b": 2, "a": 1})
+    assert chave_requisicao("1", query, {"a": 1}) != chave_requisicao("1", query, {"a": 2})
+
+
+def test_validade(tmp_path, monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(shopee_cache.time, "time", lambda: agora[0])
+    cache = CacheRespostas(pasta=str(tmp_path), validade=60)
+
+    assert cache.obter("k") is None
+    cache.guardar("k", RESPOSTA)
+    agora[0] += 59
+    assert cache.obter("k") == RESPOSTA
+    agora[0] += 1
+    assert cache.obter("k") is None
+    assert cache.estatisticas() == {"acertos": 1, "faltas": 2, "gravadas": 0, "modo": NORMAL}
+
+
+def test_arquivos_vencidos_sao_varridos_nas_gravacoes(tmp_path, monkeypatch):
+    monkeypatch.setattr(shopee_cache, "VARREDURA_A_CADA", 3)
+    cache = CacheRespostas(pasta=str(tmp_path), validade=60)
+    antigo = time.time() - 120
+    for nome in ("velha.json", "abandonado.json.abc.tmp"):
+        (tmp_path / nome).write_text("{}")
+        os.utime(tmp_path / nome, (antigo, antigo))
+    (tmp_path / "outro.txt").write_text("")
+    os.utime(tmp_path / "outro.txt", (antigo, antigo))
+
+    # A primeira gravação já limpa o que sobrou de execuções anteriores
+    cache.guardar("a", RESPOSTA)
+    assert sorted(os.listdir(tmp_path)) == ["a.json", "outro.txt"]
+
+    os.utime(tmp_path / "a.json", (antigo, antigo))
+    cache.guardar("b", RESPOSTA)
+    cache.guardar("c", RESPOSTA)
+    assert "a.json" in os.listdir(tmp_path)
+    cache.guardar("d", RESPOSTA)  # Quarta gravação: nova varredura
+    assert sorted(os.listdir(tmp_path)) == ["b.json", "c.json", "d.json", "outro.txt"]
+
+
+def test_nao_guarda_respostas_com_erro(tmp_path):
+    cache = CacheRespostas(pasta=str(tmp_path))
+    cache.guardar("erro", {"errors": [{"message": "limite"}], "data": None})
+    cache.guardar("sem_dados", {"foo": 1})
+    assert cache.obter("erro") is None and cache.obter("sem_dados") is None
+
+
+def test_validade_zero_desliga_o_cache(tmp_path):
+    cache = CacheRespostas(pasta=str(tmp_path), validade=0)
+    cache.guardar("k", RESPOSTA)
+    assert cache.obter("k") is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_gravar_e_reproduzir(tmp_path):
+    arquivo = tmp_path / "respostas.jsonl"
+    gravador = CacheRespostas(pasta=str(tmp_path / "cache"), modo=GRAVAR, arquivo=str(arquivo))
+    assert gravador.obter("k1") is None  # Gravando, sempre consulta a API
+    gravador.guardar("k1", RESPOSTA)
+    gravador.guardar("k2", {"data": {"x": 1}})
+    gravador.guardar("k2", {"data": {"x": 2}})
+
+    linhas = [json.loads(linha) for linha in arquivo.read_text(encoding="utf-8").splitlines()]
+    assert [linha["chave"] for linha in linhas] == ["k1", "k2", "k2"]
+
+    reprodutor = CacheRespostas(pasta=str(tmp_path / "cache"), modo=REPRODUZIR, arquivo=str(arquivo))
+    assert reprodutor.obter("k1") == RESPOSTA
+    assert reprodutor.obter("k2") == {"data": {"x": 2}}  # A última gravação vence
+    assert reprodutor.obter("k3") is None
+
+
+def test_modos_invalidos(tmp_path):
+    with pytest.raises(ValueError):
+        CacheRespostas(pasta=str(tmp_path), modo="outro")
+    with pytest.raises(ValueError):
+        CacheRespostas(pasta=str(tmp_path), modo=REPRODUZIR)
@@ -0,0 +1,59 @@
+import os
+
+from PIL import Image
+
+import core.image_cache as image_cache
+from core.image_cache import CacheImagens
+from core.utils import normalizar_imagem, estatisticas_normalizacao
+
+
+def _imagem_no_cache(tmp_path, monkeypatch, tamanho, nome="a"):
+    cache = CacheImagens(pasta=str(tmp_path / "cache"))
+    monkeypatch.setattr(image_cache, "_cache", cache)
+    caminho = cache.caminho(nome)
+    Image.new("RGB", tamanho, (200, 30, 30)).save(caminho, "PNG")
+    return caminho
+
+
+def test_imagem_grande_e_reduzida_e_reaproveitada(tmp_path, monkeypatch):
+    caminho = _imagem_no_cache(tmp_path, monkeypatch, (3000, 1500))
+    normalizada = normalizar_imagem(caminho)
+
+    assert normalizada != caminho
+    with Image.open(normalizada) as img:
+        assert img.format == "JPEG"
+        assert max(img.size) == 1280
+    antes = estatisticas_normalizacao()["imagens"]
+    assert normalizar_imagem(caminho) == normalizada
+    assert estatisticas_normalizacao()["imagens"] == antes
+
+
+def test_economia_contada_em_bytes_de_dib(tmp_path, monkeypatch):
+    caminho = _imagem_no_cache(tmp_path, monkeypatch, (2560, 1280))
+    antes = estatisticas_normalizacao()
+
+    normalizar_imagem(caminho)
+    depois = estatisticas_normalizacao()
+    assert depois["dib_original"] - antes["dib_original"] == 2560 * 1280 * 3
+    assert depois["dib_final"] - antes["dib_final"] == 1280 * 640 * 3
+    assert depois["dib_economizado"] - antes["dib_economizado"] == (2560 * 1280 - 1280 * 640) * 3
+
+
+def test_imagem_pequena_nao_e_recodificada(tmp_path, monkeypatch):
+    caminho = _imagem_no_cache(tmp_path, monkeypatch, (10, 10))
+    antes = estatisticas_normalizacao()["imagens"]
+
+    assert normalizar_imagem(caminho) == caminho
+    # A marca de "já cabe" evita abrir a imagem de novo
+    assert normalizar_imagem(caminho) == caminho
+    assert estatisticas_normalizacao()["imagens"] == antes
+    assert not any(nome.endswith(".jpg") for nome in os.listdir(tmp_path / "cache"))
+
+
+def test_imagem_fora_do_cache_nao_gera_arquivos(tmp_path, monkeypatch):
+    _imagem_no_cache(tmp_path, monkeypatch, (10, 10))
+    fora = tmp_path / "foto.png"
+    Image.new("RGB", (3000, 1500)).save(fora)
+
+    assert normalizar_imagem(str(fora)) == str(fora)
+    assert set(os.listdir(tmp_path)) == {"cache", "foto.png"}
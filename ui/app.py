@@ -1,11 +1,11 @@
 import flet as ft
-from database.db import init_db, salvar_historico, ler_historico
+from database.db import (init_db, ler_historico_pagina, listar_canais,
+                         criar_agendamento, atualizar_agendamento, remover_agendamento, definir_proxima_execucao,
+                         listar_agendamentos)
 import threading
-import time
-import os
-from core.shopee import buscar_ofertas_shopee_reais
-from core.whatsapp import WhatsAppBot
-from core.utils import baixar_imagem, copy_image_to_clipboard
+from core.engine import Motor, carregar_config, salvar_config, migrar_horarios_antigos
+from core.scheduler import validar_expressao, UMA, TODAS, PULAR
+from ui.log_panel import LogPanel, LINHAS_MAXIMAS
 
 def main_app(page: ft.Page):
     page.title = "ZapFinder Automation v2.0"
@@ -30,9 +30,11 @@ def main_app(page: ft.Page):
         bgcolor="#1F000000"
     )
 
+    # Últimas linhas na tela (atualizada em lotes); o log completo vai para logs/zapfinder.log
+    log_panel = LogPanel(log_column)
+
     def add_log(msg):
-        log_column.controls.append(ft.Text(f"> {msg}", font_family="Consolas"))
-        page.update()
+        log_panel.adicionar(msg)
         
     # Refs for buttons to update state
     btn_iniciar = ft.ElevatedButton("Iniciar Envio Shopee")
@@ -47,8 +49,35 @@ def main_app(page: ft.Page):
     # Inputs
     input_appid = ft.TextField(label="Shopee App ID", password=True, can_reveal_password=True)
     input_secret = ft.TextField(label="Shopee Secret Key", password=True, can_reveal_password=True)
-    input_grupo = ft.TextField(label="Nome do Grupo WhatsApp", value="Teste")
+    input_grupo = ft.TextField(label="Grupos WhatsApp (separados por vírgula)", value="Teste")
     input_limit = ft.TextField(label="Quantidade de Produtos", value="5", keyboard_type=ft.KeyboardType.NUMBER)
+    input_navegadores = ft.TextField(label="Navegadores em paralelo (cada um com login próprio)", value="1", keyboard_type=ft.KeyboardType.NUMBER)
+    input_janela = ft.TextField(label="Não repetir oferta no mesmo grupo por (horas, 0 = desativado)", value="24", keyboard_type=ft.KeyboardType.NUMBER)
+    # Filtros aplicados pela própria API Shopee (productOfferV2)
+    input_palavra = ft.TextField(label="Palavra-chave da busca (vazio = todas as ofertas)")
+    dropdown_ordem = ft.Dropdown(label="Ordenar ofertas por", value="", options=[
+        ft.dropdown.Option("", "Padrão da API"),
+        ft.dropdown.Option("relevancia", "Relevância"),
+        ft.dropdown.Option("vendas", "Mais vendidos"),
+        ft.dropdown.Option("comissao", "Maior comissão"),
+        ft.dropdown.Option("menor_preco", "Menor preço"),
+        ft.dropdown.Option("maior_preco", "Maior preço"),
+    ])
+    dropdown_lista = ft.Dropdown(label="Lista de ofertas", value="", options=[
+        ft.dropdown.Option("", "Padrão da API"),
+        ft.dropdown.Option("todas", "Todas"),
+        ft.dropdown.Option("maior_comissao", "Maior comissão"),
+        ft.dropdown.Option("mais_vendidas", "Mais vendidas"),
+    ])
+    input_categoria = ft.TextField(label="ID da categoria (opcional)", keyboard_type=ft.KeyboardType.NUMBER)
+    input_loja = ft.TextField(label="ID da loja (opcional)", keyboard_type=ft.KeyboardType.NUMBER)
+    # Ranking: busca mais candidatas e envia as melhores pela pontuação (core/ranking.py)
+    switch_ranking = ft.Switch(label="Escolher as melhores ofertas (desconto, comissão, vendas, avaliação, envio mais antigo)")
+    input_candidatos = ft.TextField(label="Ofertas candidatas", hint_text="5x a quantidade", width=160, keyboard_type=ft.KeyboardType.NUMBER)
+    input_preco_min = ft.TextField(label="Preço mínimo", width=140, keyboard_type=ft.KeyboardType.NUMBER)
+    input_preco_max = ft.TextField(label="Preço máximo", width=140, keyboard_type=ft.KeyboardType.NUMBER)
+    input_cache_shopee = ft.TextField(label="Reaproveitar resposta da API Shopee por (segundos, 0 = desativado)", value="600", keyboard_type=ft.KeyboardType.NUMBER)
+    input_linhas_log = ft.TextField(label="Linhas de log na tela", value=str(LINHAS_MAXIMAS), keyboard_type=ft.KeyboardType.NUMBER)
 
     # History Data Table
     history_table = ft.DataTable(
@@ -56,149 +85,150 @@ def main_app(page: ft.Page):
             ft.DataColumn(ft.Text("ID")),
             ft.DataColumn(ft.Text("Data")),
             ft.DataColumn(ft.Text("Produto")),
+            ft.DataColumn(ft.Text("Canal")),
             ft.DataColumn(ft.Text("Status")),
         ],
         rows=[]
     )
 
-    def load_history():
-        history_table.rows.clear()
-        dados = ler_historico()
-        for row in dados:
-            history_table.rows.append(
-                ft.DataRow(cells=[
-                    ft.DataCell(ft.Text(str(row[0]))),
-                    ft.DataCell(ft.Text(str(row[1]))),
-                    ft.DataCell(ft.Text(str(row[2])[:30] + "...")),
-                    ft.DataCell(ft.Text(str(row[3]))),
-                ])
-            )
-        page.update()
+    # Filtros do histórico
+    TODOS = "Todos"
+    filtro_status = ft.Dropdown(label="Status", width=150, value=TODOS,
+                                options=[ft.dropdown.Option(o) for o in (TODOS, "Sucesso", "Erro")])
+    filtro_canal = ft.Dropdown(label="Canal", width=250, value=TODOS, options=[ft.dropdown.Option(TODOS)])
+    filtro_data_inicio = ft.TextField(label="De (AAAA-MM-DD)", width=160)
+    filtro_data_fim = ft.TextField(label="Até (AAAA-MM-DD)", width=160)
+    btn_carregar_mais = ft.TextButton("Carregar mais", icon="expand_more")
+
+    # Keyset: maior id exibido (para buscar só o que é novo) e menor id (para a próxima página)
+    HIST_PAGINA = 50
+    hist_estado = {"max_id": None, "min_id": None, "fim": False}
+    hist_lock = threading.Lock()
+
+    def filtros_historico():
+        return {
+            "status": None if filtro_status.value in (None, TODOS) else filtro_status.value,
+            "canal": None if filtro_canal.value in (None, TODOS) else filtro_canal.value,
+            "data_inicio": (filtro_data_inicio.value or "").strip() or None,
+            "data_fim": (filtro_data_fim.value or "").strip() or None,
+        }
 
-    # --- AUTOMATION LOGIC ---
-    def run_shopee_process():
-        appid = input_appid.value
-        secret = input_secret.value
-        grupo = input_grupo.value
-        try:
-            limit = int(input_limit.value)
-        except:
-            limit = 5
-        
-        if not appid or not secret:
-            add_log("Erro: Credenciais Shopee não preenchidas!")
-            return
+    def linha_historico(row):
+        return ft.DataRow(cells=[
+            ft.DataCell(ft.Text(str(row[0]))),
+            ft.DataCell(ft.Text(str(row[1]))),
+            ft.DataCell(ft.Text(str(row[2])[:30] + "...")),
+            ft.DataCell(ft.Text(str(row[4] or ""))),
+            ft.DataCell(ft.Text(str(row[3]))),
+        ])
 
-        page.process_running = True
-        btn_stop.disabled = False
-        btn_iniciar.disabled = True
+    def atualizar_canais():
+        atual = filtro_canal.value
+        filtro_canal.options = [ft.dropdown.Option(c) for c in [TODOS] + listar_canais()]
+        filtro_canal.value = atual if atual else TODOS
 
-        txt_status.value = "Rodando"
-        txt_status.color = "green"
+    def load_history():
+        """Acrescenta no topo só as linhas novas desde a última carga (ou a primeira página)"""
+        with hist_lock:
+            if hist_estado["max_id"] is None:
+                dados = ler_historico_pagina(limite=HIST_PAGINA, **filtros_historico())
+                history_table.rows.extend(linha_historico(row) for row in dados)
+                hist_estado["fim"] = len(dados) < HIST_PAGINA
+                if dados:
+                    hist_estado["min_id"] = dados[-1][0]
+            else:
+                dados = ler_historico_pagina(depois_de_id=hist_estado["max_id"], limite=10000, **filtros_historico())
+                history_table.rows[0:0] = [linha_historico(row) for row in dados]
+            if dados:
+                hist_estado["max_id"] = max(hist_estado["max_id"] or 0, dados[0][0])
+            btn_carregar_mais.visible = not hist_estado["fim"]
+            atualizar_canais()
         page.update()
 
-        try:
-            # 1. Buscar Ofertas
-            add_log("Buscando ofertas na Shopee...")
-            produtos = buscar_ofertas_shopee_reais(appid, secret, limit=limit)
-            
-            if not produtos:
-                add_log("Nenhum produto encontrado ou erro na API.")
-                txt_status.value = "Parado"
-                txt_status.color = "red"
-                page.update()
+    def load_more_history(e=None):
+        """Próxima página (linhas mais antigas) a partir do menor id exibido"""
+        with hist_lock:
+            if hist_estado["fim"] or hist_estado["min_id"] is None:
                 return
+            dados = ler_historico_pagina(antes_de_id=hist_estado["min_id"], limite=HIST_PAGINA, **filtros_historico())
+            history_table.rows.extend(linha_historico(row) for row in dados)
+            hist_estado["fim"] = len(dados) < HIST_PAGINA
+            if dados:
+                hist_estado["min_id"] = dados[-1][0]
+            btn_carregar_mais.visible = not hist_estado["fim"]
+        page.update()
 
-            add_log(f"Encontrados {len(produtos)} produtos. Iniciando WhatsApp...")
+    def reset_history(e=None):
+        """Filtros mudaram: recomeça da primeira página"""
+        with hist_lock:
+            history_table.rows.clear()
+            hist_estado.update({"max_id": None, "min_id": None, "fim": False})
+        load_history()
 
-            # 2. Iniciar WhatsApp
-            bot = WhatsAppBot()
-            if not bot.iniciar_driver():
-                add_log("Erro ao iniciar driver do WhatsApp.")
-                return
+    def on_scroll_history(e):
+        # Chegou perto do fim da lista: carrega a próxima página
+        if e.max_scroll_extent and e.pixels >= e.max_scroll_extent - 100:
+            load_more_history()
 
-            if not bot.aguardar_login():
-                add_log("Timeout no login do WhatsApp.")
-                bot.fechar()
-                return
+    btn_carregar_mais.on_click = load_more_history
+    filtro_status.on_change = reset_history
+    filtro_canal.on_change = reset_history
+    filtro_data_inicio.on_submit = reset_history
+    filtro_data_fim.on_submit = reset_history
 
-            if not bot.buscar_grupo(grupo):
-                add_log(f"Grupo '{grupo}' não encontrado.")
-                bot.fechar()
-                return
+    # --- AUTOMATION LOGIC ---
+    # O pipeline fica no Motor (core/engine.py); a tela só fornece a configuração e mostra o progresso
 
-            # 3. Enviar Produtos
-            enviados_count = 0
-            for i, p in enumerate(produtos):
-                # Check for stop signal
-                if not getattr(page, "process_running", True):
-                    add_log("Processo interrompido pelo usuário.")
-                    break
-
-                add_log(f"Enviando {i+1}/{len(produtos)}: {p['titulo'][:20]}...")
-                
-                # Baixar imagem
-                img_path = os.path.abspath(f"temp_prod_{i}.jpg")
-                if p.get('imagem_url'):
-                    baixar_imagem(p['imagem_url'], img_path)
-                
-                # Formatar mensagem (Simples por enquanto)
-                msg = f"*{p['titulo']}*\n\n🔥 Por: R$ {p['preco']}\n\n🛒 Compre aqui: {p['link']}"
-                
-                # Enviar
-                sucesso = False
-                status_envio = "Erro"
-                try:
-                    if os.path.exists(img_path):
-                         sucesso = bot.enviar_imagem(img_path, msg) # Envia imagem COM legenda
-                    else:
-                         sucesso = bot.enviar_mensagem_texto(msg) # Fallback texto
-                    
-                    if sucesso:
-                        status_envio = "Sucesso"
-                        enviados_count += 1
-                        txt_enviados.value = str(enviados_count)
-                        page.update()
-                except Exception as e:
-                    add_log(f"Erro envio: {e}")
-                
-                # Salvar no DB
-                salvar_historico(p['titulo'], "WhatsApp", status_envio)
-
-                # Clean up image
-                if os.path.exists(img_path):
-                    os.remove(img_path)
-                
-                time.sleep(2)
-
-            add_log("Processo finalizado!")
-            bot.fechar()
-            
-            # Recarrega histórico após finalizar
-            load_history()
+    def config_da_tela():
+        return {
+            "appid": input_appid.value,
+            "secret": input_secret.value,
+            "grupo": input_grupo.value,
+            "limit": input_limit.value,
+            "navegadores": input_navegadores.value,
+            "janela_repeticao": input_janela.value,
+            "cache_shopee_segundos": input_cache_shopee.value,
+            "palavra_chave": input_palavra.value,
+            "ordem": dropdown_ordem.value,
+            "lista": dropdown_lista.value,
+            "categoria": input_categoria.value,
+            "loja": input_loja.value,
+            "ranking": switch_ranking.value,
+            "candidatos_ranking": input_candidatos.value,
+            "preco_min": input_preco_min.value,
+            "preco_max": input_preco_max.value,
+            # Pesos do ranking só são editáveis no config.json
+            "pesos_ranking": current_config.get("pesos_ranking"),
+            "politica_atraso": dropdown_atraso.value,
+        }
 
-        except Exception as e:
-            add_log(f"Erro no processo: {e}")
-        
-        txt_status.value = "Parado"
-        txt_status.color = "red"
-        page.process_running = False
-        btn_stop.disabled = True
-        btn_iniciar.disabled = False
+    def ao_status(rodando):
+        txt_status.value = "Rodando" if rodando else "Parado"
+        txt_status.color = "green" if rodando else "red"
+        btn_stop.disabled = not rodando
+        btn_iniciar.disabled = rodando
+        page.update()
+
+    def ao_progresso(enviados):
+        txt_enviados.value = str(enviados)
         page.update()
 
+    motor = Motor(obter_config=config_da_tela, log=add_log, ao_status=ao_status,
+                  ao_progresso=ao_progresso, ao_finalizar=lambda resumo: load_history())
+
     def on_click_parar(e):
-        if hasattr(page, "process_running") and page.process_running:
+        if motor.em_execucao:
              add_log("Parando processo... aguarde o fim do item atual.")
-             page.process_running = False
-             page.update()
+             motor.parar()
 
     def on_click_iniciar(e):
         if hasattr(page, "auth_thread") and page.auth_thread.is_alive():
             add_log("Processo já está rodando!")
             return
         
-        page.auth_thread = threading.Thread(target=run_shopee_process, daemon=True)
+        if motor.em_execucao:
+            add_log("Execução agendada em andamento; o envio manual começa em seguida.")
+        page.auth_thread = threading.Thread(target=motor.executar, daemon=True)
         page.auth_thread.start()
 
     # Dashboard Tab
@@ -234,40 +264,40 @@ def main_app(page: ft.Page):
         ])
     ])
 
-    import json
-
-    CONFIG_FILE = "config.json"
-
-    def load_config():
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, "r") as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-
     def save_config(e):
-        cfg = {
-            "appid": input_appid.value,
-            "secret": input_secret.value,
-            "grupo": input_grupo.value,
-            "limit": input_limit.value,
-            # Scheduler Config
-            "scheduler_times": scheduled_times,
-        }
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(cfg, f)
+        salvar_config(dict(config_da_tela(), linhas_log=input_linhas_log.value))
+        aplicar_linhas_log()
         add_log("Configurações salvas com sucesso!")
 
     # Load initial config
-    current_config = load_config()
+    current_config = carregar_config()
 
     # Inputs
     input_appid.value = current_config.get("appid", "")
     input_secret.value = current_config.get("secret", "")
     input_grupo.value = current_config.get("grupo", "Teste")
     input_limit.value = current_config.get("limit", "5")
+    input_navegadores.value = current_config.get("navegadores", "1")
+    input_janela.value = current_config.get("janela_repeticao", "24")
+    input_cache_shopee.value = current_config.get("cache_shopee_segundos", "600")
+    input_palavra.value = current_config.get("palavra_chave", "")
+    dropdown_ordem.value = current_config.get("ordem", "")
+    dropdown_lista.value = current_config.get("lista", "")
+    input_categoria.value = current_config.get("categoria", "")
+    input_loja.value = current_config.get("loja", "")
+    switch_ranking.value = bool(current_config.get("ranking", False))
+    input_candidatos.value = current_config.get("candidatos_ranking", "")
+    input_preco_min.value = current_config.get("preco_min", "")
+    input_preco_max.value = current_config.get("preco_max", "")
+    input_linhas_log.value = current_config.get("linhas_log", str(LINHAS_MAXIMAS))
+
+    def aplicar_linhas_log():
+        try:
+            log_panel.linhas_maximas = max(10, int(input_linhas_log.value))
+        except ValueError:
+            pass
+
+    aplicar_linhas_log()
     
     # Config Tab
     config_content = ft.Column([
@@ -276,95 +306,87 @@ def main_app(page: ft.Page):
         input_secret,
         input_grupo,
         input_limit,
+        input_navegadores,
+        input_janela,
+        input_palavra,
+        ft.Row([dropdown_ordem, dropdown_lista, input_categoria, input_loja], wrap=True),
+        switch_ranking,
+        ft.Row([input_candidatos, input_preco_min, input_preco_max], wrap=True),
+        input_cache_shopee,
+        input_linhas_log,
         ft.ElevatedButton("Salvar Configurações", icon="save", on_click=save_config)
     ], scroll=ft.ScrollMode.AUTO)
 
     # History Tab
     history_content = ft.Column([
         ft.Text("Histórico de Envios", size=30, weight=ft.FontWeight.BOLD),
-        ft.ElevatedButton("Atualizar", icon="refresh", on_click=lambda e: load_history()),
-        ft.Container(content=history_table, expand=True, border=ft.border.all(1, "grey"), border_radius=10, padding=10)
-    ], expand=True, scroll=ft.ScrollMode.ALWAYS, horizontal_alignment=ft.CrossAxisAlignment.STRETCH)
+        ft.Row([
+            filtro_status,
+            filtro_canal,
+            filtro_data_inicio,
+            filtro_data_fim,
+            ft.ElevatedButton("Filtrar", icon="filter_list", on_click=reset_history),
+            ft.ElevatedButton("Atualizar", icon="refresh", on_click=lambda e: load_history()),
+        ], wrap=True),
+        ft.Container(content=history_table, expand=True, border=ft.border.all(1, "grey"), border_radius=10, padding=10),
+        btn_carregar_mais
+    ], expand=True, scroll=ft.ScrollMode.ALWAYS, on_scroll=on_scroll_history, horizontal_alignment=ft.CrossAxisAlignment.STRETCH)
 
     # --- SCHEDULER LOGIC ---
-    # --- SCHEDULER LOGIC ---
-    # --- SCHEDULER LOGIC ---
-    def run_scheduler_loop(times_list):
-        add_log(f"Agendador iniciado. Horários: {times_list}")
-        
-        last_run_minute = None
-
-        while hasattr(page, "scheduler_running") and page.scheduler_running:
-            import datetime
-            now = datetime.datetime.now()
-            current_time = now.strftime("%H:%M")
-            
-            # Verifica se já rodou neste minuto para evitar duplo disparo
-            # Verifica se o horario atual esta na lista de agendados
-            if current_time in times_list and current_time != last_run_minute:
-                add_log(f"Horário agendado ({current_time}) atingido! Executando...")
-                try:
-                    run_shopee_process()
-                    last_run_minute = current_time
-                    # Incrementa contador (visual apenas, se tivesse)
-                except Exception as e:
-                    add_log(f"Erro no agendador: {e}")
-            
-            # Reset last_run_minute se mudou o minuto para permitir executar se tiver outro horario colado
-            # (Ex: 09:00 e 09:01)
-            if current_time != last_run_minute:
-                 pass
-
-            # Aguarda 5s antes de checar novamente (polling mais rapido que 30s é melhor pra não perder o minuto)
-            for _ in range(5):
-                if not hasattr(page, "scheduler_running") or not page.scheduler_running:
-                    break
-                time.sleep(1)
-        
-        add_log("Agendador parado.")
-
     def on_click_start_scheduler(e):
-        if hasattr(page, "scheduler_running") and page.scheduler_running:
+        if motor.agendador_ativo:
             add_log("Agendador já está rodando.")
             return
-        
-        if not scheduled_times:
-            add_log("Adicione pelo menos um horário.")
+
+        total = motor.iniciar_agendador(dropdown_atraso.value or UMA)
+        if not total:
+            add_log("Adicione pelo menos um horário ativo.")
             return
 
-        page.scheduler_running = True
-        txt_scheduler_status.value = f"Ativo ({len(scheduled_times)} horários)"
+        txt_scheduler_status.value = f"Ativo ({total} agendamentos)"
         txt_scheduler_status.color = "green"
         btn_start_scheduler.disabled = True
         btn_stop_scheduler.disabled = False
-        page.update()
-
-        threading.Thread(target=run_scheduler_loop, args=(scheduled_times,), daemon=True).start()
+        update_times_list()
 
     def on_click_stop_scheduler(e):
-        page.scheduler_running = False
+        motor.parar_agendador()
         txt_scheduler_status.value = "Parado"
         txt_scheduler_status.color = "red"
         btn_start_scheduler.disabled = False
         btn_stop_scheduler.disabled = True
-        add_log("Parando agendador (aguarde)...")
+        add_log("Agendador parado. Um envio em andamento termina normalmente.")
         page.update()
 
     # Scheduler Logic & UI
-    
-    # Data storage for times
-    scheduled_times = []
-    
+    # Cada agendamento é uma linha da tabela agendamentos, com grupo/quantidade próprios
+
+    def descricao_job(job):
+        cfg = job["config"]
+        grupo = cfg.get("grupo") or "grupos da configuração"
+        qtd = cfg.get("limit") or input_limit.value
+        proxima = job["proxima_execucao"]
+        texto = f"{grupo} · {qtd} produtos"
+        if cfg.get("palavra_chave"):
+            texto += f" · \"{cfg['palavra_chave']}\""
+        if proxima and job["ativo"]:
+            texto += f" · próx. {proxima:%d/%m %H:%M}"
+        return texto
+
     def update_times_list():
         col_times.controls.clear()
-        for t in scheduled_times:
+        for job in listar_agendamentos():
             col_times.controls.append(
                 ft.Container(
                     content=ft.Row([
-                        ft.Text(t, size=16, weight=ft.FontWeight.BOLD),
+                        ft.Column([
+                            ft.Text(job["horario"], size=16, weight=ft.FontWeight.BOLD),
+                            ft.Text(descricao_job(job), size=12, color="grey"),
+                        ], spacing=2, expand=True),
+                        ft.Switch(value=job["ativo"], on_change=lambda e, job=job: toggle_job(job, e.control.value)),
                         ft.Container(
                             content=ft.Icon("delete", color="white", size=16),
-                            on_click=lambda e, time=t: remove_time(time),
+                            on_click=lambda e, job=job: remove_time(job),
                             padding=5,
                             ink=True,
                             border_radius=50,
@@ -382,29 +404,55 @@ def main_app(page: ft.Page):
             )
         page.update()
 
-    def remove_time(t):
-        if t in scheduled_times:
-            scheduled_times.remove(t)
-            update_times_list()
-            save_config(None) # Auto-save
+    def remove_time(job):
+        remover_agendamento(job["id"])
+        motor.desagendar(job["id"])
+        update_times_list()
 
-    def add_time_handler(e):
-        t = input_time.value
-        # Simple validation
-        if len(t) == 5 and t[2] == ":":
-             if t not in scheduled_times:
-                 scheduled_times.append(t)
-                 scheduled_times.sort()
-                 input_time.value = ""
-                 update_times_list()
-                 save_config(None) # Auto-save
-             else:
-                 input_time.error_text = "Horário já existe"
+    def toggle_job(job, ativo):
+        atualizar_agendamento(job["id"], ativo=ativo)
+        if ativo:
+            definir_proxima_execucao(job["id"], None)  # Conta a partir de agora, sem compensar o tempo desativado
+            job["proxima_execucao"] = None
+            motor.agendar(job)
         else:
-             input_time.error_text = "Formato inválido (HH:MM)"
+            motor.desagendar(job["id"])
+        update_times_list()
+
+    def add_time_handler(e):
+        t = " ".join((input_time.value or "").split())
+        erro = validar_expressao(t)
+        input_time.error_text = erro
+        input_job_limit.error_text = None
+        limite_txt = (input_job_limit.value or "").strip()
+        if erro is None and limite_txt and not limite_txt.isdigit():
+            input_job_limit.error_text = "Número inválido"
+            erro = input_job_limit.error_text
+        if erro is None:
+            cfg = {"grupo": (input_job_grupo.value or "").strip(), "limit": int(limite_txt) if limite_txt else None, "fonte": "shopee",
+                   "palavra_chave": (input_job_palavra.value or "").strip()}
+            id = criar_agendamento(t, cfg)
+            if id is not None:
+                motor.agendar({"id": id, "horario": t, "config": cfg, "proxima_execucao": None})
+            input_time.value = ""
+            update_times_list()
         page.update()
 
-    input_time = ft.TextField(label="Horário (HH:MM)", width=150)
+    input_time = ft.TextField(label="Horário", hint_text="09:30  |  09:30 seg,qua,sex  |  */30 8-18 * * 1-5", width=320)
+    input_job_grupo = ft.TextField(label="Grupos (vazio = da configuração)", width=260)
+    input_job_limit = ft.TextField(label="Produtos", hint_text=input_limit.value, width=100, keyboard_type=ft.KeyboardType.NUMBER)
+    input_job_palavra = ft.TextField(label="Palavra-chave (vazio = da configuração)", width=260)
+    dropdown_atraso = ft.Dropdown(
+        label="Horários perdidos (app fechado/PC dormindo)",
+        width=320,
+        value=UMA,
+        options=[
+            ft.dropdown.Option(UMA, "Executar uma vez"),
+            ft.dropdown.Option(TODAS, "Executar cada um"),
+            ft.dropdown.Option(PULAR, "Ignorar"),
+        ],
+        on_change=lambda e: save_config(None),
+    )
     btn_add_time = ft.Container(
         content=ft.Icon("add_circle", color="green"),
         on_click=add_time_handler,
@@ -418,9 +466,9 @@ def main_app(page: ft.Page):
     
     col_times = ft.GridView(
         expand=True,
-        runs_count=5,
-        max_extent=150,
-        child_aspect_ratio=3,
+        runs_count=3,
+        max_extent=420,
+        child_aspect_ratio=5,
         spacing=10,
         run_spacing=10,
     )
@@ -434,9 +482,10 @@ def main_app(page: ft.Page):
         ft.Text("Agendamento Automático", size=30, weight=ft.FontWeight.BOLD),
         ft.Row([ft.Text("Status:", size=16), txt_scheduler_status]),
         ft.Divider(),
-        ft.Text("Adicionar Horários de Execução (Diário):"),
-        ft.Row([input_time, btn_add_time]),
-        ft.Text("Lista de Horários:", weight=ft.FontWeight.BOLD),
+        ft.Text("Adicionar Horários de Execução (diário, dias da semana ou cron):"),
+        ft.Row([input_time, input_job_grupo, input_job_limit, input_job_palavra, btn_add_time], wrap=True),
+        dropdown_atraso,
+        ft.Text("Agendamentos:", weight=ft.FontWeight.BOLD),
         ft.Container(
             content=col_times,
             border=ft.border.all(1, "grey"),
@@ -546,7 +595,9 @@ def main_app(page: ft.Page):
 
     # Load Scheduler Config (Must be done after components are initialized)
     try:
-        scheduled_times.extend(current_config.get("scheduler_times", []))
+        init_db()
+        dropdown_atraso.value = current_config.get("politica_atraso", UMA)
+        migrar_horarios_antigos()
         update_times_list()
     except Exception as e:
         print(f"Erro ao carregar config do agendador: {e}")
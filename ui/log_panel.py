@@ -0,0 +1,91 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+LINHAS_MAXIMAS = 500            # Linhas mantidas na tela (as mais antigas saem)
+INTERVALO_ATUALIZACAO = 0.25    # Segundos mínimos entre duas atualizações da tela
+ARQUIVO_LOG = os.path.join("logs", "zapfinder.log")
+TAMANHO_ARQUIVO = 5 * 1024 * 1024
+ARQUIVOS_BACKUP = 3
+
+
+def _criar_logger(arquivo):
+    logger = logging.getLogger("zapfinder")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        try:
+            os.makedirs(os.path.dirname(arquivo) or ".", exist_ok=True)
+            handler = RotatingFileHandler(arquivo, maxBytes=TAMANHO_ARQUIVO, backupCount=ARQUIVOS_BACKUP, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+        except OSError as e:
+            print(f"Erro ao abrir arquivo de log: {e}")
+    return logger
+
+
+def _texto_flet(linha):
+    import flet as ft  # Só quando há tela: a lógica do painel não depende do Flet
+    return ft.Text(f"> {linha}", font_family="Consolas")
+
+
+class LogPanel:
+    """Painel de log com tamanho limitado e atualização da tela em lotes.
+
+    adicionar() pode ser chamado de qualquer thread: a linha vai na hora para o
+    arquivo de log (rotativo) e entra numa fila; a tela recebe as linhas
+    acumuladas de uma vez, no máximo uma atualização a cada `intervalo`.
+    Só as últimas `linhas_maximas` ficam na tela. `criar_controle` transforma
+    cada linha no controle exibido (por padrão um ft.Text).
+    """
+
+    def __init__(self, column, linhas_maximas=LINHAS_MAXIMAS, intervalo=INTERVALO_ATUALIZACAO, arquivo=ARQUIVO_LOG,
+                 criar_controle=_texto_flet):
+        self.column = column
+        self.criar_controle = criar_controle
+        self.linhas_maximas = linhas_maximas
+        self.intervalo = intervalo
+        self.logger = _criar_logger(arquivo)
+        self._pendentes = deque()
+        self._lock = threading.Lock()
+        self._lock_tela = threading.Lock()
+        self._agendado = False
+        self._ultima_atualizacao = 0.0
+
+    def adicionar(self, msg):
+        self.logger.info(msg)
+        with self._lock:
+            self._pendentes.append(msg)
+            if len(self._pendentes) > self.linhas_maximas:
+                self._pendentes.popleft()  # Numa rajada maior que o painel, as mais antigas nem chegariam à tela
+            if self._agendado:
+                return
+            self._agendado = True
+            espera = max(0.0, self._ultima_atualizacao + self.intervalo - time.monotonic())
+        timer = threading.Timer(espera, self._descarregar)
+        timer.daemon = True
+        timer.start()
+
+    def _descarregar(self):
+        with self._lock_tela:
+            self._descarregar_tela()
+
+    def _descarregar_tela(self):
+        with self._lock:
+            linhas = list(self._pendentes)
+            self._pendentes.clear()
+            self._agendado = False
+            self._ultima_atualizacao = time.monotonic()
+
+        controles = self.column.controls
+        controles.extend(self.criar_controle(linha) for linha in linhas)
+        excesso = len(controles) - self.linhas_maximas
+        if excesso > 0:
+            del controles[:excesso]
+        try:
+            self.column.update()  # Só o painel, não a página inteira
+        except Exception:
+            pass  # Painel ainda não está na página; aparece na próxima atualização